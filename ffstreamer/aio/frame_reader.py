@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+import sys
+from asyncio.exceptions import IncompleteReadError
+from os import readv
+from typing import Final, Optional
+
+from ffstreamer.aio.readable import wait_readable
+
+if sys.platform.startswith("linux"):
+    import fcntl
+
+    F_SETPIPE_SZ: Final[int] = getattr(fcntl, "F_SETPIPE_SZ", 1031)
+    F_GETPIPE_SZ: Final[int] = getattr(fcntl, "F_GETPIPE_SZ", 1032)
+
+DEFAULT_PIPE_SIZE: Final[int] = 1024 * 1024
+"""
+The default `/proc/sys/fs/pipe-max-size` for unprivileged processes.
+"""
+
+DEFAULT_RING_SIZE: Final[int] = 4
+
+
+def set_pipe_size(fd: int, size=DEFAULT_PIPE_SIZE) -> int:
+    """
+    Grow the kernel buffer of a pipe with `F_SETPIPE_SZ`.
+
+    Returns the resulting size, or 0 where the size cannot be changed.
+    A size above the system limit keeps the current size.
+    """
+    if not sys.platform.startswith("linux"):
+        return 0
+    try:
+        return fcntl.fcntl(fd, F_SETPIPE_SZ, size)
+    except OSError:
+        try:
+            return fcntl.fcntl(fd, F_GETPIPE_SZ)
+        except OSError:
+            return 0
+
+
+class FrameRingReader:
+    """
+    Read fixed-size frames from a non-blocking fd straight into a ring of
+    preallocated buffers.
+
+    Each frame is returned as a memoryview of its buffer, which is reused
+    `ring_size` frames later; copy it if it must live longer than that.
+    """
+
+    def __init__(self, fd: int, frame_size: int, ring_size=DEFAULT_RING_SIZE):
+        if frame_size < 1:
+            raise ValueError("The frame size must be at least 1")
+        if ring_size < 1:
+            raise ValueError("The ring size must be at least 1")
+
+        self._fd = fd
+        self._frame_size = frame_size
+        self._views = [memoryview(bytearray(frame_size)) for _ in range(ring_size)]
+        self._index = 0
+
+    @property
+    def fd(self) -> int:
+        return self._fd
+
+    @property
+    def frame_size(self) -> int:
+        return self._frame_size
+
+    @property
+    def ring_size(self) -> int:
+        return len(self._views)
+
+    async def read_frame(self) -> Optional[memoryview]:
+        """
+        Returns `None` at the end of the stream, and raises `IncompleteReadError`
+        if it ends in the middle of a frame.
+        """
+        view = self._views[self._index]
+        offset = 0
+        while offset < self._frame_size:
+            try:
+                read_size = readv(self._fd, [view[offset:]])
+            except BlockingIOError:
+                await wait_readable(self._fd)
+                continue
+
+            if read_size == 0:
+                if offset == 0:
+                    return None
+                raise IncompleteReadError(bytes(view[:offset]), self._frame_size)
+            offset += read_size
+
+        self._index = (self._index + 1) % len(self._views)
+        return view
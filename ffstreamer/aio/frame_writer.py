@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+from os import writev
+from typing import Final
+
+from ffstreamer.aio.writable import wait_writable
+from ffstreamer.np.buffer import BufferType, as_byte_array
+
+DEFAULT_HIGH_WATER: Final[int] = 64 * 1024
+"""
+The same default as the high-water mark of asyncio transports.
+"""
+
+
+class FrameWriter:
+    """
+    Write frames to a non-blocking fd straight from the caller's buffer.
+
+    Each frame costs one `os.writev()` together with any bytes still pending
+    from earlier frames. Only the tail that the fd could not take is copied,
+    and `write_frame()` waits for the fd instead while that would exceed
+    `high_water` bytes, so the caller may reuse its buffer once it returns.
+    """
+
+    def __init__(self, fd: int, high_water=DEFAULT_HIGH_WATER):
+        if high_water < 0:
+            raise ValueError("The high-water mark must not be negative")
+
+        self._fd = fd
+        self._high_water = high_water
+        self._pending = bytearray()
+
+    @property
+    def fd(self) -> int:
+        return self._fd
+
+    @property
+    def high_water(self) -> int:
+        return self._high_water
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def _write(self, view: memoryview) -> int:
+        """
+        Returns the number of bytes of `view` that were written.
+        """
+        try:
+            if self._pending:
+                written = writev(self._fd, [self._pending, view])
+            else:
+                written = writev(self._fd, [view])
+        except BlockingIOError:
+            return 0
+
+        pending_size = len(self._pending)
+        if written <= pending_size:
+            del self._pending[:written]
+            return 0
+        self._pending.clear()
+        return written - pending_size
+
+    async def write_frame(self, data: BufferType) -> None:
+        view = as_byte_array(data).data
+        offset = self._write(view)
+        while len(view) - offset + len(self._pending) > self._high_water:
+            await wait_writable(self._fd)
+            offset += self._write(view[offset:])
+        self._pending += view[offset:]
+
+    async def drain(self) -> None:
+        """
+        Wait until every pending byte is written.
+        """
+        while self._pending:
+            await wait_writable(self._fd)
+            self._write(memoryview(b""))
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+
+from asyncio import Future, get_running_loop
+from typing import Optional
+
+
+def _resolve(future: "Future[bool]", result: bool) -> None:
+    if not future.done():
+        future.set_result(result)
+
+
+async def wait_readable(fd: int, timeout: Optional[float] = None) -> bool:
+    """
+    Wait until the file descriptor is readable without blocking the event loop.
+
+    Returns `False` if the timeout expired first.
+    """
+    if timeout is not None and timeout <= 0:
+        return False
+
+    loop = get_running_loop()
+    future: "Future[bool]" = loop.create_future()
+    loop.add_reader(fd, _resolve, future, True)
+    timer = (
+        None if timeout is None else loop.call_later(timeout, _resolve, future, False)
+    )
+    try:
+        return await future
+    finally:
+        loop.remove_reader(fd)
+        if timer is not None:
+            timer.cancel()
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+from asyncio import Condition
+from collections import deque
+from typing import Deque, Final, Generic, Optional, TypeVar
+
+from ffstreamer.sync.overflow import (
+    DEFAULT_OVERFLOW_POLICY,
+    OVERFLOW_BLOCK,
+    OVERFLOW_DROP_NEWEST,
+    OVERFLOW_POLICIES,
+)
+
+DEFAULT_STAGE_QUEUE_SIZE: Final[int] = 2
+
+_T = TypeVar("_T")
+
+
+class StageQueue(Generic[_T]):
+    """
+    Bounded FIFO between two pipeline stages.
+
+    `overflow` decides what `put()` does when the queue is full.
+    Once closed, `put()` discards items and `get()` returns `None` as soon as the
+    remaining items are taken, so either side can end the pipeline.
+
+    Must be created in the event loop that uses it.
+    """
+
+    _items: Deque[_T]
+
+    def __init__(
+        self,
+        maxsize=DEFAULT_STAGE_QUEUE_SIZE,
+        overflow=DEFAULT_OVERFLOW_POLICY,
+    ):
+        if maxsize < 1:
+            raise ValueError("The queue size must be at least 1")
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unsupported overflow policy: '{overflow}'")
+
+        self._maxsize = maxsize
+        self._overflow = overflow
+        self._items = deque()
+        self._changed = Condition()
+        self._closed = False
+        self._dropped = 0
+
+    @property
+    def maxsize(self) -> int:
+        return self._maxsize
+
+    @property
+    def overflow(self) -> str:
+        return self._overflow
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _has_room(self) -> bool:
+        return self._closed or len(self._items) < self._maxsize
+
+    def _has_item(self) -> bool:
+        return self._closed or bool(self._items)
+
+    async def put(self, item: _T) -> bool:
+        """
+        Returns `False` if the item was dropped or the queue is closed.
+        """
+        async with self._changed:
+            if self._overflow == OVERFLOW_BLOCK:
+                await self._changed.wait_for(self._has_room)
+            if self._closed:
+                return False
+
+            if len(self._items) >= self._maxsize:
+                self._dropped += 1
+                if self._overflow == OVERFLOW_DROP_NEWEST:
+                    return False
+                self._items.popleft()
+
+            self._items.append(item)
+            self._changed.notify_all()
+            return True
+
+    async def get(self) -> Optional[_T]:
+        async with self._changed:
+            await self._changed.wait_for(self._has_item)
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._changed.notify_all()
+            return item
+
+    async def close(self) -> None:
+        async with self._changed:
+            self._closed = True
+            self._changed.notify_all()
@@ -1,10 +1,11 @@
 # -*- coding: utf-8 -*-
 
 from argparse import Namespace
+from asyncio import Semaphore, Task, create_task, gather
 from asyncio import run as asyncio_run
 from asyncio.exceptions import CancelledError
 from sys import version_info
-from typing import Callable, Optional
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
 
 if version_info >= (3, 11):
     from asyncio import Runner  # type: ignore[attr-defined]
@@ -12,6 +13,7 @@ if version_info >= (3, 11):
 from uvloop import install as uvloop_install
 from uvloop import new_event_loop as uvloop_new_event_loop
 
+from ffstreamer.aio.stage_queue import DEFAULT_STAGE_QUEUE_SIZE, StageQueue
 from ffstreamer.argparse.argument_utils import argument_splitter
 from ffstreamer.ffmpeg.ffmpeg import (
     AUTOMATIC_DETECT_FILE_FORMAT,
@@ -27,10 +29,52 @@ from ffstreamer.ffmpeg.ffmpeg_sender import FFmpegSender
 from ffstreamer.ffmpeg.ffprobe import inspect_source_size
 from ffstreamer.logging.logging import logger
 from ffstreamer.module.module import Module, module_pipeline_splitter
+from ffstreamer.module.module_executor import (
+    DEFAULT_EXECUTOR,
+    DEFAULT_EXECUTOR_WORKERS,
+    EXECUTOR_INLINE,
+    ModuleExecutor,
+    create_module_executor,
+    parse_executor_options,
+)
 from ffstreamer.module.variables import MODULE_NAME_PREFIX, MODULE_PIPE_SEPARATOR
+from ffstreamer.np.buffer import BufferType
+from ffstreamer.np.planes import PLANE_PIXEL_FORMATS, frame_size, plane_shapes
+from ffstreamer.sync.overflow import DEFAULT_OVERFLOW_POLICY, OVERFLOW_POLICIES
+
+
+class _StageFrame(NamedTuple):
+    frame_index: int
+    data: Any
+
+
+class _ModuleStage(NamedTuple):
+    executors: Sequence[ModuleExecutor]
+    concurrency: int
+
+
+def group_module_stages(executors: Sequence[ModuleExecutor]) -> List[_ModuleStage]:
+    """
+    Consecutive inline modules share a stage; every pooled module gets its own.
+    """
+    result: List[_ModuleStage] = list()
+    inlines: List[ModuleExecutor] = list()
+    for executor in executors:
+        if executor.mode == EXECUTOR_INLINE:
+            inlines.append(executor)
+            continue
+        if inlines:
+            result.append(_ModuleStage(inlines, 1))
+            inlines = list()
+        result.append(_ModuleStage([executor], executor.workers))
+    if inlines:
+        result.append(_ModuleStage(inlines, 1))
+    return result
 
 
 class PipeApp:
+    _queues: List[StageQueue[_StageFrame]]
+
     def __init__(
         self,
         source: str,
@@ -45,21 +89,49 @@ class PipeApp:
         module_prefix=MODULE_NAME_PREFIX,
         pipe_separator=MODULE_PIPE_SEPARATOR,
         frame_logging_step=100,
+        queue_size=DEFAULT_STAGE_QUEUE_SIZE,
+        overflow=DEFAULT_OVERFLOW_POLICY,
+        executors: Optional[Dict[str, str]] = None,
+        executor_workers=DEFAULT_EXECUTOR_WORKERS,
         use_uvloop=False,
         debug=False,
         verbose=0,
     ):
-        bits_per_pixel = find_bits_per_pixel(pixel_format, ffmpeg_path)
-        if bits_per_pixel % 8 != 0:
-            raise ValueError("The pixel format only supports multiples of 8 bits")
+        """
+        Frames are read, processed by the modules and written in pipelined stages
+        joined by queues of `queue_size` frames; `overflow` decides what happens
+        to a frame that arrives while the next queue is full.
+
+        `executors` maps module names, as written in the pipeline, to the way
+        their frames run; the thread and process modes keep `executor_workers`
+        frames in the module at once and still pass them on in order.
+        """
+        if queue_size < 1:
+            raise ValueError("The queue size must be at least 1")
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unsupported overflow policy: '{overflow}'")
+
+        if pixel_format not in PLANE_PIXEL_FORMATS:
+            bits_per_pixel = find_bits_per_pixel(pixel_format, ffmpeg_path)
+            if bits_per_pixel % 8 != 0:
+                raise ValueError(
+                    "Only packed pixel formats of whole bytes and"
+                    f" {list(PLANE_PIXEL_FORMATS)} are supported"
+                )
 
         if file_format.lower() == AUTOMATIC_DETECT_FILE_FORMAT:
             file_format = detect_file_format(destination, ffmpeg_path)
 
         width, height = inspect_source_size(source, ffprobe_path)
 
-        channels = bits_per_pixel // 8
-        frame_buffer_size = width * height * channels
+        if pixel_format in PLANE_PIXEL_FORMATS:
+            # The channels of the first plane; 1 (luma) for the YUV formats.
+            first_plane = plane_shapes(width, height, pixel_format)[0]
+            channels = first_plane[2] if len(first_plane) == 3 else 1
+            frame_buffer_size = frame_size(width, height, pixel_format)
+        else:
+            channels = bits_per_pixel // 8
+            frame_buffer_size = width * height * channels
 
         kwargs = dict(
             source=source,
@@ -76,7 +148,13 @@ class PipeApp:
         send_arguments = argument_splitter(send_commandline, **kwargs)
         pipelines = module_pipeline_splitter(*args, separator=pipe_separator)
 
-        self._modules = list()
+        executors = dict(executors if executors else dict())
+        module_names = [pipeline[0] for pipeline in pipelines]
+        unknown_names = set(executors).difference(module_names)
+        if unknown_names:
+            raise ValueError(f"Unknown executor modules: {sorted(unknown_names)}")
+
+        self._executors = list()
         for pipeline in pipelines:
             module_name = pipeline[0]
             module_args = pipeline[1:]
@@ -87,8 +165,14 @@ class PipeApp:
                 module_path = module_prefix + module_name
 
             logger.debug(f"Initialize module: '{module_name}' -> {module_args}")
-            self._modules.append(Module(module_path, *module_args, **kwargs))
-            logger.info(f"Initialized module '{module_name}'")
+            module = Module(module_path, *module_args, **kwargs)
+            mode = executors.get(module_name, DEFAULT_EXECUTOR)
+            executor = create_module_executor(module, mode, executor_workers)
+            self._executors.append(executor)
+            logger.info(f"Initialized module '{module_name}' ({mode})")
+
+        self._stages = group_module_stages(self._executors)
+        stages_in_flight = sum(stage.concurrency for stage in self._stages)
 
         self._receiver = FFmpegReceiver(
             frame_buffer_size,
@@ -96,18 +180,25 @@ class PipeApp:
             *recv_arguments,
             ffmpeg_path=ffmpeg_path,
             frame_logging_step=frame_logging_step,
+            # Frames held by the queues, the stages, the writer and the reader.
+            ring_size=queue_size * (len(self._stages) + 1) + stages_in_flight + 2,
         )
         self._sender = FFmpegSender(
             *send_arguments,
             ffmpeg_path=ffmpeg_path,
         )
 
+        self._queue_size = queue_size
+        self._overflow = overflow
+        self._queues = list()
+        self._late_frames = 0
         self._use_uvloop = use_uvloop
         self._debug = debug
         self._verbose = verbose
 
         logger.info(f"FFmpeg path: '{ffmpeg_path}'")
         logger.info(f"FFprobe path: '{ffprobe_path}'")
+        logger.info(f"Pixel format: '{pixel_format}'")
         logger.info(f"Frame buffer size is {frame_buffer_size} bytes")
         logger.info(f"Source video size is {width}x{height}")
         logger.info(f"FFmpeg receiver arguments: {recv_arguments}")
@@ -115,6 +206,7 @@ class PipeApp:
         logger.info(f"Module prefix: '{module_prefix}'")
         logger.info(f"Pipe separator: '{pipe_separator}'")
         logger.info(f"Module pipeline: {pipelines}")
+        logger.info(f"Stage queue size: {queue_size} ({overflow})")
         logger.info(f"Debug flag: {debug}")
         logger.info(f"Verbose level: {verbose}")
 
@@ -126,13 +218,123 @@ class PipeApp:
     def verbose(self) -> int:
         return self._verbose
 
-    async def on_frame(self, data: Optional[bytes]) -> None:
-        if data is not None:
-            buffer = data
-            for module in self._modules:
-                buffer = await module.frame(buffer)
-            self._sender.stdin.write(buffer)
-        await self._sender.stdin.drain()
+    @property
+    def frames(self) -> StageQueue[_StageFrame]:
+        assert self._queues
+        return self._queues[0]
+
+    @property
+    def results(self) -> StageQueue[_StageFrame]:
+        assert self._queues
+        return self._queues[-1]
+
+    @property
+    def late_frames(self) -> int:
+        return self._late_frames
+
+    def is_late(self, frame: _StageFrame) -> bool:
+        if self._receiver.is_overwritten(frame.frame_index):
+            self._late_frames += 1
+            return True
+        return False
+
+    def stop_receiver(self) -> None:
+        if self._receiver.process.returncode is None:
+            logger.warning("Stop the receiver because a stage has failed")
+            self._receiver.interrupt()
+
+    async def on_frame(self, data: Optional[BufferType]) -> None:
+        if data is None:
+            await self.frames.close()
+        else:
+            await self.frames.put(_StageFrame(self._receiver.frame_index, data))
+
+    async def run_modules(self, stage: _ModuleStage, frame: _StageFrame) -> _StageFrame:
+        buffer = frame.data
+        for executor in stage.executors:
+            buffer = await executor.frame(buffer)
+        return frame._replace(data=buffer)
+
+    async def process_frames(
+        self,
+        stage: _ModuleStage,
+        source: StageQueue[_StageFrame],
+        target: StageQueue[_StageFrame],
+    ) -> None:
+        """
+        Up to `stage.concurrency` frames run through the modules of the stage at
+        once; the collector passes them on in the order they were read.
+        """
+        tasks: StageQueue["Task[_StageFrame]"] = StageQueue(stage.concurrency)
+        slots = Semaphore(stage.concurrency)
+        collector = create_task(self.collect_frames(tasks, slots, target))
+        try:
+            while not tasks.closed:
+                frame = await source.get()
+                if frame is None:
+                    break
+                if self.is_late(frame):
+                    continue
+
+                await slots.acquire()
+                task = create_task(self.run_modules(stage, frame))
+                if not await tasks.put(task):
+                    task.cancel()
+        finally:
+            await tasks.close()
+            await source.close()
+            await collector
+
+    async def collect_frames(
+        self,
+        tasks: StageQueue["Task[_StageFrame]"],
+        slots: Semaphore,
+        target: StageQueue[_StageFrame],
+    ) -> None:
+        try:
+            while True:
+                task = await tasks.get()
+                if task is None:
+                    break
+                frame = await task
+
+                # The result may still refer to the buffer of the receiver.
+                if not self.is_late(frame):
+                    await target.put(frame)
+                slots.release()
+        except Exception as e:
+            logger.exception(e)
+            self.stop_receiver()
+        finally:
+            await tasks.close()
+            remaining = await tasks.get()
+            while remaining is not None:
+                remaining.cancel()
+                remaining = await tasks.get()
+            slots.release()  # The dispatcher may be waiting for a slot.
+            await target.close()
+
+    async def write_frames(self) -> None:
+        try:
+            while True:
+                frame = await self.results.get()
+                if frame is None:
+                    break
+                if self.is_late(frame):
+                    continue
+
+                await self._sender.write_frame(frame.data)
+        except Exception as e:
+            logger.exception(e)
+            self.stop_receiver()
+        finally:
+            await self.results.close()
+
+    def log_stats(self) -> None:
+        logger.info(
+            f"Stages: dropped={[queue.dropped for queue in self._queues]}"
+            f" late_frames={self._late_frames}"
+        )
 
     def run(self) -> int:
         try:
@@ -156,22 +358,39 @@ class PipeApp:
 
     async def run_until_complete(self) -> None:
         try:
-            for module in self._modules:
-                await module.open()
+            for executor in self._executors:
+                await executor.open()
             await self.run_ffmpeg_subprocess()
         except CancelledError:
             logger.debug("An cancelled signal was detected")
         finally:
-            for module in self._modules:
-                await module.close()
+            for executor in self._executors:
+                await executor.close()
 
     async def run_ffmpeg_subprocess(self) -> None:
-        await self._receiver.open()
-        await self._sender.open()
+        self._queues = [
+            StageQueue(self._queue_size, self._overflow)
+            for _ in range(len(self._stages) + 1)
+        ]
 
-        await self._receiver.wait()
-        await self._sender.stdin.drain()
+        await self._sender.open()
+        stages: List[Task] = [
+            create_task(self.process_frames(stage, source, target))
+            for stage, source, target in zip(
+                self._stages, self._queues[:-1], self._queues[1:]
+            )
+        ]
+        stages.append(create_task(self.write_frames()))
+        try:
+            await self._receiver.open()
+            await self._receiver.wait()
+            await gather(*stages)
+        finally:
+            for stage in stages:
+                stage.cancel()
+            self.log_stats()
 
+        await self._sender.drain()
         self._sender.interrupt()
         await self._sender.wait()
 
@@ -190,6 +409,10 @@ def pipe_main(args: Namespace, printer: Callable[..., None] = print) -> int:
     assert isinstance(args.ffprobe_path, str)
     assert isinstance(args.module_prefix, str)
     assert isinstance(args.pipe_separator, str)
+    assert isinstance(args.queue_size, int)
+    assert isinstance(args.overflow, str)
+    assert isinstance(args.executors, list)
+    assert isinstance(args.executor_workers, int)
     assert isinstance(args.use_uvloop, bool)
     assert isinstance(args.debug, bool)
     assert isinstance(args.verbose, int)
@@ -207,6 +430,10 @@ def pipe_main(args: Namespace, printer: Callable[..., None] = print) -> int:
         module_prefix=args.module_prefix,
         pipe_separator=args.pipe_separator,
         frame_logging_step=100,
+        queue_size=args.queue_size,
+        overflow=args.overflow,
+        executors=parse_executor_options(args.executors),
+        executor_workers=args.executor_workers,
         use_uvloop=args.use_uvloop,
         debug=args.debug,
         verbose=args.verbose,
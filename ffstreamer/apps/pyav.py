@@ -4,7 +4,7 @@ from argparse import Namespace
 from asyncio import run as asyncio_run
 from asyncio.exceptions import CancelledError
 from sys import version_info
-from typing import Callable
+from typing import Callable, List
 
 if version_info >= (3, 11):
     from asyncio import Runner  # type: ignore[attr-defined]
@@ -25,8 +25,42 @@ from ffstreamer.ffmpeg.ffprobe import inspect_source_size
 from ffstreamer.logging.logging import logger
 from ffstreamer.module.module import Module, module_pipeline_splitter
 from ffstreamer.module.variables import MODULE_NAME_PREFIX, MODULE_PIPE_SEPARATOR
+from ffstreamer.np.composite import DEFAULT_BLEND_MODE
 from ffstreamer.pyav.pyav_callbacks import OnImageResult, PyavCallbacksInterface
 from ffstreamer.pyav.pyav_manager import PyavManager
+from ffstreamer.pyav.pyav_router import DEFAULT_DISPATCH_POLICY
+from ffstreamer.sync.overflow import DEFAULT_OVERFLOW_POLICY
+
+
+class PyavModulePipeline(PyavCallbacksInterface):
+    """
+    Module pipeline as pyav callbacks; it is picklable, so every worker process
+    can run its own copy.
+    """
+
+    def __init__(self, modules: List[Module]):
+        self._modules = modules
+
+    @property
+    def modules(self) -> List[Module]:
+        return self._modules
+
+    @override
+    async def on_open(self) -> None:
+        for module in self._modules:
+            await module.open()
+
+    @override
+    async def on_close(self) -> None:
+        for module in self._modules:
+            await module.close()
+
+    @override
+    async def on_image(self, image: ndarray) -> OnImageResult:
+        buffer = image
+        for module in self._modules:
+            buffer = await module.frame(buffer)
+        return buffer
 
 
 class PyavApp(PyavCallbacksInterface):
@@ -44,6 +78,11 @@ class PyavApp(PyavCallbacksInterface):
         frame_logging_step=100,
         queue_size=8,
         join_timeout=8.0,
+        workers=0,
+        dispatch=DEFAULT_DISPATCH_POLICY,
+        max_in_flight=1,
+        overflow=DEFAULT_OVERFLOW_POLICY,
+        blend=DEFAULT_BLEND_MODE,
         use_uvloop=False,
         debug=False,
         verbose=0,
@@ -86,6 +125,8 @@ class PyavApp(PyavCallbacksInterface):
             self._modules.append(Module(module_path, *module_args, **kwargs))
             logger.info(f"Initialized module '{module_name}'")
 
+        self._pipeline = PyavModulePipeline(self._modules)
+        self._workers = workers
         self._frame_logging_step = frame_logging_step
         self._use_uvloop = use_uvloop
         self._debug = debug
@@ -99,7 +140,12 @@ class PyavApp(PyavCallbacksInterface):
             channels,
             queue_size=queue_size,
             join_timeout=join_timeout,
-            callbacks=self,
+            callbacks=self._pipeline if workers else self,
+            workers=workers,
+            dispatch=dispatch,
+            max_in_flight=max_in_flight,
+            overflow=overflow,
+            blend=blend,
         )
 
         logger.info(f"FFmpeg path: '{ffmpeg_path}'")
@@ -109,6 +155,9 @@ class PyavApp(PyavCallbacksInterface):
         logger.info(f"Module prefix: '{module_prefix}'")
         logger.info(f"Pipe separator: '{pipe_separator}'")
         logger.info(f"Module pipeline: {pipelines}")
+        logger.info(f"Workers: {workers} ({dispatch})")
+        logger.info(f"Max in-flight frames: {max_in_flight} ({overflow})")
+        logger.info(f"Blend mode: {blend}")
         logger.info(f"Debug flag: {debug}")
         logger.info(f"Verbose level: {verbose}")
 
@@ -141,25 +190,25 @@ class PyavApp(PyavCallbacksInterface):
             return 0
 
     async def run_until_complete(self) -> None:
+        if self._workers:
+            # Each worker process opens and closes its own copy of the modules.
+            await self.run_pyav_manager_thread()
+            return
+
         try:
-            for module in self._modules:
-                await module.open()
+            await self._pipeline.on_open()
             await self.run_pyav_manager_thread()
         except CancelledError:
             logger.debug("An cancelled signal was detected")
         finally:
-            for module in self._modules:
-                await module.close()
+            await self._pipeline.on_close()
 
     async def run_pyav_manager_thread(self) -> None:
         await self._manager.run_until_complete()
 
     @override
     async def on_image(self, image: ndarray) -> OnImageResult:
-        buffer = image
-        for module in self._modules:
-            buffer = await module.frame(buffer)
-        return buffer
+        return await self._pipeline.on_image(image)
 
 
 def pyav_main(args: Namespace, printer: Callable[..., None] = print) -> int:
@@ -174,6 +223,11 @@ def pyav_main(args: Namespace, printer: Callable[..., None] = print) -> int:
     assert isinstance(args.ffprobe_path, str)
     assert isinstance(args.module_prefix, str)
     assert isinstance(args.pipe_separator, str)
+    assert isinstance(args.workers, int)
+    assert isinstance(args.dispatch, str)
+    assert isinstance(args.max_in_flight, int)
+    assert isinstance(args.overflow, str)
+    assert isinstance(args.blend, str)
     assert isinstance(args.use_uvloop, bool)
     assert isinstance(args.debug, bool)
     assert isinstance(args.verbose, int)
@@ -191,6 +245,11 @@ def pyav_main(args: Namespace, printer: Callable[..., None] = print) -> int:
         frame_logging_step=100,
         queue_size=8,
         join_timeout=8.0,
+        workers=args.workers,
+        dispatch=args.dispatch,
+        max_in_flight=args.max_in_flight,
+        overflow=args.overflow,
+        blend=args.blend,
         use_uvloop=args.use_uvloop,
         debug=args.debug,
         verbose=args.verbose,
@@ -4,6 +4,7 @@ from argparse import REMAINDER, ArgumentParser, Namespace, RawDescriptionHelpFor
 from functools import lru_cache
 from typing import Final, List, Optional
 
+from ffstreamer.aio.stage_queue import DEFAULT_STAGE_QUEUE_SIZE
 from ffstreamer.ffmpeg.ffmpeg import (
     DEFAULT_FFMPEG_RECV_FORMAT,
     DEFAULT_FFMPEG_SEND_FORMAT,
@@ -11,7 +12,11 @@ from ffstreamer.ffmpeg.ffmpeg import (
     DEFAULT_PIXEL_FORMAT,
 )
 from ffstreamer.logging.logging import SEVERITIES, SEVERITY_NAME_INFO
+from ffstreamer.module.module_executor import DEFAULT_EXECUTOR_WORKERS, EXECUTORS
 from ffstreamer.module.variables import MODULE_NAME_PREFIX, MODULE_PIPE_SEPARATOR
+from ffstreamer.np.composite import BLEND_MODES, DEFAULT_BLEND_MODE
+from ffstreamer.pyav.pyav_router import DEFAULT_DISPATCH_POLICY, DISPATCH_POLICIES
+from ffstreamer.sync.overflow import DEFAULT_OVERFLOW_POLICY, OVERFLOW_POLICIES
 
 __MODULE_PREFIX_FLAG: Final[str] = "--module-prefix"
 
@@ -137,6 +142,8 @@ CMDS = (
 
 DEFAULT_SEVERITY: Final[str] = SEVERITY_NAME_INFO
 DEFAULT_MODULE_PREFIX: Final[str] = MODULE_NAME_PREFIX
+DEFAULT_PYAV_WORKERS: Final[int] = 0
+DEFAULT_PYAV_MAX_IN_FLIGHT: Final[int] = 1
 
 
 @lru_cache
@@ -248,6 +255,47 @@ def add_pipeline_positional_arguments(parser: ArgumentParser) -> None:
     )
 
 
+def add_pipe_stage_arguments(parser: ArgumentParser) -> None:
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=DEFAULT_STAGE_QUEUE_SIZE,
+        help=(
+            "Number of frames queued between the read, process and write stages"
+            f" (default: {DEFAULT_STAGE_QUEUE_SIZE})"
+        ),
+    )
+    parser.add_argument(
+        "--overflow",
+        choices=OVERFLOW_POLICIES,
+        default=DEFAULT_OVERFLOW_POLICY,
+        help=(
+            "What to do with a frame that arrives while the next stage's queue is"
+            f" full (default: '{DEFAULT_OVERFLOW_POLICY}')"
+        ),
+    )
+    parser.add_argument(
+        "--executor",
+        dest="executors",
+        metavar="NAME=MODE",
+        action="append",
+        default=list(),
+        help=(
+            "Run the module NAME, as written in the pipeline, in the given mode;"
+            f" one of {', '.join(EXECUTORS)} (default: inline)"
+        ),
+    )
+    parser.add_argument(
+        "--executor-workers",
+        type=int,
+        default=DEFAULT_EXECUTOR_WORKERS,
+        help=(
+            "Number of threads or processes of each pooled module"
+            f" (default: {DEFAULT_EXECUTOR_WORKERS})"
+        ),
+    )
+
+
 def add_pipe_parser(subparsers) -> None:
     # noinspection SpellCheckingInspection
     parser = subparsers.add_parser(
@@ -260,15 +308,66 @@ def add_pipe_parser(subparsers) -> None:
     add_ffmpeg_commandline_arguments(parser)
     add_ffmpeg_options_arguments(parser)
     add_pipeline_arguments(parser)
+    add_pipe_stage_arguments(parser)
     add_pipeline_positional_arguments(parser)
 
 
+def add_pyav_worker_arguments(parser: ArgumentParser) -> None:
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_PYAV_WORKERS,
+        help=(
+            "Number of image processing worker processes;"
+            " 0 runs the modules in the main process"
+            f" (default: {DEFAULT_PYAV_WORKERS})"
+        ),
+    )
+    parser.add_argument(
+        "--dispatch",
+        choices=DISPATCH_POLICIES,
+        default=DEFAULT_DISPATCH_POLICY,
+        help=(
+            "How frames are dispatched to the workers"
+            f" (default: '{DEFAULT_DISPATCH_POLICY}')"
+        ),
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=DEFAULT_PYAV_MAX_IN_FLIGHT,
+        help=(
+            "Number of frames processed at once in the main process"
+            f" (default: {DEFAULT_PYAV_MAX_IN_FLIGHT})"
+        ),
+    )
+    parser.add_argument(
+        "--overflow",
+        choices=OVERFLOW_POLICIES,
+        default=DEFAULT_OVERFLOW_POLICY,
+        help=(
+            "What to do with a frame that arrives while the in-flight window is"
+            f" full (default: '{DEFAULT_OVERFLOW_POLICY}')"
+        ),
+    )
+    parser.add_argument(
+        "--blend",
+        choices=BLEND_MODES,
+        default=DEFAULT_BLEND_MODE,
+        help=(
+            "How the mask of the overlay is applied; 'alpha' blends translucent"
+            f" pixels (default: '{DEFAULT_BLEND_MODE}')"
+        ),
+    )
+
+
 def add_pyav_parser(subparsers) -> None:
     # noinspection SpellCheckingInspection
     parser = subparsers.add_parser(name=CMD_PYAV, help=CMD_PYAV_HELP)
     assert isinstance(parser, ArgumentParser)
     add_ffmpeg_options_arguments(parser)
     add_pipeline_arguments(parser)
+    add_pyav_worker_arguments(parser)
     add_pipeline_positional_arguments(parser)
 
 
@@ -3,45 +3,141 @@
 from asyncio import create_subprocess_exec, subprocess
 from asyncio.exceptions import CancelledError, IncompleteReadError
 from logging import WARNING
-from typing import Any, Awaitable, Callable, Optional
+from os import close, pipe, set_blocking
+from typing import Any, Awaitable, Callable, Final, Optional, Sequence
 
+from ffstreamer.aio.frame_reader import (
+    DEFAULT_PIPE_SIZE,
+    DEFAULT_RING_SIZE,
+    FrameRingReader,
+    set_pipe_size,
+)
 from ffstreamer.aio.stream import logging_stream
 from ffstreamer.ffmpeg.ffmpeg_process import FFmpegProcess
 from ffstreamer.logging.logging import input_logger as logger
+from ffstreamer.np.buffer import BufferType
+
+RECEIVER_READER_STREAM: Final[str] = "stream"
+"""
+`StreamReader.readexactly()`; a new `bytes` for every frame.
+"""
+
+RECEIVER_READER_READINTO: Final[str] = "readinto"
+"""
+`os.readv()` on the raw pipe into a ring of preallocated buffers.
+"""
+
+RECEIVER_READERS: Final[Sequence[str]] = (
+    RECEIVER_READER_STREAM,
+    RECEIVER_READER_READINTO,
+)
+DEFAULT_RECEIVER_READER: Final[str] = RECEIVER_READER_READINTO
 
 
 class FFmpegReceiver(FFmpegProcess):
+    _frame_reader: Optional[FrameRingReader]
+
     def __init__(
         self,
         frame_buffer_size: int,
-        frame_callback: Callable[[Optional[bytes]], Awaitable[Any]],
+        frame_callback: Callable[[Optional[BufferType]], Awaitable[Any]],
         *ffmpeg_args,
         ffmpeg_path="ffmpeg",
         frame_logging_step=1000,
+        reader=DEFAULT_RECEIVER_READER,
+        ring_size=DEFAULT_RING_SIZE,
+        pipe_size=DEFAULT_PIPE_SIZE,
     ):
+        """
+        With the `readinto` reader, frames are memoryviews that stay valid for
+        `ring_size` frames.
+        """
         super().__init__()
+        if reader not in RECEIVER_READERS:
+            raise ValueError(f"Unsupported reader: '{reader}'")
+
         self._frame_buffer_size = frame_buffer_size
         self._frame_callback = frame_callback
         self._ffmpeg_path = ffmpeg_path
         self._ffmpeg_args = ffmpeg_args
         self._frame_logging_step = frame_logging_step
         self._frame_index = 0
+        self._reader = reader
+        self._ring_size = ring_size
+        self._pipe_size = pipe_size
+        self._frame_reader = None
+
+    @property
+    def reader(self) -> str:
+        return self._reader
+
+    @property
+    def frame_index(self) -> int:
+        return self._frame_index
+
+    def is_overwritten(self, frame_index: int) -> bool:
+        """
+        Whether the buffer of frame `frame_index` is being reused by a later read.
+        """
+        if self._frame_reader is None:
+            return False
+        return self._frame_index - frame_index >= self._frame_reader.ring_size
 
     async def open(self) -> None:
-        process = await create_subprocess_exec(
-            self._ffmpeg_path,
-            *self._ffmpeg_args,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
+        if self._reader == RECEIVER_READER_READINTO:
+            process = await self._open_pipe()
+        else:
+            process = await create_subprocess_exec(
+                self._ffmpeg_path,
+                *self._ffmpeg_args,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
         logger.info(f"Create ffmpeg receiver subprocess: {process.pid}")
         self.init(process, self._logging_stdout(), self._logging_stderr())
 
+    async def _open_pipe(self) -> subprocess.Process:
+        read_fd, write_fd = pipe()
+        try:
+            pipe_size = set_pipe_size(read_fd, self._pipe_size)
+            logger.debug(f"Receiver pipe size is {pipe_size} bytes")
+            process = await create_subprocess_exec(
+                self._ffmpeg_path,
+                *self._ffmpeg_args,
+                stdout=write_fd,
+                stderr=subprocess.PIPE,
+            )
+        except BaseException:
+            close(read_fd)
+            raise
+        finally:
+            close(write_fd)
+
+        set_blocking(read_fd, False)
+        self._frame_reader = FrameRingReader(
+            read_fd, self._frame_buffer_size, self._ring_size
+        )
+        return process
+
+    async def read_frame(self) -> Optional[BufferType]:
+        if self._frame_reader is not None:
+            return await self._frame_reader.read_frame()
+        if self.stdout.at_eof():
+            return None
+        try:
+            return await self.stdout.readexactly(self._frame_buffer_size)
+        except IncompleteReadError as e:
+            if e.partial:
+                raise
+            return None
+
     async def _logging_stdout(self) -> None:
         try:
             logger.debug("Start receiving frames ...")
-            while not self.stdout.at_eof():
-                buffer = await self.stdout.readexactly(self._frame_buffer_size)
+            while True:
+                buffer = await self.read_frame()
+                if buffer is None:
+                    break
                 await self._frame_callback(buffer)
                 if self._frame_index % self._frame_logging_step == 0:
                     logger.debug(f"Recv frame #{self._frame_index} ...")
@@ -53,6 +149,8 @@ class FFmpegReceiver(FFmpegProcess):
         except BaseException as unknown_error:
             logger.exception(unknown_error)
         finally:
+            if self._frame_reader is not None:
+                close(self._frame_reader.fd)
             await self._frame_callback(None)
             logger.debug(f"Frame reader is complete: total {self._frame_index}")
 
@@ -2,33 +2,121 @@
 
 from asyncio import create_subprocess_exec, subprocess
 from logging import INFO, WARNING
+from os import close, pipe, set_blocking
+from typing import Final, Optional, Sequence
 
+from ffstreamer.aio.frame_reader import DEFAULT_PIPE_SIZE, set_pipe_size
+from ffstreamer.aio.frame_writer import DEFAULT_HIGH_WATER, FrameWriter
 from ffstreamer.aio.stream import logging_stream
 from ffstreamer.ffmpeg.ffmpeg_process import FFmpegProcess
 from ffstreamer.logging.logging import output_logger as logger
+from ffstreamer.np.buffer import BufferType, as_byte_array
+
+SENDER_WRITER_STREAM: Final[str] = "stream"
+"""
+`StreamWriter.write()` and `drain()`; the transport may copy the frame.
+"""
+
+SENDER_WRITER_WRITEV: Final[str] = "writev"
+"""
+`os.writev()` on the raw pipe straight from the frame buffer.
+"""
+
+SENDER_WRITERS: Final[Sequence[str]] = (
+    SENDER_WRITER_STREAM,
+    SENDER_WRITER_WRITEV,
+)
+DEFAULT_SENDER_WRITER: Final[str] = SENDER_WRITER_WRITEV
 
 
 class FFmpegSender(FFmpegProcess):
+    _frame_writer: Optional[FrameWriter]
+
     def __init__(
         self,
         *ffmpeg_args,
         ffmpeg_path="ffmpeg",
+        writer=DEFAULT_SENDER_WRITER,
+        pipe_size=DEFAULT_PIPE_SIZE,
+        high_water=DEFAULT_HIGH_WATER,
     ):
         super().__init__()
+        if writer not in SENDER_WRITERS:
+            raise ValueError(f"Unsupported writer: '{writer}'")
+
         self._ffmpeg_path = ffmpeg_path
         self._ffmpeg_args = ffmpeg_args
+        self._writer = writer
+        self._pipe_size = pipe_size
+        self._high_water = high_water
+        self._frame_writer = None
+
+    @property
+    def writer(self) -> str:
+        return self._writer
 
     async def open(self) -> None:
-        process = await create_subprocess_exec(
-            self._ffmpeg_path,
-            *self._ffmpeg_args,
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
+        if self._writer == SENDER_WRITER_WRITEV:
+            process = await self._open_pipe()
+        else:
+            process = await create_subprocess_exec(
+                self._ffmpeg_path,
+                *self._ffmpeg_args,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
         logger.info(f"Create ffmpeg sender subprocess: {process.pid}")
         self.init(process, self._logging_stdout(), self._logging_stderr())
 
+    async def _open_pipe(self) -> subprocess.Process:
+        read_fd, write_fd = pipe()
+        try:
+            pipe_size = set_pipe_size(write_fd, self._pipe_size)
+            logger.debug(f"Sender pipe size is {pipe_size} bytes")
+            process = await create_subprocess_exec(
+                self._ffmpeg_path,
+                *self._ffmpeg_args,
+                stdin=read_fd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+        except BaseException:
+            close(write_fd)
+            raise
+        finally:
+            close(read_fd)
+
+        set_blocking(write_fd, False)
+        self._frame_writer = FrameWriter(write_fd, self._high_water)
+        return process
+
+    async def write_frame(self, data: BufferType) -> None:
+        """
+        The buffer may be reused as soon as this returns.
+        """
+        if self._frame_writer is not None:
+            await self._frame_writer.write_frame(data)
+        else:
+            self.stdin.write(as_byte_array(data).data)
+            await self.stdin.drain()
+
+    async def drain(self) -> None:
+        if self._frame_writer is not None:
+            await self._frame_writer.drain()
+        else:
+            await super().drain()
+
+    async def wait(self) -> None:
+        """
+        With the `writev` writer, the pipe is closed first so that the process
+        reads the end of the stream.
+        """
+        if self._frame_writer is not None:
+            close(self._frame_writer.fd)
+            self._frame_writer = None
+        await super().wait()
+
     async def _logging_stdout(self) -> None:
         await logging_stream("SEND:OUT", self.stdout, logger, INFO)
 
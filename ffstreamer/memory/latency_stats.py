@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+from ctypes import c_uint64
+from multiprocessing.sharedctypes import RawArray
+from typing import Any, Final, NamedTuple, Tuple
+
+from ffstreamer.memory.spsc_stats import SPSC_WAIT_BUCKETS, wait_bucket
+
+LATENCY_FRAMES: Final[int] = 0
+LATENCY_TOTAL_NS: Final[int] = 1
+LATENCY_MAX_NS: Final[int] = 2
+LATENCY_LAST_NS: Final[int] = 3
+LATENCY_COUNTERS: Final[int] = 4
+
+
+class LatencyStats(NamedTuple):
+    frames: int
+    total_ns: int
+    max_ns: int
+    last_ns: int
+    histogram: Tuple[int, ...]  # Same buckets as the SPSC wait histograms
+
+    @property
+    def mean_ns(self) -> float:
+        return self.total_ns / self.frames if self.frames else 0.0
+
+
+class LatencyTelemetry:
+    """
+    Per-frame latency from capture to output, in shared memory.
+
+    Only the sender writes, so no lock is taken.
+    """
+
+    _counters: Any
+    _histogram: Any
+
+    def __init__(self):
+        self._counters = RawArray(c_uint64, LATENCY_COUNTERS)
+        self._histogram = RawArray(c_uint64, SPSC_WAIT_BUCKETS)
+
+    def add(self, nanoseconds: int) -> None:
+        nanoseconds = max(nanoseconds, 0)
+        counters = self._counters
+        counters[LATENCY_FRAMES] += 1
+        counters[LATENCY_TOTAL_NS] += nanoseconds
+        counters[LATENCY_LAST_NS] = nanoseconds
+        if nanoseconds > counters[LATENCY_MAX_NS]:
+            counters[LATENCY_MAX_NS] = nanoseconds
+        self._histogram[wait_bucket(nanoseconds)] += 1
+
+    def snapshot(self) -> LatencyStats:
+        counters = self._counters[:]
+        return LatencyStats(
+            frames=counters[LATENCY_FRAMES],
+            total_ns=counters[LATENCY_TOTAL_NS],
+            max_ns=counters[LATENCY_MAX_NS],
+            last_ns=counters[LATENCY_LAST_NS],
+            histogram=tuple(self._histogram[:]),
+        )
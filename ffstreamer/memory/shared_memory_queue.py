@@ -1,15 +1,20 @@
 # -*- coding: utf-8 -*-
 
 from collections import deque
+from itertools import accumulate
 from multiprocessing.shared_memory import SharedMemory
-from typing import Deque, Dict, NamedTuple, Optional, Union
+from time import monotonic
+from typing import Deque, Dict, Final, NamedTuple, Optional, Sequence, Tuple, Union
 
 from ffstreamer.memory.shared_memory_utils import (
+    attach_shared_memory,
     create_shared_memory,
     destroy_shared_memory,
 )
+from ffstreamer.np.buffer import BufferType, as_byte_array
 
 SHARED_MEMORY_INFINITY_QUEUE = 0
+SHARED_MEMORY_MINIMUM_SIZE_CLASS: Final[int] = 4096
 
 
 class Written(NamedTuple):
@@ -21,25 +26,99 @@ class Written(NamedTuple):
     def size(self) -> int:
         return self.end - self.offset
 
+    def locate(self, offset=0, size: Optional[int] = None) -> Tuple[str, int, int]:
+        """
+        Name, offset and size of a range relative to the written data.
+        """
+        if size is None:
+            size = self.size - offset
+        return self.sm_name, self.offset + offset, size
+
+
+class SharedMemoryQueueStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    waiting_bytes: int
+    working_bytes: int
+
+    @property
+    def held_bytes(self) -> int:
+        return self.waiting_bytes + self.working_bytes
+
+
+class _Idle(NamedTuple):
+    sm: SharedMemory
+    since: float
+
+
+def size_class(size: int, minimum=SHARED_MEMORY_MINIMUM_SIZE_CLASS) -> int:
+    """
+    Round the size up to a power of two, but not below `minimum`.
+    """
+    if size <= minimum:
+        return minimum
+    return 1 << (size - 1).bit_length()
+
 
 class SharedMemoryQueue:
+    """
+    Pool of shared memory segments grouped by power-of-two size classes.
+
+    Restored segments wait in their class until a request of the same class
+    reuses them. With `max_queue`, the least recently used waiting segments are
+    destroyed beyond that count. With `idle_timeout`, segments idle for longer
+    than that many seconds are destroyed by `evict()`.
+    """
+
     _max_queue: int
-    _waiting: Deque[SharedMemory]
+    _waiting: Dict[int, Deque[_Idle]]
     _working: Dict[str, SharedMemory]
-
-    def __init__(self, max_queue=SHARED_MEMORY_INFINITY_QUEUE):
+    _lengths: Dict[str, int]
+
+    def __init__(
+        self,
+        max_queue=SHARED_MEMORY_INFINITY_QUEUE,
+        idle_timeout: Optional[float] = None,
+        minimum_size_class=SHARED_MEMORY_MINIMUM_SIZE_CLASS,
+    ):
         self._max_queue = max_queue
-        self._waiting = deque()
+        self._idle_timeout = idle_timeout
+        self._minimum_size_class = minimum_size_class
+        self._waiting = dict()
         self._working = dict()
+        self._lengths = dict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
 
     @property
     def max_queue(self) -> int:
         return self._max_queue
 
+    @property
+    def idle_timeout(self) -> Optional[float]:
+        return self._idle_timeout
+
+    def size_class(self, size: int) -> int:
+        return size_class(size, self._minimum_size_class)
+
+    def stats(self) -> SharedMemoryQueueStats:
+        waiting_bytes = sum(k * len(v) for k, v in self._waiting.items())
+        working_bytes = sum(self.size_class(sm.size) for sm in self._working.values())
+        return SharedMemoryQueueStats(
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            waiting_bytes=waiting_bytes,
+            working_bytes=working_bytes,
+        )
+
     def clear_waiting(self) -> None:
         while self._waiting:
-            sm = self._waiting.popleft()
-            destroy_shared_memory(sm)
+            _, idles = self._waiting.popitem()
+            for idle in idles:
+                destroy_shared_memory(idle.sm)
         assert not self._waiting
 
     def clear_working(self) -> None:
@@ -47,13 +126,14 @@ class SharedMemoryQueue:
             _, sm = self._working.popitem()
             destroy_shared_memory(sm)
         assert not self._working
+        self._lengths.clear()
 
     def clear(self) -> None:
         self.clear_waiting()
         self.clear_working()
 
     def size_waiting(self) -> int:
-        return len(self._waiting)
+        return sum(len(idles) for idles in self._waiting.values())
 
     def size_working(self) -> int:
         return len(self._working)
@@ -61,41 +141,128 @@ class SharedMemoryQueue:
     def find_working(self, key: str) -> SharedMemory:
         return self._working[key]
 
+    def preallocate(self, count: int, size: int) -> None:
+        key = self.size_class(size)
+        idles = self._waiting.setdefault(key, deque())
+        now = monotonic()
+        for _ in range(count):
+            idles.append(_Idle(create_shared_memory(key), now))
+
     def secure_worker(self, size: int) -> SharedMemory:
-        try:
-            sm = self._waiting.popleft()
-            if sm.size < size:
-                destroy_shared_memory(sm)
-                raise BufferError
-        except (IndexError, BufferError):
-            sm = create_shared_memory(size)
-        assert sm is not None
+        key = self.size_class(size)
+        idles = self._waiting.get(key)
+        if idles:
+            sm = idles.pop().sm
+            self._hits += 1
+            if not idles:
+                del self._waiting[key]
+        else:
+            sm = create_shared_memory(key)
+            self._misses += 1
+        self._lengths.pop(sm.name, None)
         self._working[sm.name] = sm
         return sm
 
-    def write(self, data: Union[bytes, memoryview], offset=0) -> Written:
-        if isinstance(data, memoryview):
-            return self.write(data.tobytes(), offset)
-
-        assert isinstance(data, bytes)
-        end = offset + len(data)
+    def _destroy_idle(self, key: int) -> None:
+        idles = self._waiting[key]
+        destroy_shared_memory(idles.popleft().sm)
+        self._evictions += 1
+        if not idles:
+            del self._waiting[key]
+
+    def evict(self, now: Optional[float] = None) -> int:
+        """
+        Destroy the waiting segments that exceed `max_queue` or `idle_timeout`.
+        """
+        evictions = self._evictions
+        if now is None:
+            now = monotonic()
+
+        if self._idle_timeout is not None:
+            deadline = now - self._idle_timeout
+            for key in list(self._waiting.keys()):
+                while key in self._waiting and self._waiting[key][0].since < deadline:
+                    self._destroy_idle(key)
+
+        if self._max_queue > 0:
+            while self.size_waiting() > self._max_queue:
+                key = min(self._waiting, key=lambda k: self._waiting[k][0].since)
+                self._destroy_idle(key)
+
+        return self._evictions - evictions
+
+    def write(self, data: BufferType, offset=0) -> Written:
+        source = as_byte_array(data)
+        end = offset + source.size
         sm = self.secure_worker(end)
-        sm.buf[offset:end] = data
+        assert sm.buf is not None
+        sm.buf[offset:end] = source.data
+        self._lengths[sm.name] = end
         return Written(sm.name, offset, end)
 
-    def restore(self, name: str) -> None:
-        self._waiting.append(self._working.pop(name))
-
-    @staticmethod
-    def read(name: str, offset=0, size: Optional[int] = None) -> bytes:
-        sm = SharedMemory(name=name)
-        if size is None:
-            return bytes(sm.buf[offset:])
+    def writev(
+        self,
+        buffers: Sequence[BufferType],
+        offsets: Optional[Sequence[int]] = None,
+        offset=0,
+    ) -> Written:
+        """
+        Write several buffers, such as separate image planes, into one segment.
+
+        Without `offsets`, the buffers are packed back to back from `offset`.
+        """
+        if not buffers:
+            raise ValueError("At least one buffer is required")
+
+        sources = [as_byte_array(data) for data in buffers]
+        if offsets is None:
+            begins = list(accumulate((s.size for s in sources[:-1]), initial=offset))
         else:
-            if size <= 0:
-                raise ValueError("The 'size' argument must be greater than 0")
-            end = offset + size
-            return bytes(sm.buf[offset:end])
+            if len(offsets) != len(sources):
+                raise ValueError("The number of offsets and buffers must be equal")
+            begins = list(offsets)
+
+        ends = [b + s.size for b, s in zip(begins, sources)]
+        sm = self.secure_worker(max(ends))
+        assert sm.buf is not None
+        for begin, end, source in zip(begins, ends, sources):
+            sm.buf[begin:end] = source.data
+        self._lengths[sm.name] = max(ends)
+        return Written(sm.name, min(begins), max(ends))
+
+    def restore(self, name: str) -> None:
+        sm = self._working.pop(name)
+        self._lengths.pop(name, None)
+        key = self.size_class(sm.size)
+        self._waiting.setdefault(key, deque()).append(_Idle(sm, monotonic()))
+        self.evict()
+
+    def read(
+        self,
+        name: Union[str, Written],
+        offset=0,
+        size: Optional[int] = None,
+    ) -> bytes:
+        """
+        Attach, copy and detach. Use `SharedMemoryReader` to read repeatedly.
+
+        Without `size`, reads up to the end of what was written to the segment,
+        not into the padding of its size class. With a `Written`, `offset` is
+        relative to the written data.
+        """
+        if isinstance(name, Written):
+            name, offset, size = name.locate(offset, size)
+        elif size is None and name in self._lengths:
+            size = self._lengths[name] - offset
+
+        if size is not None and size <= 0:
+            raise ValueError("The 'size' argument must be greater than 0")
+        with attach_shared_memory(name) as sm:
+            if size is None:
+                return bytes(sm.buf[offset:])
+            else:
+                end = offset + size
+                return bytes(sm.buf[offset:end])
 
     class RentalManager:
         __slots__ = ("_sm", "_smq")
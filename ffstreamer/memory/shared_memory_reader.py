@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+from multiprocessing.shared_memory import SharedMemory
+from typing import Final, List, Optional, Tuple, Union
+
+from numpy import ndarray, uint8
+from numpy.typing import NDArray
+
+from ffstreamer.memory.shared_memory_queue import Written
+from ffstreamer.memory.shared_memory_utils import open_shared_memory
+
+DEFAULT_SHARED_MEMORY_READER_CACHE_SIZE: Final[int] = 16
+
+
+def _slice_range(length: int, offset: int, size: Optional[int]) -> Tuple[int, int]:
+    if size is None:
+        return offset, length
+    if size <= 0:
+        raise ValueError("The 'size' argument must be greater than 0")
+    return offset, offset + size
+
+
+class SharedMemoryReader:
+    """
+    Reader-side LRU cache of attached shared memory segments.
+
+    Segments are attached once by name and kept mapped until they are evicted,
+    invalidated or the cache is cleared. Views returned by `read_view` and
+    `read_ndarray` are only valid while their segment stays in the cache.
+
+    Pooled segments are padded to their size class, so without `size` a bare
+    name reads up to the end of the segment. Pass the `Written` of the segment
+    instead to read only what was written.
+    """
+
+    _cache: "OrderedDict[str, SharedMemory]"
+    _retired: List[SharedMemory]
+
+    def __init__(self, max_size=DEFAULT_SHARED_MEMORY_READER_CACHE_SIZE, untrack=True):
+        assert max_size >= 1
+        self._max_size = max_size
+        self._untrack = untrack
+        self._cache = OrderedDict()
+        self._retired = list()
+
+    def __enter__(self) -> "SharedMemoryReader":
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.clear()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._cache
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    def _detach(self, sm: SharedMemory) -> None:
+        try:
+            sm.close()
+        except BufferError:
+            # Views exported by `read_view` are still alive; retry later.
+            self._retired.append(sm)
+
+    def _collect_retired(self) -> None:
+        retired = self._retired
+        self._retired = list()
+        for sm in retired:
+            self._detach(sm)
+
+    def attach(self, name: str) -> SharedMemory:
+        sm = self._cache.get(name)
+        if sm is not None:
+            self._cache.move_to_end(name)
+            return sm
+
+        sm = open_shared_memory(name, self._untrack)
+        self._cache[name] = sm
+
+        while len(self._cache) > self._max_size:
+            _, oldest = self._cache.popitem(last=False)
+            self._detach(oldest)
+        return sm
+
+    def invalidate(self, name: str) -> bool:
+        sm = self._cache.pop(name, None)
+        if sm is None:
+            return False
+        self._detach(sm)
+        return True
+
+    def clear(self) -> None:
+        while self._cache:
+            _, sm = self._cache.popitem()
+            self._detach(sm)
+        self._collect_retired()
+
+    def read_view(
+        self,
+        name: Union[str, Written],
+        offset=0,
+        size: Optional[int] = None,
+    ) -> memoryview:
+        if isinstance(name, Written):
+            name, offset, size = name.locate(offset, size)
+        buf = self.attach(name).buf
+        assert buf is not None
+        begin, end = _slice_range(len(buf), offset, size)
+        return buf[begin:end]
+
+    def read_ndarray(
+        self,
+        name: str,
+        shape: Tuple[int, ...],
+        offset=0,
+    ) -> NDArray[uint8]:
+        buf = self.attach(name).buf
+        assert buf is not None
+        return ndarray(shape, dtype=uint8, buffer=buf, offset=offset)
+
+    def read(
+        self,
+        name: Union[str, Written],
+        offset=0,
+        size: Optional[int] = None,
+    ) -> bytes:
+        return bytes(self.read_view(name, offset, size))
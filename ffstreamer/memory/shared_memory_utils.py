@@ -1,7 +1,13 @@
 # -*- coding: utf-8 -*-
 
+import mmap
 import os
+from ctypes import CDLL, c_int, c_size_t, c_void_p
 from multiprocessing.shared_memory import SharedMemory
+from sys import platform
+from typing import Final
+
+HUGEPAGE_SIZE: Final[int] = 2 * 1024 * 1024
 
 
 def _unregister_shared_memory_tracker(sm: SharedMemory) -> None:
@@ -12,17 +18,27 @@ def _unregister_shared_memory_tracker(sm: SharedMemory) -> None:
         unregister(getattr(sm, "_name"), "shared_memory")
 
 
+def open_shared_memory(name: str, untrack=True) -> SharedMemory:
+    """
+    Children created by `multiprocessing` share the resource tracker of their
+    parent, so they must keep `untrack=False` or the creator's record is lost.
+    """
+    sm = SharedMemory(name=name)
+    if untrack:
+        _unregister_shared_memory_tracker(sm)
+    return sm
+
+
 class _AttachSharedMemoryContext:
     def __init__(self, name: str):
         self.name = name
 
     def __enter__(self) -> SharedMemory:
-        self.sm = SharedMemory(name=self.name)
+        self.sm = open_shared_memory(self.name)
         return self.sm
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.sm.close()
-        _unregister_shared_memory_tracker(self.sm)
 
 
 def attach_shared_memory(name: str):
@@ -36,3 +52,18 @@ def create_shared_memory(buffer_size: int) -> SharedMemory:
 def destroy_shared_memory(sm: SharedMemory) -> None:
     sm.close()
     sm.unlink()
+
+
+def advise_hugepages(address: int, size: int) -> bool:
+    """
+    Ask the kernel to back the range with transparent hugepages (best effort).
+    For shared memory this also requires `shmem_enabled` to allow `advise`.
+    """
+    advice = getattr(mmap, "MADV_HUGEPAGE", None)
+    if advice is None or not platform.startswith("linux"):
+        return False
+
+    libc = CDLL(None, use_errno=True)
+    libc.madvise.argtypes = [c_void_p, c_size_t, c_int]
+    libc.madvise.restype = c_int
+    return libc.madvise(address, size, advice) == 0
@@ -0,0 +1,490 @@
+# -*- coding: utf-8 -*-
+
+from collections import deque
+from multiprocessing import Pipe
+from multiprocessing import connection as conn
+from queue import Empty, Full
+from time import monotonic, monotonic_ns
+from typing import Deque, List, Optional, Set, Tuple
+
+from numpy import ndarray, uint8
+from numpy.typing import NDArray
+
+from ffstreamer.memory.spsc_header import EMPTY_META, SpscMeta
+from ffstreamer.memory.spsc_queue import (
+    SpscReservation,
+    SpscStore,
+    remaining_timeout,
+)
+from ffstreamer.memory.spsc_stats import SpscStats, SpscTelemetry
+from ffstreamer.np.buffer import BufferType, as_byte_array
+from ffstreamer.sync.overflow import (
+    DEFAULT_OVERFLOW_POLICY,
+    OVERFLOW_BLOCK,
+    OVERFLOW_DROP_OLDEST,
+)
+
+
+def encode_message(sequence: int, index: int, maxsize: int) -> int:
+    return sequence * maxsize + index
+
+
+def decode_message(message: int, maxsize: int) -> Tuple[int, int]:
+    """
+    Returns the `(sequence, index)` pair of a slot message.
+    """
+    return divmod(message, maxsize)
+
+
+class SpmcProducer:
+    """
+    Publishes every slot to all subscribers.
+
+    A slot returns to the free list once every subscriber has released it. With
+    the drop-oldest policy, a full producer takes back the oldest published slot
+    from the subscribers still holding it instead of waiting for them.
+    """
+
+    _free: Deque[int]
+    _published: Deque[int]
+    _holders: List[Set[int]]
+    _sequences: List[int]
+
+    def __init__(
+        self,
+        store: SpscStore,
+        working_senders: List[conn.Connection],
+        pending_receivers: List[conn.Connection],
+        telemetries: List[SpscTelemetry],
+        overflow=DEFAULT_OVERFLOW_POLICY,
+    ):
+        assert len(working_senders) == len(pending_receivers) == len(telemetries)
+        if overflow not in (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST):
+            raise ValueError(f"Unsupported overflow policy: '{overflow}'")
+
+        self._store = store
+        self._working_senders = working_senders
+        self._pending_receivers = pending_receivers
+        self._telemetries = telemetries
+        self._overflow = overflow
+        self._free = deque(range(store.maxsize))
+        self._published = deque()
+        self._holders = [set() for _ in range(store.maxsize)]
+        self._sequences = [store.header(i).sequence for i in range(store.maxsize)]
+
+    @property
+    def maxsize(self) -> int:
+        return self._store.maxsize
+
+    @property
+    def item_size(self) -> int:
+        return self._store.item_size
+
+    @property
+    def store(self) -> SpscStore:
+        return self._store
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._working_senders)
+
+    @property
+    def overflow(self) -> str:
+        return self._overflow
+
+    @property
+    def full(self) -> bool:
+        return not self._free
+
+    def close(self) -> None:
+        for sender in self._working_senders:
+            sender.close()
+        for receiver in self._pending_receivers:
+            receiver.close()
+
+    def extend(self, subscriber: int, message: int) -> None:
+        sequence, index = decode_message(message, self._store.maxsize)
+        if sequence != self._sequences[index]:
+            return  # The slot was taken back before the subscriber released it
+
+        holders = self._holders[index]
+        if subscriber not in holders:
+            return
+        holders.remove(subscriber)
+        self._telemetries[subscriber].count_get()
+        if not holders:
+            self._published.remove(index)
+            self._free.append(index)
+
+    def pull_nowait(self) -> None:
+        for subscriber, receiver in enumerate(self._pending_receivers):
+            while receiver.poll():
+                self.extend(subscriber, receiver.recv())
+
+    def reclaim_oldest(self) -> int:
+        index = self._published.popleft()
+        for subscriber in self._holders[index]:
+            self._telemetries[subscriber].count_drop()
+        self._holders[index].clear()
+        return index
+
+    def wait_release(self, timeout: Optional[float] = None) -> bool:
+        ready = conn.wait(self._pending_receivers, timeout)
+        for receiver in ready:
+            assert isinstance(receiver, conn.Connection)
+            subscriber = self._pending_receivers.index(receiver)
+            while receiver.poll():
+                self.extend(subscriber, receiver.recv())
+        return bool(ready)
+
+    def pop_nowait(self) -> int:
+        if self._free:
+            return self._free.popleft()
+        if self._overflow == OVERFLOW_DROP_OLDEST and self._published:
+            return self.reclaim_oldest()
+        for telemetry in self._telemetries:
+            telemetry.count_full()
+        raise Full()
+
+    def pop(self, timeout: Optional[float] = None) -> int:
+        self.pull_nowait()
+        if self._free or self._overflow == OVERFLOW_DROP_OLDEST:
+            return self.pop_nowait()
+
+        begin = monotonic_ns()
+        deadline = None if timeout is None else monotonic() + timeout
+        while not self._free:
+            remaining = remaining_timeout(deadline)
+            if remaining == 0.0:
+                break
+            self.wait_release(remaining)
+        for telemetry in self._telemetries:
+            telemetry.add_put_wait(monotonic_ns() - begin)
+        return self.pop_nowait()
+
+    def begin_write(self, index: int) -> None:
+        """
+        Invalidate the slot for readers that still refer to its previous content.
+        """
+        sequence = self._sequences[index] + 1
+        self._sequences[index] = sequence
+        self._store.header(index).sequence = sequence
+
+    def working(self, index: int) -> None:
+        message = encode_message(self._sequences[index], index, self._store.maxsize)
+        self._holders[index].update(range(len(self._working_senders)))
+        self._published.append(index)
+        for sender, telemetry in zip(self._working_senders, self._telemetries):
+            sender.send(message)
+            telemetry.count_put()
+
+    def cancel(self, index: int) -> None:
+        self._free.appendleft(index)
+
+    def put_and_working(
+        self,
+        index: int,
+        data: BufferType,
+        begin=0,
+        meta: Optional[SpscMeta] = None,
+    ) -> None:
+        try:
+            self.begin_write(index)
+            source = as_byte_array(data)
+            self._store.set_header(index, begin, source.size, meta or EMPTY_META)
+            self._store.view(index)[begin : begin + source.size] = source
+        except BaseException:
+            self.cancel(index)
+            raise
+        self.working(index)
+
+    def put_nowait(
+        self,
+        data: BufferType,
+        begin=0,
+        meta: Optional[SpscMeta] = None,
+    ) -> None:
+        self.pull_nowait()
+        self.put_and_working(self.pop_nowait(), data, begin, meta)
+
+    def put(
+        self,
+        data: BufferType,
+        begin=0,
+        timeout: Optional[float] = None,
+        meta: Optional[SpscMeta] = None,
+    ) -> None:
+        self.put_and_working(self.pop(timeout), data, begin, meta)
+
+    def reserve_and_working(self, index: int) -> SpscReservation:
+        self.begin_write(index)
+        return SpscReservation(self, index, self._store.view(index))
+
+    def reserve_nowait(self) -> SpscReservation:
+        self.pull_nowait()
+        return self.reserve_and_working(self.pop_nowait())
+
+    def reserve(self, timeout: Optional[float] = None) -> SpscReservation:
+        return self.reserve_and_working(self.pop(timeout))
+
+
+class SpmcSubscriber:
+    _buffer: Deque[int]
+
+    def __init__(
+        self,
+        store: SpscStore,
+        subscriber: int,
+        working_receiver: conn.Connection,
+        pending_sender: conn.Connection,
+        telemetry: SpscTelemetry,
+    ):
+        self._store = store
+        self._subscriber = subscriber
+        self._working_receiver = working_receiver
+        self._pending_sender = pending_sender
+        self._telemetry = telemetry
+        self._buffer = deque()
+
+    @property
+    def maxsize(self) -> int:
+        return self._store.maxsize
+
+    @property
+    def item_size(self) -> int:
+        return self._store.item_size
+
+    @property
+    def store(self) -> SpscStore:
+        return self._store
+
+    @property
+    def subscriber(self) -> int:
+        return self._subscriber
+
+    @property
+    def telemetry(self) -> SpscTelemetry:
+        return self._telemetry
+
+    @property
+    def empty(self) -> bool:
+        return not self._buffer
+
+    def stats(self) -> SpscStats:
+        return self._telemetry.snapshot()
+
+    def close(self) -> None:
+        self._working_receiver.close()
+        self._pending_sender.close()
+
+    def pull_nowait(self) -> None:
+        while self._working_receiver.poll():
+            self._buffer.append(self._working_receiver.recv())
+
+    def is_current(self, sequence: int, index: int) -> bool:
+        return self._store.header(index).sequence == sequence
+
+    def release(self, sequence: int, index: int) -> None:
+        if self.is_current(sequence, index):
+            message = encode_message(sequence, index, self._store.maxsize)
+            self._pending_sender.send(message)
+
+    def pop_current(self) -> Optional[Tuple[int, int]]:
+        while self._buffer:
+            sequence, index = decode_message(self._buffer.popleft(), self.maxsize)
+            if self.is_current(sequence, index):
+                return sequence, index
+            self._telemetry.count_skip()
+        return None
+
+    def pop_nowait(self) -> Tuple[int, int]:
+        result = self.pop_current()
+        if result is None:
+            self._telemetry.count_empty()
+            raise Empty()
+        return result
+
+    def pop(self, timeout: Optional[float] = None) -> Tuple[int, int]:
+        self.pull_nowait()
+        result = self.pop_current()
+        if result is not None:
+            return result
+
+        begin = monotonic_ns()
+        deadline = None if timeout is None else monotonic() + timeout
+        while result is None:
+            remaining = remaining_timeout(deadline)
+            if remaining == 0.0 or not self._working_receiver.poll(remaining):
+                break
+            self.pull_nowait()
+            result = self.pop_current()
+
+        self._telemetry.add_get_wait(monotonic_ns() - begin)
+        if result is None:
+            self._telemetry.count_empty()
+            raise Empty()
+        return result
+
+    def read(self, sequence: int, index: int) -> Optional[bytes]:
+        result = self._store.payload(index).tobytes()
+        if not self.is_current(sequence, index):
+            self._telemetry.count_skip()
+            return None  # Overwritten while copying
+        self.release(sequence, index)
+        return result
+
+    def get_nowait(self) -> bytes:
+        while True:
+            result = self.read(*self.pop_nowait())
+            if result is not None:
+                return result
+
+    def get(self, timeout: Optional[float] = None) -> bytes:
+        deadline = None if timeout is None else monotonic() + timeout
+        while True:
+            result = self.read(*self.pop(remaining_timeout(deadline)))
+            if result is not None:
+                return result
+
+    def lease_nowait(self) -> "SpmcLease":
+        sequence, index = self.pop_nowait()
+        return SpmcLease(self, sequence, index, self._store.payload(index))
+
+    def lease(self, timeout: Optional[float] = None) -> "SpmcLease":
+        """
+        Borrow the next slot without copying it.
+
+        With the drop-oldest policy the producer may rewrite the slot while it is
+        leased; check `valid` after reading the data.
+        """
+        sequence, index = self.pop(timeout)
+        return SpmcLease(self, sequence, index, self._store.payload(index))
+
+
+class SpmcLease:
+    __slots__ = ("_subscriber", "_sequence", "_index", "_data")
+
+    _data: Optional[NDArray[uint8]]
+
+    def __init__(
+        self,
+        subscriber: SpmcSubscriber,
+        sequence: int,
+        index: int,
+        data: NDArray[uint8],
+    ):
+        self._subscriber = subscriber
+        self._sequence = sequence
+        self._index = index
+        self._data = data
+
+    def __enter__(self) -> "SpmcLease":
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.release()
+
+    @property
+    def index(self) -> int:
+        return self._index
+
+    @property
+    def sequence(self) -> int:
+        return self._sequence
+
+    @property
+    def released(self) -> bool:
+        return self._data is None
+
+    @property
+    def valid(self) -> bool:
+        return self._subscriber.is_current(self._sequence, self._index)
+
+    @property
+    def data(self) -> NDArray[uint8]:
+        if self._data is None:
+            raise BufferError("The lease has already been released")
+        return self._data
+
+    @property
+    def meta(self) -> SpscMeta:
+        if self._data is None:
+            raise BufferError("The lease has already been released")
+        return self._subscriber.store.meta(self._index)
+
+    def view(self, shape: Tuple[int, ...]) -> NDArray[uint8]:
+        return ndarray(shape, dtype=uint8, buffer=self.data)
+
+    def release(self) -> None:
+        if self._data is None:
+            return
+        self._data = None
+        self._subscriber.release(self._sequence, self._index)
+
+
+class SpmcQueue:
+    """
+    Single Producer Multiple Consumer broadcast queue.
+
+    Every subscriber sees every item through its own pipe, so a subscriber that
+    stops reading entirely eventually blocks the producer on the pipe buffer even
+    with the drop-oldest policy.
+    """
+
+    _store: SpscStore
+
+    def __init__(
+        self,
+        subscribers: int,
+        queue_size=8,
+        item_size=4 * 1024 * 1024,
+        overflow=DEFAULT_OVERFLOW_POLICY,
+        hugepages=False,
+    ):
+        assert subscribers >= 1
+        self._store = SpscStore(queue_size, item_size, hugepages=hugepages)
+        self._telemetries = [SpscTelemetry() for _ in range(subscribers)]
+
+        working_senders = list()
+        pending_receivers = list()
+        self._subscribers = list()
+        for i in range(subscribers):
+            working_receiver, working_sender = Pipe(duplex=False)
+            pending_receiver, pending_sender = Pipe(duplex=False)
+            working_senders.append(working_sender)
+            pending_receivers.append(pending_receiver)
+            self._subscribers.append(
+                SpmcSubscriber(
+                    self._store,
+                    i,
+                    working_receiver,
+                    pending_sender,
+                    self._telemetries[i],
+                )
+            )
+
+        self._producer = SpmcProducer(
+            self._store,
+            working_senders,
+            pending_receivers,
+            self._telemetries,
+            overflow,
+        )
+
+    @property
+    def store(self) -> SpscStore:
+        return self._store
+
+    @property
+    def producer(self) -> SpmcProducer:
+        return self._producer
+
+    @property
+    def subscribers(self) -> List[SpmcSubscriber]:
+        return self._subscribers
+
+    def subscriber(self, index: int) -> SpmcSubscriber:
+        return self._subscribers[index]
+
+    def stats(self) -> List[SpscStats]:
+        return [telemetry.snapshot() for telemetry in self._telemetries]
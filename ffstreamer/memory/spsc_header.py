@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+from ctypes import Structure, c_char, c_int32, c_int64, c_uint64
+from fractions import Fraction
+from typing import Final, NamedTuple, Optional
+
+NOPTS_VALUE: Final[int] = -(2**63)
+"""
+Same as `AV_NOPTS_VALUE` in FFmpeg; marks an undefined timestamp.
+"""
+
+NO_FRAME_INDEX: Final[int] = -1
+PIXEL_FORMAT_CAPACITY: Final[int] = 16
+
+
+class SpscHeader(Structure):
+    _fields_ = [
+        ("begin", c_uint64),
+        ("size", c_uint64),
+        ("frame_index", c_int64),
+        ("pts", c_int64),
+        ("dts", c_int64),
+        ("time_base_num", c_int32),
+        ("time_base_den", c_int32),
+        ("capture_time", c_int64),
+        ("pixel_format", c_char * PIXEL_FORMAT_CAPACITY),
+        ("sequence", c_uint64),  # Bumped by broadcast producers on every rewrite
+    ]
+
+
+class SpscMeta(NamedTuple):
+    frame_index: int = NO_FRAME_INDEX
+    pts: Optional[int] = None
+    dts: Optional[int] = None
+    time_base: Optional[Fraction] = None
+    capture_time: Optional[int] = None  # Nanoseconds of `time.monotonic_ns()`
+    pixel_format: str = str()
+
+
+EMPTY_META: Final[SpscMeta] = SpscMeta()
+
+
+def _to_timestamp(value: Optional[int]) -> int:
+    return NOPTS_VALUE if value is None else value
+
+
+def _from_timestamp(value: int) -> Optional[int]:
+    return None if value == NOPTS_VALUE else value
+
+
+def write_meta(header: SpscHeader, meta: SpscMeta) -> None:
+    header.frame_index = meta.frame_index
+    header.pts = _to_timestamp(meta.pts)
+    header.dts = _to_timestamp(meta.dts)
+    if meta.time_base is None:
+        header.time_base_num = 0
+        header.time_base_den = 0
+    else:
+        header.time_base_num = meta.time_base.numerator
+        header.time_base_den = meta.time_base.denominator
+    header.capture_time = _to_timestamp(meta.capture_time)
+    header.pixel_format = meta.pixel_format.encode("ascii")
+
+
+def read_meta(header: SpscHeader) -> SpscMeta:
+    if header.time_base_den == 0:
+        time_base = None
+    else:
+        time_base = Fraction(header.time_base_num, header.time_base_den)
+    return SpscMeta(
+        frame_index=header.frame_index,
+        pts=_from_timestamp(header.pts),
+        dts=_from_timestamp(header.dts),
+        time_base=time_base,
+        capture_time=_from_timestamp(header.capture_time),
+        pixel_format=header.pixel_format.decode("ascii"),
+    )
@@ -1,36 +1,193 @@
 # -*- coding: utf-8 -*-
 
 from collections import deque
-from ctypes import c_uint8
+from ctypes import addressof, c_uint8, sizeof
 from multiprocessing import Pipe
 from multiprocessing import connection as conn
 from multiprocessing.sharedctypes import RawArray
 from queue import Empty, Full
-from typing import Any, Deque, List, Optional
+from time import monotonic, monotonic_ns
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    Final,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from numpy import ndarray, uint8
+from numpy.typing import NDArray
+
+from ffstreamer.aio.readable import wait_readable
+from ffstreamer.memory.shared_memory_utils import HUGEPAGE_SIZE, advise_hugepages
+from ffstreamer.memory.spsc_header import (
+    EMPTY_META,
+    SpscHeader,
+    SpscMeta,
+    read_meta,
+    write_meta,
+)
+from ffstreamer.memory.spsc_ring import SpscRing
+from ffstreamer.memory.spsc_stats import SpscStats, SpscTelemetry
+from ffstreamer.np.buffer import BufferType, as_byte_array
 
 RawArrayType = Any
+ChannelType = Union[conn.Connection, SpscRing]
+MessageType = Union[int, List[int]]
+
+SPSC_TRANSPORT_PIPE: Final[str] = "pipe"
+SPSC_TRANSPORT_RING: Final[str] = "ring"
+SPSC_TRANSPORTS = (SPSC_TRANSPORT_PIPE, SPSC_TRANSPORT_RING)
+DEFAULT_SPSC_TRANSPORT: Final[str] = SPSC_TRANSPORT_PIPE
+DEFAULT_SPSC_ALIGNMENT: Final[int] = 4096
+
+
+def _align(value: int, alignment: int) -> int:
+    return (value + alignment - 1) // alignment * alignment
+
+
+def remaining_timeout(deadline: Optional[float]) -> Optional[float]:
+    if deadline is None:
+        return None
+    return max(deadline - monotonic(), 0.0)
+
+
+def channel_fileno(channel: ChannelType) -> int:
+    if not isinstance(channel, conn.Connection):
+        raise TypeError("Only the pipe transport has a file descriptor")
+    return channel.fileno()
 
 
 class SpscStore:
-    _arrays: List[RawArrayType]
+    """
+    Slot headers and payloads packed into a single shared-memory arena.
+    """
 
-    def __init__(self, array_size: int, item_size: int):
+    _arena: RawArrayType
+    _headers: Any
+    _slots: NDArray[uint8]
+
+    def __init__(
+        self,
+        array_size: int,
+        item_size: int,
+        alignment=DEFAULT_SPSC_ALIGNMENT,
+        hugepages=False,
+    ):
         assert array_size >= 1
         assert item_size >= 1
-        self._arrays = [RawArray(c_uint8, item_size) for _ in range(array_size)]
+        assert alignment >= 1
+        assert alignment & (alignment - 1) == 0
+
+        if hugepages:
+            alignment = max(alignment, HUGEPAGE_SIZE)
+
+        headers_size = _align(sizeof(SpscHeader) * array_size, alignment)
+        stride = _align(item_size, alignment)
+        arena = RawArray(c_uint8, alignment + headers_size + stride * array_size)
+        padding = -addressof(arena) % alignment
+
+        self._arena = arena
+        self._array_size = array_size
         self._item_size = item_size
+        self._stride = stride
+        self._headers_offset = padding
+        self._slots_offset = padding + headers_size
+        self._hugepages = False
+        self._init_views()
+
+        if hugepages:
+            slots_address = addressof(arena) + self._slots_offset
+            self._hugepages = advise_hugepages(slots_address, stride * array_size)
+
+        for i in range(array_size):
+            self.set_header(i, 0, item_size, EMPTY_META)
+
+    def _init_views(self) -> None:
+        headers_type = SpscHeader * self._array_size
+        self._headers = headers_type.from_buffer(self._arena, self._headers_offset)
+        self._slots = ndarray(
+            (self._array_size, self._stride),
+            dtype=uint8,
+            buffer=self._arena,
+            offset=self._slots_offset,
+        )
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_headers"]
+        del state["_slots"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._init_views()
+
+    def __getitem__(self, index: int) -> NDArray[uint8]:
+        return self.view(index)
+
+    def view(self, index: int) -> NDArray[uint8]:
+        return self._slots[index, : self._item_size]
+
+    def batch_view(self, shape: Tuple[int, ...]) -> NDArray[uint8]:
+        """
+        View every slot at once as an array of shape `(maxsize, *shape)`.
+        """
+        strides = [1]
+        for dim in reversed(shape[1:]):
+            strides.insert(0, strides[0] * dim)
+        if shape and strides[0] * shape[0] > self._item_size:
+            raise BufferError(f"The shape {shape} exceeds the slot size")
+        return ndarray(
+            (self._array_size,) + tuple(shape),
+            dtype=uint8,
+            buffer=self._arena,
+            offset=self._slots_offset,
+            strides=(self._stride,) + tuple(strides[: len(shape)]),
+        )
+
+    def header(self, index: int) -> SpscHeader:
+        return self._headers[index]
+
+    def set_header(self, index: int, begin: int, size: int, meta: SpscMeta) -> None:
+        if begin + size > self._item_size:
+            raise BufferError(
+                f"The payload exceeds the slot: {begin}+{size} > {self._item_size}"
+            )
+        header = self._headers[index]
+        header.begin = begin
+        header.size = size
+        write_meta(header, meta)
+
+    def payload(self, index: int) -> NDArray[uint8]:
+        header = self._headers[index]
+        begin = header.begin
+        return self._slots[index, begin : begin + header.size]
 
-    def __getitem__(self, index: int) -> RawArrayType:
-        return self._arrays.__getitem__(index)
+    def meta(self, index: int) -> SpscMeta:
+        return read_meta(self._headers[index])
 
     @property
     def maxsize(self) -> int:
-        return len(self._arrays)
+        return self._array_size
 
     @property
     def item_size(self) -> int:
         return self._item_size
 
+    @property
+    def stride(self) -> int:
+        return self._stride
+
+    @property
+    def hugepages(self) -> bool:
+        return self._hugepages
+
 
 class SpscQueueProducer:
     _buffer: Deque[int]
@@ -38,12 +195,14 @@ class SpscQueueProducer:
     def __init__(
         self,
         store: SpscStore,
-        working_sender: conn.Connection,
-        pending_receiver: conn.Connection,
+        working_sender: ChannelType,
+        pending_receiver: ChannelType,
+        telemetry: Optional[SpscTelemetry] = None,
     ):
         self._store = store
         self._working_sender = working_sender
         self._pending_receiver = pending_receiver
+        self._telemetry = telemetry if telemetry else SpscTelemetry()
         self._buffer = deque(maxlen=self._store.maxsize)
 
         for i in range(store.maxsize):
@@ -57,48 +216,300 @@ class SpscQueueProducer:
     def item_size(self) -> int:
         return self._store.item_size
 
+    @property
+    def store(self) -> SpscStore:
+        return self._store
+
+    @property
+    def telemetry(self) -> SpscTelemetry:
+        return self._telemetry
+
     @property
     def full(self) -> bool:
         return not self._buffer
 
+    def stats(self) -> SpscStats:
+        return self._telemetry.snapshot()
+
+    def count_drop(self, count=1) -> None:
+        """
+        Record items that were given up on because the queue stayed full.
+        """
+        self._telemetry.count_drop(count)
+
     def close(self) -> None:
         self._working_sender.close()
         self._pending_receiver.close()
 
     def pull_nowait(self) -> None:
         while self._pending_receiver.poll():
-            self._buffer.append(self._pending_receiver.recv())
+            self.extend(self._pending_receiver.recv())
 
-    def put_and_working(self, index: int, data: bytes, begin=0) -> None:
-        end = begin + len(data)
-        self._store[index][begin:end] = data
+    def extend(self, message: MessageType) -> None:
+        if isinstance(message, int):
+            self._buffer.append(message)
+        else:
+            self._buffer.extend(message)
+
+    def working(self, index: int) -> None:
+        # Count before sending so that occupancy never reads below zero.
+        self._telemetry.count_put()
         self._working_sender.send(index)
 
-    def put_nowait(self, data: bytes, begin=0) -> None:
+    def working_many(self, indices: List[int]) -> None:
+        self._telemetry.count_put(len(indices))
+        if len(indices) == 1:
+            self._working_sender.send(indices[0])
+        elif indices:
+            self._working_sender.send(indices)
+
+    def cancel(self, index: int) -> None:
+        self._buffer.appendleft(index)
+
+    def fill(
+        self,
+        index: int,
+        data: BufferType,
+        begin=0,
+        meta: Optional[SpscMeta] = None,
+    ) -> None:
+        source = as_byte_array(data)
+        self._store.set_header(index, begin, source.size, meta or EMPTY_META)
+        self._store.view(index)[begin : begin + source.size] = source
+
+    def put_and_working(
+        self,
+        index: int,
+        data: BufferType,
+        begin=0,
+        meta: Optional[SpscMeta] = None,
+    ) -> None:
+        try:
+            self.fill(index, data, begin, meta)
+        except BaseException:
+            self.cancel(index)
+            raise
+        self.working(index)
+
+    def reserve_and_working(self, index: int) -> "SpscReservation":
+        return SpscReservation(self, index, self._store.view(index))
+
+    def pop_nowait(self) -> int:
         if not self._buffer:
+            self._telemetry.count_full()
             raise Full()
-        self.put_and_working(self._buffer.popleft(), data, begin)
+        return self._buffer.popleft()
+
+    def pop_with_receiver(self, timeout: Optional[float] = None) -> int:
+        if timeout is not None and timeout <= 0:
+            self._telemetry.count_full()
+            raise Full()
+
+        begin = monotonic_ns()
+        if timeout is None or self._pending_receiver.poll(timeout):
+            message = self._pending_receiver.recv()
+            self._telemetry.add_put_wait(monotonic_ns() - begin)
+        else:
+            self._telemetry.add_put_wait(monotonic_ns() - begin)
+            self._telemetry.count_full()
+            raise Full()
+
+        if isinstance(message, int):
+            return message
+        self.extend(message[1:])
+        return message[0]
+
+    def pop(self, timeout: Optional[float] = None) -> int:
+        self.pull_nowait()
+        if self._buffer:
+            return self.pop_nowait()
+        else:
+            return self.pop_with_receiver(timeout)
+
+    def pop_many(self, max_items: int, timeout: Optional[float] = None) -> List[int]:
+        assert max_items >= 1
+        self.pull_nowait()
+        if not self._buffer:
+            self._buffer.appendleft(self.pop_with_receiver(timeout))
+            self.pull_nowait()
+        count = min(max_items, len(self._buffer))
+        return [self._buffer.popleft() for _ in range(count)]
+
+    def put_nowait(
+        self,
+        data: BufferType,
+        begin=0,
+        meta: Optional[SpscMeta] = None,
+    ) -> None:
+        self.put_and_working(self.pop_nowait(), data, begin, meta)
 
     def put_with_receiver(
-        self, data: bytes, begin=0, timeout: Optional[float] = None
+        self,
+        data: BufferType,
+        begin=0,
+        timeout: Optional[float] = None,
+        meta: Optional[SpscMeta] = None,
     ) -> None:
-        if timeout is None:
-            index = self._pending_receiver.recv()
-        else:
-            if timeout <= 0:
-                raise Full()
-            if self._pending_receiver.poll(timeout):
-                index = self._pending_receiver.recv()
-            else:
-                raise Full()
-        self.put_and_working(index, data, begin)
-
-    def put(self, data: bytes, begin=0, timeout: Optional[float] = None) -> None:
+        self.put_and_working(self.pop_with_receiver(timeout), data, begin, meta)
+
+    def put(
+        self,
+        data: BufferType,
+        begin=0,
+        timeout: Optional[float] = None,
+        meta: Optional[SpscMeta] = None,
+    ) -> None:
+        self.put_and_working(self.pop(timeout), data, begin, meta)
+
+    def put_many(
+        self,
+        items: Sequence[BufferType],
+        begin=0,
+        timeout: Optional[float] = None,
+        metas: Optional[Sequence[SpscMeta]] = None,
+    ) -> int:
+        """
+        Publish as many items as there are free slots with a single message.
+
+        Returns the number of items published, which can be less than the number
+        of items given. Raises `Full` if no slot became free within the timeout.
+        """
+        if not items:
+            return 0
+        indices = self.pop_many(len(items), timeout)
+        try:
+            for i, index in enumerate(indices):
+                self.fill(index, items[i], begin, metas[i] if metas else None)
+        except BaseException:
+            for index in reversed(indices):
+                self.cancel(index)
+            raise
+        self.working_many(indices)
+        return len(indices)
+
+    def reserve_nowait(self) -> "SpscReservation":
+        return self.reserve_and_working(self.pop_nowait())
+
+    def reserve_with_receiver(
+        self, timeout: Optional[float] = None
+    ) -> "SpscReservation":
+        return self.reserve_and_working(self.pop_with_receiver(timeout))
+
+    def reserve(self, timeout: Optional[float] = None) -> "SpscReservation":
+        """
+        Borrow the next free slot so that it can be written in place.
+
+        The slot is published to the consumer by `commit()`, or returned to the
+        free list by `cancel()`.
+        """
+        return self.reserve_and_working(self.pop(timeout))
+
+    def fileno(self) -> int:
+        """
+        Readable when the consumer has returned a slot.
+        """
+        return channel_fileno(self._pending_receiver)
+
+    async def apop(self, timeout: Optional[float] = None) -> int:
         self.pull_nowait()
         if self._buffer:
-            return self.put_nowait(data, begin)
+            return self._buffer.popleft()
+
+        fileno = self.fileno()
+        begin = monotonic_ns()
+        deadline = None if timeout is None else monotonic() + timeout
+        while not self._buffer:
+            if not await wait_readable(fileno, remaining_timeout(deadline)):
+                break
+            self.pull_nowait()
+
+        self._telemetry.add_put_wait(monotonic_ns() - begin)
+        return self.pop_nowait()
+
+    async def aput(
+        self,
+        data: BufferType,
+        begin=0,
+        timeout: Optional[float] = None,
+        meta: Optional[SpscMeta] = None,
+    ) -> None:
+        self.put_and_working(await self.apop(timeout), data, begin, meta)
+
+    async def areserve(self, timeout: Optional[float] = None) -> "SpscReservation":
+        return self.reserve_and_working(await self.apop(timeout))
+
+
+class SpscSlotOwner(Protocol):
+    @property
+    def store(self) -> SpscStore: ...
+
+    def working(self, index: int) -> None: ...
+
+    def cancel(self, index: int) -> None: ...
+
+
+class SpscReservation:
+    __slots__ = ("_producer", "_index", "_data", "_size")
+
+    _data: Optional[NDArray[uint8]]
+
+    def __init__(self, producer: SpscSlotOwner, index: int, data: NDArray[uint8]):
+        self._producer = producer
+        self._index = index
+        self._data = data
+        self._size = data.size
+
+    def __enter__(self) -> "SpscReservation":
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is None:
+            self.commit()
         else:
-            return self.put_with_receiver(data, begin, timeout)
+            self.cancel()
+
+    @property
+    def index(self) -> int:
+        return self._index
+
+    @property
+    def finished(self) -> bool:
+        return self._data is None
+
+    @property
+    def data(self) -> NDArray[uint8]:
+        if self._data is None:
+            raise BufferError("The reservation has already been finished")
+        return self._data
+
+    def view(self, shape: Tuple[int, ...]) -> NDArray[uint8]:
+        result: NDArray[uint8] = ndarray(shape, dtype=uint8, buffer=self.data)
+        self._size = result.size
+        return result
+
+    def commit(
+        self,
+        size: Optional[int] = None,
+        meta: Optional[SpscMeta] = None,
+    ) -> None:
+        """
+        Publish the slot. If `size` is omitted, the payload length is the size of
+        the last `view()`, or the whole slot.
+        """
+        if self._data is None:
+            return
+        payload_size = self._size if size is None else size
+        self._producer.store.set_header(
+            self._index, 0, payload_size, meta or EMPTY_META
+        )
+        self._data = None
+        self._producer.working(self._index)
+
+    def cancel(self) -> None:
+        if self._data is None:
+            return
+        self._data = None
+        self._producer.cancel(self._index)
 
 
 class SpscQueueConsumer:
@@ -107,12 +518,14 @@ class SpscQueueConsumer:
     def __init__(
         self,
         store: SpscStore,
-        working_receiver: conn.Connection,
-        pending_sender: conn.Connection,
+        working_receiver: ChannelType,
+        pending_sender: ChannelType,
+        telemetry: Optional[SpscTelemetry] = None,
     ):
         self._store = store
         self._working_receiver = working_receiver
         self._pending_sender = pending_sender
+        self._telemetry = telemetry if telemetry else SpscTelemetry()
         self._buffer = deque(maxlen=self._store.maxsize)
 
     @property
@@ -123,57 +536,228 @@ class SpscQueueConsumer:
     def item_size(self) -> int:
         return self._store.item_size
 
+    @property
+    def store(self) -> SpscStore:
+        return self._store
+
+    @property
+    def telemetry(self) -> SpscTelemetry:
+        return self._telemetry
+
     @property
     def empty(self) -> bool:
         return not self._buffer
 
+    def stats(self) -> SpscStats:
+        return self._telemetry.snapshot()
+
     def close(self) -> None:
         self._working_receiver.close()
         self._pending_sender.close()
 
     def pull_nowait(self) -> None:
         while self._working_receiver.poll():
-            self._buffer.append(self._working_receiver.recv())
+            self.extend(self._working_receiver.recv())
 
-    def get_and_pending(self, index: int) -> bytes:
-        result = bytes(self._store[index][:])
+    def extend(self, message: MessageType) -> None:
+        if isinstance(message, int):
+            self._buffer.append(message)
+        else:
+            self._buffer.extend(message)
+
+    def release(self, index: int) -> None:
+        # Count before sending so that occupancy never exceeds the queue size.
+        self._telemetry.count_get()
         self._pending_sender.send(index)
+
+    def release_many(self, indices: List[int]) -> None:
+        self._telemetry.count_get(len(indices))
+        if len(indices) == 1:
+            self._pending_sender.send(indices[0])
+        elif indices:
+            self._pending_sender.send(indices)
+
+    def get_and_pending(self, index: int) -> bytes:
+        result = self._store.payload(index).tobytes()
+        self.release(index)
         return result
 
-    def get_nowait(self) -> bytes:
+    def lease_and_pending(self, index: int) -> "SpscLease":
+        return SpscLease(self, index, self._store.payload(index))
+
+    def pop_nowait(self) -> int:
         if not self._buffer:
+            self._telemetry.count_empty()
             raise Empty()
-        return self.get_and_pending(self._buffer.popleft())
+        return self._buffer.popleft()
 
-    def get_with_receiver(self, timeout: Optional[float] = None) -> bytes:
-        if timeout is None:
-            index = self._working_receiver.recv()
+    def pop_with_receiver(self, timeout: Optional[float] = None) -> int:
+        if timeout is not None and timeout <= 0:
+            self._telemetry.count_empty()
+            raise Empty()
+
+        begin = monotonic_ns()
+        if timeout is None or self._working_receiver.poll(timeout):
+            message = self._working_receiver.recv()
+            self._telemetry.add_get_wait(monotonic_ns() - begin)
         else:
-            if timeout <= 0:
-                raise Empty()
-            if self._working_receiver.poll(timeout):
-                index = self._working_receiver.recv()
-            else:
-                raise Empty()
-        return self.get_and_pending(index)
+            self._telemetry.add_get_wait(monotonic_ns() - begin)
+            self._telemetry.count_empty()
+            raise Empty()
 
-    def get(self, timeout: Optional[float] = None) -> bytes:
+        if isinstance(message, int):
+            return message
+        self.extend(message[1:])
+        return message[0]
+
+    def pop(self, timeout: Optional[float] = None) -> int:
         self.pull_nowait()
         if self._buffer:
-            return self.get_nowait()
+            return self.pop_nowait()
         else:
-            return self.get_with_receiver(timeout)
+            return self.pop_with_receiver(timeout)
 
-    def get_latest_nowait(self) -> bytes:
+    def pop_many(self, max_items: int, timeout: Optional[float] = None) -> List[int]:
+        assert max_items >= 1
+        self.pull_nowait()
         if not self._buffer:
+            self._buffer.appendleft(self.pop_with_receiver(timeout))
+            self.pull_nowait()
+        count = min(max_items, len(self._buffer))
+        return [self._buffer.popleft() for _ in range(count)]
+
+    def pop_latest_nowait(self) -> int:
+        if not self._buffer:
+            self._telemetry.count_empty()
             raise Empty()
 
-        while True:
-            index = self._buffer.popleft()
-            if self._buffer:
-                self._pending_sender.send(index)
-            else:
-                return self.get_and_pending(index)
+        stale = [self._buffer.popleft() for _ in range(len(self._buffer) - 1)]
+        self.release_many(stale)
+        self._telemetry.count_skip(len(stale))
+        return self._buffer.popleft()
+
+    def pop_latest(self, timeout: Optional[float] = None) -> int:
+        self.pull_nowait()
+        if not self._buffer:
+            self._buffer.appendleft(self.pop_with_receiver(timeout))
+            self.pull_nowait()
+        return self.pop_latest_nowait()
+
+    def get_nowait(self) -> bytes:
+        return self.get_and_pending(self.pop_nowait())
+
+    def get_with_receiver(self, timeout: Optional[float] = None) -> bytes:
+        return self.get_and_pending(self.pop_with_receiver(timeout))
+
+    def get(self, timeout: Optional[float] = None) -> bytes:
+        return self.get_and_pending(self.pop(timeout))
+
+    def get_latest_nowait(self) -> bytes:
+        return self.get_and_pending(self.pop_latest_nowait())
+
+    def get_latest(self, timeout: Optional[float] = None) -> bytes:
+        return self.get_and_pending(self.pop_latest(timeout))
+
+    def get_many(self, max_items: int, timeout: Optional[float] = None) -> List[bytes]:
+        """
+        Drain up to `max_items` items, releasing their slots with a single message.
+        """
+        indices = self.pop_many(max_items, timeout)
+        result = [self._store.payload(index).tobytes() for index in indices]
+        self.release_many(indices)
+        return result
+
+    def lease_nowait(self) -> "SpscLease":
+        return self.lease_and_pending(self.pop_nowait())
+
+    def lease_with_receiver(self, timeout: Optional[float] = None) -> "SpscLease":
+        return self.lease_and_pending(self.pop_with_receiver(timeout))
+
+    def lease(self, timeout: Optional[float] = None) -> "SpscLease":
+        """
+        Borrow the next slot without copying it.
+
+        The slot is handed back to the producer only when the returned lease is
+        released, so it must not be held longer than necessary.
+        """
+        return self.lease_and_pending(self.pop(timeout))
+
+    def lease_latest_nowait(self) -> "SpscLease":
+        return self.lease_and_pending(self.pop_latest_nowait())
+
+    def fileno(self) -> int:
+        """
+        Readable when the producer has published a slot.
+        """
+        return channel_fileno(self._working_receiver)
+
+    async def apop(self, timeout: Optional[float] = None) -> int:
+        self.pull_nowait()
+        if self._buffer:
+            return self._buffer.popleft()
+
+        fileno = self.fileno()
+        begin = monotonic_ns()
+        deadline = None if timeout is None else monotonic() + timeout
+        while not self._buffer:
+            if not await wait_readable(fileno, remaining_timeout(deadline)):
+                break
+            self.pull_nowait()
+
+        self._telemetry.add_get_wait(monotonic_ns() - begin)
+        return self.pop_nowait()
+
+    async def aget(self, timeout: Optional[float] = None) -> bytes:
+        return self.get_and_pending(await self.apop(timeout))
+
+    async def alease(self, timeout: Optional[float] = None) -> "SpscLease":
+        return self.lease_and_pending(await self.apop(timeout))
+
+
+class SpscLease:
+    __slots__ = ("_consumer", "_index", "_data")
+
+    _data: Optional[NDArray[uint8]]
+
+    def __init__(self, consumer: SpscQueueConsumer, index: int, data: NDArray[uint8]):
+        self._consumer = consumer
+        self._index = index
+        self._data = data
+
+    def __enter__(self) -> "SpscLease":
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.release()
+
+    @property
+    def index(self) -> int:
+        return self._index
+
+    @property
+    def released(self) -> bool:
+        return self._data is None
+
+    @property
+    def data(self) -> NDArray[uint8]:
+        if self._data is None:
+            raise BufferError("The lease has already been released")
+        return self._data
+
+    @property
+    def meta(self) -> SpscMeta:
+        if self._data is None:
+            raise BufferError("The lease has already been released")
+        return self._consumer.store.meta(self._index)
+
+    def view(self, shape: Tuple[int, ...]) -> NDArray[uint8]:
+        return ndarray(shape, dtype=uint8, buffer=self.data)
+
+    def release(self) -> None:
+        if self._data is None:
+            return
+        self._data = None
+        self._consumer.release(self._index)
 
 
 class SpscQueue:
@@ -183,21 +767,59 @@ class SpscQueue:
 
     _store: SpscStore
 
-    def __init__(self, queue_size=8, item_size=4 * 1024 * 1024):
-        self._store = SpscStore(queue_size, item_size)
-        working_receiver, working_sender = Pipe()
-        pending_receiver, pending_sender = Pipe()
+    def __init__(
+        self,
+        queue_size=8,
+        item_size=4 * 1024 * 1024,
+        transport=DEFAULT_SPSC_TRANSPORT,
+        hugepages=False,
+    ):
+        self._store = SpscStore(queue_size, item_size, hugepages=hugepages)
+        self._transport = transport
+        self._telemetry = SpscTelemetry()
+
+        working_receiver: ChannelType
+        working_sender: ChannelType
+        pending_receiver: ChannelType
+        pending_sender: ChannelType
+
+        if transport == SPSC_TRANSPORT_PIPE:
+            working_receiver, working_sender = Pipe()
+            pending_receiver, pending_sender = Pipe()
+        elif transport == SPSC_TRANSPORT_RING:
+            working_receiver = working_sender = SpscRing(queue_size)
+            pending_receiver = pending_sender = SpscRing(queue_size)
+        else:
+            raise ValueError(f"Unsupported transport: '{transport}'")
+
         self._producer = SpscQueueProducer(
             self._store,
             working_sender,
             pending_receiver,
+            self._telemetry,
         )
         self._consumer = SpscQueueConsumer(
             self._store,
             working_receiver,
             pending_sender,
+            self._telemetry,
         )
 
+    @property
+    def store(self) -> SpscStore:
+        return self._store
+
+    @property
+    def transport(self) -> str:
+        return self._transport
+
+    @property
+    def telemetry(self) -> SpscTelemetry:
+        return self._telemetry
+
+    def stats(self) -> SpscStats:
+        return self._telemetry.snapshot()
+
     @property
     def producer(self):
         return self._producer
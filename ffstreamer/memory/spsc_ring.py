@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+from ctypes import c_int64, c_uint64
+from multiprocessing import Semaphore
+from multiprocessing.sharedctypes import RawArray
+from typing import Any, Final, List, Optional, Union
+
+RING_HEAD_INDEX: Final[int] = 0
+RING_TAIL_INDEX: Final[int] = 1
+RING_COUNTERS: Final[int] = 2
+
+
+class SpscRing:
+    """
+    Slot index channel using head/tail counters in shared memory.
+
+    It implements the `Connection` methods used by the SPSC queue, so it can
+    replace a `Pipe` without pickling or a system call per index. The semaphore
+    only wakes a waiting receiver and is futex based on Linux.
+    """
+
+    _counters: Any
+    _items: Any
+
+    def __init__(self, capacity: int):
+        assert capacity >= 1
+        self._capacity = capacity
+        self._counters = RawArray(c_uint64, RING_COUNTERS)
+        self._items = RawArray(c_int64, capacity)
+        self._signal = Semaphore(0)
+        self._credits = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def head(self) -> int:
+        return self._counters[RING_HEAD_INDEX]
+
+    @property
+    def tail(self) -> int:
+        return self._counters[RING_TAIL_INDEX]
+
+    def qsize(self) -> int:
+        return self.head - self.tail
+
+    def close(self) -> None:
+        pass
+
+    def send(self, message: Union[int, List[int]]) -> None:
+        indices = [message] if isinstance(message, int) else message
+        head = self._counters[RING_HEAD_INDEX]
+        tail = self._counters[RING_TAIL_INDEX]
+        assert head + len(indices) - tail <= self._capacity
+        for index in indices:
+            self._items[head % self._capacity] = index
+            head += 1
+        self._counters[RING_HEAD_INDEX] = head
+        for _ in indices:
+            self._signal.release()
+
+    def poll(self, timeout: Optional[float] = 0.0) -> bool:
+        if self._credits > 0:
+            return True
+        if timeout is None:
+            acquired = self._signal.acquire()
+        elif timeout <= 0:
+            acquired = self._signal.acquire(False)
+        else:
+            acquired = self._signal.acquire(True, timeout)
+        if acquired:
+            self._credits += 1
+        return acquired
+
+    def recv(self) -> int:
+        if self._credits > 0:
+            self._credits -= 1
+        else:
+            self._signal.acquire()
+        tail = self._counters[RING_TAIL_INDEX]
+        index = self._items[tail % self._capacity]
+        self._counters[RING_TAIL_INDEX] = tail + 1
+        return index
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+
+from ctypes import c_uint64
+from multiprocessing.sharedctypes import RawArray
+from typing import Any, Final, NamedTuple, Optional, Tuple
+
+SPSC_PUTS: Final[int] = 0
+SPSC_GETS: Final[int] = 1
+SPSC_DROPS: Final[int] = 2
+SPSC_SKIPS: Final[int] = 3
+SPSC_FULLS: Final[int] = 4
+SPSC_EMPTIES: Final[int] = 5
+SPSC_PUT_WAITS: Final[int] = 6
+SPSC_PUT_WAIT_NS: Final[int] = 7
+SPSC_GET_WAITS: Final[int] = 8
+SPSC_GET_WAIT_NS: Final[int] = 9
+SPSC_MAX_OCCUPANCY: Final[int] = 10
+SPSC_COUNTERS: Final[int] = 11
+
+SPSC_WAIT_BUCKETS: Final[int] = 40
+"""
+Bucket `i` of a wait histogram counts waits of `[2**(i-1), 2**i)` nanoseconds;
+the last bucket also holds every longer wait.
+"""
+
+
+def wait_bucket(nanoseconds: int) -> int:
+    return min(max(nanoseconds, 0).bit_length(), SPSC_WAIT_BUCKETS - 1)
+
+
+class SpscStats(NamedTuple):
+    puts: int
+    gets: int
+    drops: int  # Items the producer gave up on before publishing
+    skips: int  # Items the consumer released unread, e.g. by `pop_latest`
+    fulls: int  # `Full` raised by the producer
+    empties: int  # `Empty` raised by the consumer
+    put_waits: int
+    put_wait_ns: int
+    get_waits: int
+    get_wait_ns: int
+    max_occupancy: int
+    put_wait_histogram: Tuple[int, ...]
+    get_wait_histogram: Tuple[int, ...]
+
+    @property
+    def occupancy(self) -> int:
+        return self.puts - self.gets
+
+    @property
+    def mean_put_wait_ns(self) -> float:
+        return self.put_wait_ns / self.put_waits if self.put_waits else 0.0
+
+    @property
+    def mean_get_wait_ns(self) -> float:
+        return self.get_wait_ns / self.get_waits if self.get_waits else 0.0
+
+
+def wait_percentile(histogram: Tuple[int, ...], percent: float) -> Optional[int]:
+    """
+    Upper bound in nanoseconds of the bucket holding the given percentile.
+    """
+    assert 0 <= percent <= 100
+    total = sum(histogram)
+    if total == 0:
+        return None
+    threshold = total * percent / 100
+    accumulated = 0
+    for bucket, count in enumerate(histogram):
+        accumulated += count
+        if count and accumulated >= threshold:
+            return 2**bucket
+    assert False, "Inaccessible section"
+
+
+class SpscTelemetry:
+    """
+    Queue counters and wait histograms in shared memory.
+
+    Every counter has a single writer: the producer updates the put side and the
+    consumer the get side, so no lock is taken. Any process holding the queue,
+    such as the parent of both ends, can take a `snapshot()` at any time.
+    """
+
+    _counters: Any
+    _put_histogram: Any
+    _get_histogram: Any
+
+    def __init__(self):
+        self._counters = RawArray(c_uint64, SPSC_COUNTERS)
+        self._put_histogram = RawArray(c_uint64, SPSC_WAIT_BUCKETS)
+        self._get_histogram = RawArray(c_uint64, SPSC_WAIT_BUCKETS)
+
+    def count_put(self, count=1) -> None:
+        counters = self._counters
+        puts = counters[SPSC_PUTS] + count
+        counters[SPSC_PUTS] = puts
+        occupancy = puts - counters[SPSC_GETS]
+        if occupancy > counters[SPSC_MAX_OCCUPANCY]:
+            counters[SPSC_MAX_OCCUPANCY] = occupancy
+
+    def count_get(self, count=1) -> None:
+        self._counters[SPSC_GETS] += count
+
+    def count_drop(self, count=1) -> None:
+        self._counters[SPSC_DROPS] += count
+
+    def count_skip(self, count=1) -> None:
+        self._counters[SPSC_SKIPS] += count
+
+    def count_full(self) -> None:
+        self._counters[SPSC_FULLS] += 1
+
+    def count_empty(self) -> None:
+        self._counters[SPSC_EMPTIES] += 1
+
+    def add_put_wait(self, nanoseconds: int) -> None:
+        self._counters[SPSC_PUT_WAITS] += 1
+        self._counters[SPSC_PUT_WAIT_NS] += nanoseconds
+        self._put_histogram[wait_bucket(nanoseconds)] += 1
+
+    def add_get_wait(self, nanoseconds: int) -> None:
+        self._counters[SPSC_GET_WAITS] += 1
+        self._counters[SPSC_GET_WAIT_NS] += nanoseconds
+        self._get_histogram[wait_bucket(nanoseconds)] += 1
+
+    def snapshot(self) -> SpscStats:
+        counters = self._counters[:]
+        return SpscStats(
+            puts=counters[SPSC_PUTS],
+            gets=counters[SPSC_GETS],
+            drops=counters[SPSC_DROPS],
+            skips=counters[SPSC_SKIPS],
+            fulls=counters[SPSC_FULLS],
+            empties=counters[SPSC_EMPTIES],
+            put_waits=counters[SPSC_PUT_WAITS],
+            put_wait_ns=counters[SPSC_PUT_WAIT_NS],
+            get_waits=counters[SPSC_GET_WAITS],
+            get_wait_ns=counters[SPSC_GET_WAIT_NS],
+            max_occupancy=counters[SPSC_MAX_OCCUPANCY],
+            put_wait_histogram=tuple(self._put_histogram[:]),
+            get_wait_histogram=tuple(self._get_histogram[:]),
+        )
@@ -2,14 +2,20 @@
 
 import numpy as np
 
-__version__ = "1.0.0"
+from ffstreamer.logging.logging import get_module_logger
+from ffstreamer.np.planes import PIXEL_FORMAT_BGR24, PLANE_PIXEL_FORMATS, frame_shape
+
+__version__ = "1.1.0"
 __doc__ = "bytes to ndarray converter"
 
+logger = get_module_logger(__name__)
+
 
 class Context:
     width: int
     height: int
     channels: int
+    pixel_format: str
 
     def open(self, *args, **kwargs) -> None:
         assert args is not None
@@ -17,12 +23,22 @@ class Context:
         self.width = kwargs["width"]
         self.height = kwargs["height"]
         self.channels = kwargs["channels"]
-        print(self.height, self.width, self.channels)
+        self.pixel_format = kwargs.get("pixel_format", PIXEL_FORMAT_BGR24)
+        logger.debug(
+            f"Frame size is {self.width}x{self.height}x{self.channels}"
+            f" ({self.pixel_format})"
+        )
 
     def frame(self, data: bytes) -> np.ndarray:
-        return np.frombuffer(data, dtype=np.uint8).reshape(
-            [self.height, self.width, self.channels]
-        )
+        """
+        yuv420p and nv12 frames are `(height * 3 / 2, width)` arrays whose first
+        `height` rows are the luma plane.
+        """
+        if self.pixel_format in PLANE_PIXEL_FORMATS:
+            shape = frame_shape(self.width, self.height, self.pixel_format)
+        else:
+            shape = (self.height, self.width, self.channels)
+        return np.frombuffer(data, dtype=np.uint8).reshape(shape)
 
 
 context = Context()
@@ -1,10 +1,53 @@
 # -*- coding: utf-8 -*-
 
+from typing import Optional
+
 import numpy as np
 
-__version__ = "1.0.0"
+from ffstreamer.np.planes import (
+    PIXEL_FORMAT_BGR24,
+    PIXEL_FORMAT_NV12,
+    PIXEL_FORMAT_YUV420P,
+)
+
+__version__ = "1.2.0"
 __doc__ = "Grayscale converter"
 
 
+class Context:
+    luma_size: Optional[int] = None
+
+    def open(self, *args, **kwargs) -> None:
+        assert args is not None
+        assert kwargs is not None
+        pixel_format = kwargs.get("pixel_format", PIXEL_FORMAT_BGR24)
+        if pixel_format in (PIXEL_FORMAT_YUV420P, PIXEL_FORMAT_NV12):
+            self.luma_size = kwargs["width"] * kwargs["height"]
+
+    def frame(self, data: np.ndarray) -> np.ndarray:
+        if data.ndim == 3:
+            mean = data.mean(axis=-1)
+            return np.stack((mean,) * 3, axis=-1).astype(dtype=np.uint8)
+
+        # yuv420p or nv12 from `bytes2numpy`; the luma is kept as it is.
+        if self.luma_size is not None:
+            luma_size = self.luma_size
+        elif data.ndim == 2:
+            luma_size = data.shape[0] * 2 // 3 * data.shape[1]
+        else:
+            raise ValueError("The luma size of a flat frame is unknown")
+
+        result = data.copy()
+        result.reshape(-1)[luma_size:] = 128
+        return result
+
+
+context = Context()
+
+
+def on_open(*args, **kwargs) -> None:
+    context.open(*args, **kwargs)
+
+
 def on_frame(data: np.ndarray) -> np.ndarray:
-    return np.stack((data.mean(axis=-1),) * 3, axis=-1).astype(dtype=np.uint8)
+    return context.frame(data)
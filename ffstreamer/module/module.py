@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 
 from types import ModuleType
-from typing import Any, List, Union
+from typing import Any, Dict, List, Union
 
 from ffstreamer.module.mixin.module_doc import ModuleDoc
 from ffstreamer.module.mixin.module_frame import ModuleFrame
@@ -22,9 +22,28 @@ class Module(
             self._module = self.import_module(module, isolate=isolate)
         else:
             self._module = module
+        self._isolate = isolate
         self._args = args
         self._kwargs = kwargs
 
+    def __getstate__(self) -> Dict[str, Any]:
+        # Modules are pickled by their constructor arguments and rebuilt on the
+        # other side, so the module is imported again by name.
+        return dict(
+            module=self.module_name,
+            isolate=self._isolate,
+            args=self._args,
+            kwargs=self._kwargs,
+        )
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(  # type: ignore[misc]
+            state["module"],
+            state["isolate"],
+            *state["args"],
+            **state["kwargs"],
+        )
+
     async def open(self) -> None:
         if not self.has_on_open:
             return
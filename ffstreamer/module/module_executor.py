@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+
+from asyncio import get_running_loop
+from asyncio import run as asyncio_run
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from inspect import iscoroutinefunction
+from multiprocessing.shared_memory import SharedMemory
+from multiprocessing.util import Finalize
+from typing import Any, Dict, Final, NamedTuple, Optional, Sequence, Tuple
+
+from numpy import ascontiguousarray, copyto, dtype, ndarray, uint8
+from numpy.typing import NDArray
+
+from ffstreamer.memory.shared_memory_queue import SharedMemoryQueue
+from ffstreamer.memory.shared_memory_reader import SharedMemoryReader
+from ffstreamer.module.errors import ModuleCallbackCoroutineError
+from ffstreamer.module.module import Module
+from ffstreamer.module.variables import NAME_ON_FRAME
+from ffstreamer.np.buffer import as_byte_array
+
+EXECUTOR_INLINE: Final[str] = "inline"
+EXECUTOR_THREAD: Final[str] = "thread"
+EXECUTOR_PROCESS: Final[str] = "process"
+EXECUTORS: Final[Sequence[str]] = (EXECUTOR_INLINE, EXECUTOR_THREAD, EXECUTOR_PROCESS)
+DEFAULT_EXECUTOR: Final[str] = EXECUTOR_INLINE
+DEFAULT_EXECUTOR_WORKERS: Final[int] = 2
+
+EXECUTOR_OPTION_SEPARATOR: Final[str] = "="
+
+
+class SharedFrame(NamedTuple):
+    """
+    A frame placed in a shared memory segment.
+    """
+
+    sm_name: str
+    size: int
+    shape: Optional[Tuple[int, ...]]  # `None` for a flat byte buffer
+    dtype: str
+
+
+def parse_executor_options(options: Sequence[str]) -> Dict[str, str]:
+    """
+    Parse `NAME=MODE` options into a mapping of module names to execution modes.
+    """
+    result = dict()
+    for option in options:
+        name, separator, mode = option.rpartition(EXECUTOR_OPTION_SEPARATOR)
+        if not separator or not name:
+            raise ValueError(f"The executor option must be 'NAME=MODE': '{option}'")
+        if mode not in EXECUTORS:
+            raise ValueError(f"Unsupported executor: '{mode}'")
+        result[name] = mode
+    return result
+
+
+def _frame_source(data: Any) -> Tuple[NDArray[uint8], Optional[Tuple[int, ...]], str]:
+    """
+    Flat bytes of a frame with the shape and dtype to restore it.
+    """
+    if isinstance(data, ndarray):
+        array = ascontiguousarray(data)
+        return array.reshape(-1).view(uint8), array.shape, array.dtype.str
+    return as_byte_array(data), None, dtype(uint8).str
+
+
+def _segment_array(sm: SharedMemory, size: int) -> NDArray[uint8]:
+    assert sm.buf is not None
+    return ndarray((size,), dtype=uint8, buffer=sm.buf)
+
+
+def _frame_view(flat: NDArray[uint8], frame: SharedFrame) -> Any:
+    if frame.shape is None:
+        return flat.data
+    return flat.view(dtype(frame.dtype)).reshape(frame.shape)
+
+
+_worker_module: Optional[Module] = None
+_worker_reader: Optional[SharedMemoryReader] = None
+
+
+def _close_module_worker() -> None:
+    if _worker_reader is not None:
+        _worker_reader.clear()
+    if _worker_module is not None:
+        asyncio_run(_worker_module.close())
+
+
+def _init_module_worker(module: Module) -> None:
+    global _worker_module, _worker_reader
+    asyncio_run(module.open())
+    _worker_module = module
+    _worker_reader = SharedMemoryReader(untrack=False)
+    Finalize(None, _close_module_worker, exitpriority=10)
+
+
+def _run_module_worker(source: SharedFrame, target_name: str, target_size: int) -> Any:
+    """
+    Returns a `SharedFrame` in `target_name`, or the result itself if it does not
+    fit there or is not a buffer.
+    """
+    assert _worker_module is not None
+    assert _worker_reader is not None
+
+    flat = _worker_reader.read_ndarray(source.sm_name, (source.size,))
+    result = _worker_module.frame_sync(_frame_view(flat, source))
+    try:
+        array, shape, dtype_str = _frame_source(result)
+    except TypeError:
+        return result
+    if array.size > target_size:
+        return result
+
+    copyto(_worker_reader.read_ndarray(target_name, (array.size,)), array)
+    return SharedFrame(target_name, array.size, shape, dtype_str)
+
+
+class ModuleExecutor:
+    """
+    Runs the frames of one module on the event loop.
+    """
+
+    def __init__(self, module: Module):
+        self._module = module
+
+    @property
+    def module(self) -> Module:
+        return self._module
+
+    @property
+    def mode(self) -> str:
+        return EXECUTOR_INLINE
+
+    @property
+    def workers(self) -> int:
+        return 1
+
+    async def open(self) -> None:
+        await self._module.open()
+
+    async def close(self) -> None:
+        await self._module.close()
+
+    async def frame(self, data: Any) -> Any:
+        return await self._module.frame(data)
+
+
+class _PoolModuleExecutor(ModuleExecutor):
+    _executor: Optional[Executor]
+
+    def __init__(self, module: Module, workers=DEFAULT_EXECUTOR_WORKERS):
+        super().__init__(module)
+        if workers < 1:
+            raise ValueError("The number of workers must be at least 1")
+        if module.has_on_frame and iscoroutinefunction(module.get(NAME_ON_FRAME)):
+            raise ModuleCallbackCoroutineError(module.module_name, NAME_ON_FRAME)
+        self._workers = workers
+        self._executor = None
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    @property
+    def executor(self) -> Executor:
+        assert self._executor is not None
+        return self._executor
+
+    async def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+class ModuleThreadExecutor(_PoolModuleExecutor):
+    """
+    Runs `on_frame` in a thread pool; only useful for code that releases the GIL.
+    Up to `workers` frames are in the module at once.
+
+    The frame is not copied. From the `readinto` receiver it is a memoryview into
+    the ring of the reader, which a drop overflow policy lets the reader overwrite
+    while the module is still reading it. `PipeApp` drops such results as late,
+    but the module must not keep the view or anything derived from it.
+    """
+
+    @property
+    def mode(self) -> str:
+        return EXECUTOR_THREAD
+
+    async def open(self) -> None:
+        await self._module.open()
+        self._executor = ThreadPoolExecutor(self._workers)
+
+    async def close(self) -> None:
+        await super().close()
+        await self._module.close()
+
+    async def frame(self, data: Any) -> Any:
+        loop = get_running_loop()
+        return await loop.run_in_executor(self.executor, self._module.frame_sync, data)
+
+
+class ModuleProcessExecutor(_PoolModuleExecutor):
+    """
+    Runs `on_frame` in a process pool where every process opens its own copy of
+    the module, so module state is not shared between frames of other processes.
+
+    Frames go through pooled shared memory segments instead of being pickled.
+    A result that does not fit in the segment of its frame is pickled instead.
+    """
+
+    _segments: Optional[SharedMemoryQueue]
+
+    def __init__(self, module: Module, workers=DEFAULT_EXECUTOR_WORKERS):
+        super().__init__(module, workers)
+        self._segments = None
+
+    @property
+    def mode(self) -> str:
+        return EXECUTOR_PROCESS
+
+    async def open(self) -> None:
+        self._segments = SharedMemoryQueue()
+        self._executor = ProcessPoolExecutor(
+            self._workers,
+            initializer=_init_module_worker,
+            initargs=(self._module,),
+        )
+
+    async def close(self) -> None:
+        await super().close()
+        if self._segments is not None:
+            self._segments.clear()
+            self._segments = None
+
+    async def frame(self, data: Any) -> Any:
+        assert self._segments is not None
+        array, shape, dtype_str = _frame_source(data)
+        loop = get_running_loop()
+
+        with self._segments.rent(array.size) as source_sm:
+            with self._segments.rent(array.size) as target_sm:
+                copyto(_segment_array(source_sm, array.size), array)
+                source = SharedFrame(source_sm.name, array.size, shape, dtype_str)
+                result = await loop.run_in_executor(
+                    self.executor,
+                    _run_module_worker,
+                    source,
+                    target_sm.name,
+                    target_sm.size,
+                )
+                if not isinstance(result, SharedFrame):
+                    return result
+
+                # The segment goes back to the pool, so the result is copied out.
+                flat = _segment_array(target_sm, result.size)
+                if result.shape is None:
+                    return flat.tobytes()
+                return _frame_view(flat, result).copy()
+
+
+def create_module_executor(
+    module: Module,
+    mode=DEFAULT_EXECUTOR,
+    workers=DEFAULT_EXECUTOR_WORKERS,
+) -> ModuleExecutor:
+    if mode == EXECUTOR_INLINE:
+        return ModuleExecutor(module)
+    elif mode == EXECUTOR_THREAD:
+        return ModuleThreadExecutor(module, workers)
+    elif mode == EXECUTOR_PROCESS:
+        return ModuleProcessExecutor(module, workers)
+    else:
+        raise ValueError(f"Unsupported executor: '{mode}'")
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+
+from typing import Union
+
+from numpy import asarray, ascontiguousarray, frombuffer, ndarray, uint8
+from numpy.typing import NDArray
+
+BufferType = Union[bytes, bytearray, memoryview, ndarray]
+
+
+def as_byte_array(data: BufferType) -> NDArray[uint8]:
+    """
+    Flat uint8 view of any buffer-protocol object.
+    The data is only copied if it is not contiguous.
+    """
+    if not isinstance(data, ndarray):
+        view = memoryview(data)
+        if view.contiguous:
+            return frombuffer(view, dtype=uint8)
+        data = asarray(view)
+    return ascontiguousarray(data).reshape(-1).view(uint8)
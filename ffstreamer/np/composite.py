@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+from typing import Final, List, NamedTuple, Optional, Sequence, Tuple
+
+from numpy import (
+    add,
+    ascontiguousarray,
+    broadcast_to,
+    copyto,
+    count_nonzero,
+    empty,
+    multiply,
+    right_shift,
+    uint8,
+    uint16,
+)
+from numpy.typing import NDArray
+
+from ffstreamer.np.image import pixel_view
+from ffstreamer.np.tiles import Tile
+
+BLEND_BINARY: Final[str] = "binary"
+BLEND_ALPHA: Final[str] = "alpha"
+BLEND_MODES: Final[Sequence[str]] = BLEND_BINARY, BLEND_ALPHA
+DEFAULT_BLEND_MODE: Final[str] = BLEND_BINARY
+
+ALPHA_SHIFT: Final[int] = 8
+ALPHA_ROUNDING: Final[int] = 1 << (ALPHA_SHIFT - 1)
+
+
+def premultiply(bgra: NDArray[uint8]) -> Tuple[NDArray[uint16], NDArray[uint16]]:
+    """
+    Fixed-point blending factors of a BGRA image.
+
+    The alpha is rescaled from `[0, 255]` to `[0, 256]` so that the division
+    becomes a shift; the result is off by at most one from exact rounding.
+    """
+    alpha = bgra[:, :, -1:].astype(uint16)
+    alpha += alpha >> 7
+    premultiplied = bgra[:, :, :-1] * alpha
+    premultiplied += ALPHA_ROUNDING
+    inverse = ascontiguousarray(broadcast_to(256 - alpha, premultiplied.shape))
+    return premultiplied, inverse
+
+
+def blend_alpha(
+    image: NDArray[uint8],
+    premultiplied: NDArray[uint16],
+    inverse: NDArray[uint16],
+    out: NDArray[uint8],
+    scratch: NDArray[uint16],
+) -> NDArray[uint8]:
+    """
+    `out = (overlay * alpha + image * (256 - alpha)) >> 8`, without temporaries.
+    """
+    multiply(image, inverse, out=scratch)
+    add(scratch, premultiplied, out=scratch)
+    return right_shift(scratch, ALPHA_SHIFT, out=out, casting="unsafe")
+
+
+class _CopyRegion(NamedTuple):
+    region: Tuple[slice, slice]
+    pixels: NDArray
+    mask: Optional[NDArray]
+
+
+class _BlendRegion(NamedTuple):
+    region: Tuple[slice, slice]
+    premultiplied: NDArray[uint16]
+    inverse: NDArray[uint16]
+    scratch: NDArray[uint16]
+
+
+class OverlayCompositor:
+    """
+    Paste the covered pixels of a BGRA overlay onto BGR frames.
+
+    The overlay tiles are analysed once in `update_tiles()`; `composite()` then
+    writes the frame and the overlay into the output buffer without temporaries.
+
+    With `BLEND_BINARY`, any non-zero alpha is opaque. With `BLEND_ALPHA`,
+    regions with translucent pixels are alpha-blended instead.
+    """
+
+    _copies: List[_CopyRegion]
+    _blends: List[_BlendRegion]
+
+    def __init__(self, shape: Tuple[int, int, int], blend=DEFAULT_BLEND_MODE):
+        if blend not in BLEND_MODES:
+            raise ValueError(f"Unsupported blend mode: '{blend}'")
+
+        self._shape = shape
+        self._blend = blend
+        self.clear()
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return self._shape
+
+    @property
+    def blend(self) -> str:
+        return self._blend
+
+    @property
+    def coverage(self) -> int:
+        return self._coverage
+
+    @property
+    def empty(self) -> bool:
+        return self._coverage == 0
+
+    def clear(self) -> None:
+        self._coverage = 0
+        self._copies = list()
+        self._blends = list()
+
+    def is_translucent(self, alpha: NDArray[uint8], coverage: int) -> bool:
+        if self._blend != BLEND_ALPHA:
+            return False
+        return count_nonzero(alpha == 255) != coverage
+
+    def update_tiles(self, tiles: Sequence[Tile]) -> None:
+        """
+        Only the tiles are composited; the rest of the frame is left as is.
+        """
+        self.clear()
+        for rect, bgra in tiles:
+            alpha = bgra[:, :, -1]
+            mask = alpha != 0
+            coverage = int(count_nonzero(mask))
+            if coverage == 0:
+                continue
+
+            self._coverage += coverage
+            if self.is_translucent(alpha, coverage):
+                premultiplied, inverse = premultiply(bgra)
+                scratch = empty(premultiplied.shape, dtype=uint16)
+                region = _BlendRegion(rect.slices, premultiplied, inverse, scratch)
+                self._blends.append(region)
+            else:
+                pixels = pixel_view(ascontiguousarray(bgra[:, :, :-1]))
+                opaque = coverage == rect.area
+                self._copies.append(
+                    _CopyRegion(rect.slices, pixels, None if opaque else mask)
+                )
+
+    def composite(
+        self,
+        image: NDArray[uint8],
+        out: Optional[NDArray[uint8]] = None,
+    ) -> NDArray[uint8]:
+        """
+        `out` can be `image` itself to composite in place.
+        """
+        assert image.shape == self._shape
+        if out is None:
+            out = empty(self._shape, dtype=uint8)
+
+        if out is not image:
+            copyto(out, image)
+        if self._coverage == 0:
+            return out
+
+        pixels = pixel_view(out)
+        for region, tile, mask in self._copies:
+            if mask is None:
+                copyto(pixels[region], tile)
+            else:
+                copyto(pixels[region], tile, where=mask)
+        for region, premultiplied, inverse, scratch in self._blends:
+            target = out[region]
+            blend_alpha(target, premultiplied, inverse, target, scratch)
+        return out
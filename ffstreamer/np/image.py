@@ -2,7 +2,7 @@
 
 from typing import Tuple
 
-from numpy import ndarray, uint8
+from numpy import dtype, ndarray, uint8, void
 from numpy.typing import NDArray
 
 
@@ -12,3 +12,13 @@ def make_image_with_shape(shape: Tuple[int, int, int], data: bytes) -> NDArray[u
 
 def make_image(width: int, height: int, channels: int, data: bytes) -> NDArray[uint8]:
     return make_image_with_shape((height, width, channels), data)
+
+
+def pixel_view(image: NDArray[uint8]) -> NDArray:
+    """
+    View an `(H, W, C)` image as `(H, W)` pixels of a single `C`-byte void type,
+    so that a 2D mask selects whole pixels without broadcasting.
+    """
+    assert image.dtype == uint8
+    assert image.flags.c_contiguous
+    return image.view(dtype((void, image.shape[-1])))[..., 0]
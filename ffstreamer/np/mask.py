@@ -1,11 +1,14 @@
 # -*- coding: utf-8 -*-
 
-from typing import Final, Tuple
+from typing import Final, Optional, Tuple
 
+from numpy import array, ascontiguousarray
 from numpy import bool_ as np_bool
-from numpy import concatenate, uint8, where
+from numpy import copyto, empty, may_share_memory, multiply, uint8
 from numpy.typing import NDArray
 
+from ffstreamer.np.image import pixel_view
+
 BLACK_COLOR: Final[Tuple[int, int, int]] = (0, 0, 0)
 DEFAULT_CHROMA_COLOR: Final[Tuple[int, int, int]] = BLACK_COLOR
 CHANNEL_MIN: Final[int] = 0
@@ -15,14 +18,26 @@ CHANNEL_MAX: Final[int] = 255
 def generate_mask(
     image: NDArray[uint8],
     chroma_color=DEFAULT_CHROMA_COLOR,
+    out: Optional[NDArray[uint8]] = None,
 ) -> NDArray[uint8]:
+    """
+    Pixels are compared as single 3-byte values, in one pass over the image.
+
+    `out` can be the alpha channel of a BGRA buffer, e.g. `bgra[:, :, 3:]`.
+    """
     assert image.dtype == uint8
     assert len(image.shape) == 3
     assert image.shape[-1] == 3
 
-    channels_cmp: NDArray[np_bool] = image == chroma_color
-    pixel_cmp: NDArray[np_bool] = channels_cmp.all(axis=-1, keepdims=True)
-    return where(pixel_cmp, CHANNEL_MIN, CHANNEL_MAX).astype(uint8)
+    if out is None:
+        out = empty((image.shape[0], image.shape[1], 1), dtype=uint8)
+    assert out.dtype == uint8
+    assert out.shape == (image.shape[0], image.shape[1], 1)
+
+    key = pixel_view(array(chroma_color, dtype=uint8)[None, None, :])
+    differs = pixel_view(ascontiguousarray(image)) != key
+    multiply(differs, uint8(CHANNEL_MAX), out=out[:, :, 0])
+    return out
 
 
 def split_mask_on_off(mask: NDArray[uint8]) -> Tuple[NDArray[uint8], NDArray[uint8]]:
@@ -44,7 +59,14 @@ def split_mask_on_off(mask: NDArray[uint8]) -> Tuple[NDArray[uint8], NDArray[uin
     return mask_on, mask_off  # type: ignore[return-value]
 
 
-def merge_to_bgra32(image: NDArray[uint8], mask: NDArray[uint8]) -> NDArray[uint8]:
+def merge_to_bgra32(
+    image: NDArray[uint8],
+    mask: NDArray[uint8],
+    out: Optional[NDArray[uint8]] = None,
+) -> NDArray[uint8]:
+    """
+    If the mask was generated into `out[:, :, 3:]`, only the image is copied.
+    """
     assert image.dtype == uint8
     assert len(image.shape) == 3
     assert image.shape[-1] == 3
@@ -53,4 +75,9 @@ def merge_to_bgra32(image: NDArray[uint8], mask: NDArray[uint8]) -> NDArray[uint
     assert len(mask.shape) == 3
     assert mask.shape[-1] == 1
 
-    return concatenate((image, mask), axis=-1)
+    if out is None:
+        out = empty((image.shape[0], image.shape[1], 4), dtype=uint8)
+    copyto(out[:, :, :3], image)
+    if not may_share_memory(out, mask):
+        copyto(out[:, :, 3:], mask)
+    return out
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+from math import prod
+from typing import Dict, Final, List, Sequence, Tuple
+
+from numpy import uint8
+from numpy.typing import NDArray
+
+from ffstreamer.np.buffer import BufferType, as_byte_array
+
+PIXEL_FORMAT_BGR24: Final[str] = "bgr24"
+PIXEL_FORMAT_YUV420P: Final[str] = "yuv420p"
+PIXEL_FORMAT_NV12: Final[str] = "nv12"
+
+PlaneShape = Tuple[int, ...]
+
+_PLANE_LAYOUTS: Final[Dict[str, Sequence[Tuple[int, int, int]]]] = {
+    # (width divisor, height divisor, bytes per sample)
+    PIXEL_FORMAT_BGR24: ((1, 1, 3),),
+    PIXEL_FORMAT_YUV420P: ((1, 1, 1), (2, 2, 1), (2, 2, 1)),
+    PIXEL_FORMAT_NV12: ((1, 1, 1), (2, 2, 2)),
+}
+
+PLANE_PIXEL_FORMATS: Final[Sequence[str]] = tuple(_PLANE_LAYOUTS.keys())
+
+
+def plane_shapes(width: int, height: int, pixel_format: str) -> List[PlaneShape]:
+    """
+    Shape of each plane as packed in a frame buffer, without line padding.
+    Subsampled planes round their size up, as FFmpeg does.
+    """
+    try:
+        layout = _PLANE_LAYOUTS[pixel_format]
+    except KeyError:
+        raise ValueError(f"Unsupported pixel format: '{pixel_format}'")
+
+    result: List[PlaneShape] = list()
+    for x_div, y_div, channels in layout:
+        plane_height = (height + y_div - 1) // y_div
+        plane_width = (width + x_div - 1) // x_div
+        if channels == 1:
+            result.append((plane_height, plane_width))
+        else:
+            result.append((plane_height, plane_width, channels))
+    return result
+
+
+def plane_sizes(width: int, height: int, pixel_format: str) -> List[int]:
+    return [prod(shape) for shape in plane_shapes(width, height, pixel_format)]
+
+
+def frame_size(width: int, height: int, pixel_format: str) -> int:
+    return sum(plane_sizes(width, height, pixel_format))
+
+
+def frame_shape(width: int, height: int, pixel_format: str) -> PlaneShape:
+    """
+    Shape of a whole frame buffer as one array.
+
+    Single-plane formats keep their plane shape. Other formats stack their planes
+    as rows of `width` bytes, the I420/NV12 layout that OpenCV expects, where the
+    luma plane is the first `height` rows; if the planes do not line up, as with
+    odd sizes, the frame stays flat.
+    """
+    shapes = plane_shapes(width, height, pixel_format)
+    if len(shapes) == 1:
+        return shapes[0]
+    size = sum(prod(shape) for shape in shapes)
+    if size % width == 0:
+        return size // width, width
+    return (size,)
+
+
+def split_planes(
+    data: BufferType,
+    width: int,
+    height: int,
+    pixel_format: str,
+) -> List[NDArray[uint8]]:
+    """
+    Views of each plane of a packed frame buffer; nothing is copied.
+    """
+    buffer = as_byte_array(data)
+    shapes = plane_shapes(width, height, pixel_format)
+    total = sum(prod(shape) for shape in shapes)
+    if buffer.size < total:
+        raise ValueError(f"Buffer is too small: {buffer.size} < {total}")
+
+    result = list()
+    offset = 0
+    for shape in shapes:
+        size = prod(shape)
+        result.append(buffer[offset : offset + size].reshape(shape))
+        offset += size
+    return result
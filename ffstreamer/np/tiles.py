@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+from typing import Dict, Final, List, NamedTuple, Tuple
+
+from numpy import (
+    arange,
+    array,
+    diff,
+    empty,
+    flatnonzero,
+    int8,
+    logical_or,
+    uint8,
+    uint32,
+)
+from numpy.typing import NDArray
+
+from ffstreamer.np.buffer import BufferType, as_byte_array
+
+DEFAULT_TILE_SIZE: Final[int] = 64
+TILE_CHANNELS: Final[int] = 4
+TILES_WORD_SIZE: Final[int] = uint32().itemsize
+RECT_WORDS: Final[int] = 4
+
+Tile = Tuple["Rect", NDArray[uint8]]
+
+
+class Rect(NamedTuple):
+    x: int
+    y: int
+    width: int
+    height: int
+
+    @property
+    def area(self) -> int:
+        return self.width * self.height
+
+    @property
+    def slices(self) -> Tuple[slice, slice]:
+        return slice(self.y, self.y + self.height), slice(self.x, self.x + self.width)
+
+
+def tiles_header_size(count: int) -> int:
+    return TILES_WORD_SIZE * (1 + RECT_WORDS * count)
+
+
+def tiles_capacity(
+    width: int,
+    height: int,
+    tile_size=DEFAULT_TILE_SIZE,
+) -> int:
+    """
+    The largest encoded size: every grid cell dirty, as separate rectangles.
+    """
+    columns = (width + tile_size - 1) // tile_size
+    rows = (height + tile_size - 1) // tile_size
+    return tiles_header_size(columns * rows) + width * height * TILE_CHANNELS
+
+
+def find_dirty_rects(mask: NDArray, tile_size=DEFAULT_TILE_SIZE) -> List[Rect]:
+    """
+    Bounding rectangles of the non-zero pixels of a 2D mask.
+
+    Dirty grid cells are merged into horizontal runs, runs with the same
+    columns in consecutive rows of cells are merged vertically, and each
+    rectangle is then shrunk to the pixels it actually covers.
+    """
+    assert len(mask.shape) == 2
+    height, width = mask.shape
+
+    rows = logical_or.reduceat(mask, arange(0, height, tile_size), axis=0)
+    grid = logical_or.reduceat(rows, arange(0, width, tile_size), axis=1)
+
+    spans: List[List[int]] = list()  # [x0, y0, x1, y1]
+    previous: Dict[Tuple[int, int], int] = dict()
+    for row in range(grid.shape[0]):
+        current: Dict[Tuple[int, int], int] = dict()
+        if grid[row].any():
+            edges = diff(grid[row].astype(int8), prepend=0, append=0)
+            y0 = row * tile_size
+            y1 = min(y0 + tile_size, height)
+            for begin, end in zip(flatnonzero(edges == 1), flatnonzero(edges == -1)):
+                x0 = int(begin) * tile_size
+                x1 = min(int(end) * tile_size, width)
+                key = x0, x1
+                if key in previous:
+                    index = previous[key]
+                    spans[index][3] = y1
+                else:
+                    index = len(spans)
+                    spans.append([x0, y0, x1, y1])
+                current[key] = index
+        previous = current
+
+    result = list()
+    for x0, y0, x1, y1 in spans:
+        region = mask[y0:y1, x0:x1]
+        ys = flatnonzero(region.any(axis=1))
+        xs = flatnonzero(region.any(axis=0))
+        left, right = int(xs[0]), int(xs[-1]) + 1
+        top, bottom = int(ys[0]), int(ys[-1]) + 1
+        result.append(Rect(x0 + left, y0 + top, right - left, bottom - top))
+    return result
+
+
+def encode_tiles(
+    image: NDArray[uint8],
+    mask: NDArray[uint8],
+    tile_size=DEFAULT_TILE_SIZE,
+) -> NDArray[uint8]:
+    """
+    Encode the covered parts of a BGR image and its `(H, W, 1)` mask as
+    `[count][x, y, width, height] * count` in uint32 words,
+    followed by one row-major BGRA tile per rectangle.
+    """
+    assert image.dtype == uint8
+    assert mask.dtype == uint8
+    assert image.shape[:2] == mask.shape[:2]
+    assert image.shape[-1] == TILE_CHANNELS - 1
+    assert mask.shape[-1] == 1
+
+    rects = find_dirty_rects(mask[:, :, 0] != 0, tile_size)
+    header_size = tiles_header_size(len(rects))
+    size = header_size + sum(rect.area for rect in rects) * TILE_CHANNELS
+
+    result = empty(size, dtype=uint8)
+    header = result[:header_size].view(uint32)
+    header[0] = len(rects)
+    if rects:
+        header[1:] = array(rects, dtype=uint32).reshape(-1)
+
+    offset = header_size
+    for rect in rects:
+        end = offset + rect.area * TILE_CHANNELS
+        tile = result[offset:end].reshape(rect.height, rect.width, TILE_CHANNELS)
+        tile[:, :, :-1] = image[rect.slices]
+        tile[:, :, -1:] = mask[rect.slices]
+        offset = end
+    return result
+
+
+def decode_tiles(data: BufferType) -> List[Tile]:
+    """
+    The tiles are views into `data`; copy them before the buffer is reused.
+    """
+    buffer = as_byte_array(data)
+    count = int(buffer[:TILES_WORD_SIZE].view(uint32)[0])
+    header_size = tiles_header_size(count)
+    words = buffer[TILES_WORD_SIZE:header_size].view(uint32).reshape(-1, RECT_WORDS)
+
+    result = list()
+    offset = header_size
+    for x, y, width, height in words.tolist():
+        rect = Rect(x, y, width, height)
+        end = offset + rect.area * TILE_CHANNELS
+        tile = buffer[offset:end].reshape(height, width, TILE_CHANNELS)
+        result.append((rect, tile))
+        offset = end
+    return result
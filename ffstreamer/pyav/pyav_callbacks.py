@@ -12,6 +12,12 @@ OnImageResult = Union[ImageArray, Iterable[ImageArray]]
 
 
 class PyavCallbacksInterface(metaclass=ABCMeta):
+    async def on_open(self) -> None:
+        pass
+
+    async def on_close(self) -> None:
+        pass
+
     @abstractmethod
     async def on_image(self, image: ndarray) -> OnImageResult:
         raise NotImplementedError
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+from math import prod
+from typing import Final, List
+
+from av import VideoFrame  # noqa
+from numpy import copyto, frombuffer, uint8
+from numpy.typing import NDArray
+
+from ffstreamer.np.buffer import BufferType
+from ffstreamer.np.planes import PIXEL_FORMAT_BGR24, plane_shapes, split_planes
+
+DEFAULT_FRAME_POOL_SIZE: Final[int] = 4
+
+
+class PyavFramePool:
+    """
+    Preallocated VideoFrames, handed out in turn.
+
+    A frame that the encoder still references is copied by `make_writable()`
+    before it is reused, so a small pool is always safe.
+    """
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        pixel_format=PIXEL_FORMAT_BGR24,
+        size=DEFAULT_FRAME_POOL_SIZE,
+    ):
+        if size < 1:
+            raise ValueError("The pool size must be at least 1")
+
+        self._width = width
+        self._height = height
+        self._pixel_format = pixel_format
+        self._shapes = plane_shapes(width, height, pixel_format)
+        self._frames = [VideoFrame(width, height, pixel_format) for _ in range(size)]
+        self._index = 0
+
+    @property
+    def width(self) -> int:
+        return self._width
+
+    @property
+    def height(self) -> int:
+        return self._height
+
+    @property
+    def pixel_format(self) -> str:
+        return self._pixel_format
+
+    @property
+    def size(self) -> int:
+        return len(self._frames)
+
+    def acquire(self) -> VideoFrame:
+        frame = self._frames[self._index]
+        self._index = (self._index + 1) % len(self._frames)
+        frame.make_writable()
+        return frame
+
+    def plane_views(self, frame: VideoFrame) -> List[NDArray[uint8]]:
+        """
+        Views of the frame planes without their line padding.
+        """
+        result = list()
+        for plane, shape in zip(frame.planes, self._shapes):
+            rows = shape[0]
+            line = frombuffer(memoryview(plane), dtype=uint8)[: rows * plane.line_size]
+            view = line.reshape(rows, plane.line_size)[:, : prod(shape[1:])]
+            result.append(view.reshape(shape))
+        return result
+
+    def fill(self, data: BufferType) -> VideoFrame:
+        frame = self.acquire()
+        sources = split_planes(data, self._width, self._height, self._pixel_format)
+        for destination, source in zip(self.plane_views(frame), sources):
+            copyto(destination, source)
+        return frame
@@ -1,23 +1,62 @@
 # -*- coding: utf-8 -*-
 
-from asyncio import AbstractEventLoop, get_running_loop, run_coroutine_threadsafe
-from concurrent.futures.thread import ThreadPoolExecutor
-from typing import Optional, Tuple
+from asyncio import (
+    FIRST_COMPLETED,
+    Task,
+    create_task,
+    get_running_loop,
+    sleep,
+    wait,
+)
+from collections import deque
+from functools import partial
+from queue import Empty, Full
+from typing import Deque, Dict, Final, List, NamedTuple, Optional, Set, Tuple
 
-from numpy import ndarray, uint8
+from numpy import uint8
 from numpy.typing import NDArray
 
-from ffstreamer.memory.spsc_queue import SpscQueue
-from ffstreamer.np.mask import DEFAULT_CHROMA_COLOR, generate_mask, merge_to_bgra32
+from ffstreamer.logging.logging import logger
+from ffstreamer.memory.latency_stats import LatencyStats, LatencyTelemetry
+from ffstreamer.memory.spsc_header import SpscMeta
+from ffstreamer.memory.spsc_queue import DEFAULT_SPSC_TRANSPORT, SpscLease, SpscQueue
+from ffstreamer.memory.spsc_stats import SpscStats, wait_percentile
+from ffstreamer.np.buffer import BufferType
+from ffstreamer.np.composite import BLEND_MODES, DEFAULT_BLEND_MODE
+from ffstreamer.np.mask import DEFAULT_CHROMA_COLOR
+from ffstreamer.np.tiles import tiles_capacity
 from ffstreamer.pyav.pyav_callbacks import (
     OnImageResult,
     PyavCallbacks,
     PyavCallbacksInterface,
 )
+from ffstreamer.pyav.pyav_overlay import PyavOverlayBuilder
 from ffstreamer.pyav.pyav_receiver import create_pyav_receiver_process
-from ffstreamer.pyav.pyav_router import create_pyav_router_process
+from ffstreamer.pyav.pyav_router import (
+    DEFAULT_DISPATCH_POLICY,
+    create_pyav_router_process,
+)
 from ffstreamer.pyav.pyav_sender import create_pyav_sender_process
+from ffstreamer.pyav.pyav_worker import create_pyav_worker_process
 from ffstreamer.sync.event import create_event
+from ffstreamer.sync.overflow import (
+    DEFAULT_OVERFLOW_POLICY,
+    OVERFLOW_BLOCK,
+    OVERFLOW_DROP_NEWEST,
+    OVERFLOW_DROP_OLDEST,
+    OVERFLOW_POLICIES,
+)
+
+DROPPED_OVERLAY: Final[bytes] = bytes()
+"""
+An empty overlay tells the router that the frame was dropped without a result.
+"""
+
+
+class _InFlight(NamedTuple):
+    meta: SpscMeta
+    lease: Optional[SpscLease] = None  # `None` once the frame is dropped
+    task: Optional["Task[NDArray[uint8]]"] = None
 
 
 class ProcessNotAlive(RuntimeError):
@@ -26,6 +65,10 @@ class ProcessNotAlive(RuntimeError):
 
 
 class PyavManager:
+    _in_flight: Deque[_InFlight]
+    _abandoned: Set["Task[NDArray[uint8]]"]
+    _lease_task: Optional["Task[SpscLease]"]
+
     def __init__(
         self,
         source: str,
@@ -38,33 +81,77 @@ class PyavManager:
         synchronize=False,
         *,
         queue_size=8,
+        transport=DEFAULT_SPSC_TRANSPORT,
         join_timeout=8.0,
+        get_timeout=1.0,
         callbacks: Optional[PyavCallbacksInterface] = None,
         start_index=0,
+        workers=0,
+        worker_queue_size=1,
+        dispatch=DEFAULT_DISPATCH_POLICY,
+        max_in_flight=1,
+        overflow=DEFAULT_OVERFLOW_POLICY,
+        blend=DEFAULT_BLEND_MODE,
     ):
+        """
+        With `workers=0` the callbacks run on the event loop of the caller, at
+        most `max_in_flight` frames at once; `overflow` decides what happens to
+        a frame that arrives while the window is full. Otherwise the callbacks
+        are pickled into `workers` processes, each fed through its own
+        improc/overlay queues.
+
+        `blend` selects how the router applies the mask of the overlays:
+        as a binary mask, or as 8-bit alpha.
+        """
         if channels != 3:
             raise ValueError("Only 3 channels are supported")
+        if workers < 0:
+            raise ValueError("The number of workers must not be negative")
+        if max_in_flight < 1:
+            raise ValueError("The in-flight window must be at least 1")
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unsupported overflow policy: '{overflow}'")
+        if blend not in BLEND_MODES:
+            raise ValueError(f"Unsupported blend mode: '{blend}'")
 
         self._callbacks = callbacks if callbacks else PyavCallbacks()
         self._join_timeout = join_timeout
+        self._get_timeout = get_timeout
         self._chroma_color = chroma_color
         self._shape = height, width, channels
         self._mask_shape = height, width, 1
         self._index = start_index
+        self._builder = PyavOverlayBuilder(self._shape, chroma_color)
+        self._max_in_flight = max_in_flight
+        self._overflow = overflow
+        self._in_flight = deque()
+        self._abandoned = set()
+        self._lease_task = None
+        self._dropped_newest = 0
+        self._dropped_oldest = 0
 
         item_size = height * width * channels
-        overlay_item_size = height * width * 4
-        self._receiver = SpscQueue(queue_size, item_size)
-        self._improc = SpscQueue(1, item_size)
-        self._overlay = SpscQueue(1, overlay_item_size)
-        self._sender = SpscQueue(queue_size, item_size)
+        overlay_item_size = tiles_capacity(width, height, self._builder.tile_size)
+        lanes = max(workers, 1)
+        if workers:
+            improc_size = worker_queue_size
+        elif overflow == OVERFLOW_BLOCK:
+            improc_size = max_in_flight
+        else:
+            # One more slot lets the router hand over the frame that overflows.
+            improc_size = max_in_flight + 1
+        self._receiver = SpscQueue(queue_size, item_size, transport)
+        self._improcs = [SpscQueue(improc_size, item_size) for _ in range(lanes)]
+        self._overlays = [
+            SpscQueue(improc_size, overlay_item_size) for _ in range(lanes)
+        ]
+        self._sender = SpscQueue(queue_size, item_size, transport)
+        self._latency = LatencyTelemetry()
 
         receiver_producer = self._receiver.producer
         receiver_consumer = self._receiver.consumer
-        improc_producer = self._improc.producer
-        # improc_consumer = self._improc.consumer
-        # overlay_producer = self._overlay.producer
-        overlay_consumer = self._overlay.consumer
+        improc_producers = [improc.producer for improc in self._improcs]
+        overlay_consumers = [overlay.consumer for overlay in self._overlays]
         sender_producer = self._sender.producer
         sender_consumer = self._sender.consumer
 
@@ -81,11 +168,13 @@ class PyavManager:
         self._router_process = create_pyav_router_process(
             shape=(height, width, channels),
             receiver_consumer=receiver_consumer,
-            improc_producer=improc_producer,
-            overlay_consumer=overlay_consumer,
+            improc_producers=improc_producers,
+            overlay_consumers=overlay_consumers,
             sender_producer=sender_producer,
             done=self._router_done,
             synchronize=synchronize,
+            dispatch=dispatch,
+            blend=blend,
         )
         self._sender_process = create_pyav_sender_process(
             destination=destination,
@@ -93,22 +182,91 @@ class PyavManager:
             shape=(height, width, channels),
             sender_consumer=sender_consumer,
             done=self._sender_done,
+            latency=self._latency,
         )
+        self._worker_processes = [
+            create_pyav_worker_process(
+                shape=(height, width, channels),
+                callbacks=self._callbacks,
+                improc_consumer=self._improcs[i].consumer,
+                overlay_producer=self._overlays[i].producer,
+                done=self._manager_done,
+                chroma_color=chroma_color,
+            )
+            for i in range(workers)
+        ]
+
+    @property
+    def workers(self) -> int:
+        return len(self._worker_processes)
 
     @property
     def improc_consumer(self):
-        return self._improc.consumer
+        return self._improcs[0].consumer
 
     @property
     def overlay_producer(self):
-        return self._overlay.producer
+        return self._overlays[0].producer
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    @property
+    def dropped_newest(self) -> int:
+        return self._dropped_newest
+
+    @property
+    def dropped_oldest(self) -> int:
+        return self._dropped_oldest
+
+    def stats(self) -> Dict[str, SpscStats]:
+        return {
+            "receiver": self._receiver.stats(),
+            **{f"improc{i}": q.stats() for i, q in enumerate(self._improcs)},
+            **{f"overlay{i}": q.stats() for i, q in enumerate(self._overlays)},
+            "sender": self._sender.stats(),
+        }
+
+    def latency(self) -> LatencyStats:
+        """
+        Time from the capture of each frame until it is handed to the muxer.
+        """
+        return self._latency.snapshot()
+
+    def log_stats(self) -> None:
+        logger.info(
+            f"Callbacks: dropped_newest={self._dropped_newest}"
+            f" dropped_oldest={self._dropped_oldest}"
+        )
+        latency = self.latency()
+        p50 = wait_percentile(latency.histogram, 50)
+        p99 = wait_percentile(latency.histogram, 99)
+        logger.info(
+            f"Latency: frames={latency.frames} mean={latency.mean_ns / 1e6:.1f}ms"
+            f" max={latency.max_ns / 1e6:.1f}ms p50<{p50}ns p99<{p99}ns"
+        )
+        for name, stats in self.stats().items():
+            put_p99 = wait_percentile(stats.put_wait_histogram, 99)
+            get_p99 = wait_percentile(stats.get_wait_histogram, 99)
+            logger.info(
+                f"Queue '{name}': puts={stats.puts} gets={stats.gets}"
+                f" drops={stats.drops} skips={stats.skips}"
+                f" max_occupancy={stats.max_occupancy}"
+                f" put_wait_p99<{put_p99}ns get_wait_p99<{get_p99}ns"
+            )
 
     def start(self) -> None:
         self._sender_process.start()
+        for worker_process in self._worker_processes:
+            worker_process.start()
         self._router_process.start()
         self._receiver_process.start()
 
     def check_process_alive(self) -> None:
+        for worker_process in self._worker_processes:
+            if not worker_process.is_alive():
+                raise ProcessNotAlive("Worker process is not alive")
         if not self._sender_process.is_alive():
             raise ProcessNotAlive("Sender process is not alive")
         if not self._router_process.is_alive():
@@ -134,6 +292,8 @@ class PyavManager:
 
         self._receiver_process.join(self._join_timeout)
         self._router_process.join(self._join_timeout)
+        for worker_process in self._worker_processes:
+            worker_process.join(self._join_timeout)
         self._sender_process.join(self._join_timeout)
 
         if self._receiver_process.is_alive():
@@ -142,83 +302,154 @@ class PyavManager:
             self._router_process.kill()
         if self._sender_process.is_alive():
             self._sender_process.kill()
+        for worker_process in self._worker_processes:
+            if worker_process.is_alive():
+                worker_process.kill()
 
     def close_pipes(self) -> None:
+        if self._worker_processes:
+            return
         self.improc_consumer.close()
         self.overlay_producer.close()
 
     def split_overlay_and_mask(
         self, image_result: OnImageResult
     ) -> Tuple[NDArray[uint8], NDArray[uint8]]:
-        if isinstance(image_result, ndarray):
-            if len(image_result.shape) != 3:
-                raise ValueError("The shape size of the resulting image should be 3")
-            overlay = image_result
-            mask = generate_mask(overlay, self._chroma_color)
-        elif isinstance(image_result, (tuple, list)):
-            if len(image_result) >= 2:
-                overlay = image_result[0]
-                mask = image_result[1]
-            elif len(image_result) == 1:
-                overlay = image_result[0]
-                mask = generate_mask(overlay, self._chroma_color)
-            elif len(image_result) == 0:
-                raise TypeError("Empty result list")
-            else:
-                assert False, "Inaccessible section"
-        else:
-            raise TypeError(f"Unsupported result type: {type(image_result)}")
-
-        return overlay, mask
+        return self._builder.split_overlay_and_mask(image_result)
 
     def validate_overlay_and_mask(
         self, overlay: NDArray[uint8], mask: NDArray[uint8]
     ) -> None:
-        if not isinstance(overlay, ndarray):
-            raise TypeError(f"Overlay type is not NDArray: {type(overlay)}")
-        if not isinstance(mask, ndarray):
-            raise TypeError(f"Mask type is not NDArray: {type(mask)}")
-
-        if overlay.dtype != uint8:
-            raise TypeError(f"Overlay dtype is not uint8: {overlay.dtype}")
-        if mask.dtype != uint8:
-            raise TypeError(f"Mask dtype is not uint8: {mask.dtype}")
-
-        if overlay.shape != self._shape:
-            raise ValueError(
-                "Overlay shape does not match: "
-                f"actual({overlay.shape}) != expect({self._shape})"
-            )
-        if mask.shape != self._mask_shape:
-            raise ValueError(
-                "Mask shape does not match: "
-                f"actual({mask.shape}) != expect({self._mask_shape})"
-            )
+        self._builder.validate_overlay_and_mask(overlay, mask)
 
-    async def _on_image(self, image: NDArray[uint8]) -> None:
-        # print(f"frame #{self._index}")
+    async def _on_image(self, image: NDArray[uint8]) -> NDArray[uint8]:
         result = await self._callbacks.on_image(image)
-        overlay, mask = self.split_overlay_and_mask(result)
-        self.validate_overlay_and_mask(overlay, mask)
-        bgra32 = merge_to_bgra32(image, mask)
-        self.overlay_producer.put(bgra32.tobytes())
-        self._index += 1
+        return self._builder.build(result)
+
+    async def put_overlay(self, tiles: BufferType, meta: SpscMeta) -> None:
+        while True:
+            try:
+                await self.overlay_producer.aput(
+                    tiles, timeout=self._get_timeout, meta=meta
+                )
+            except Full:
+                self.check_process_alive()
+            else:
+                break
+
+    async def flush_in_flight(self) -> None:
+        """
+        Send the overlays in frame order, because the router expects them so;
+        dropped frames keep their place with an empty overlay.
+        """
+        while self._in_flight:
+            meta, lease, task = self._in_flight[0]
+            if task is not None and not task.done():
+                break
+            self._in_flight.popleft()
+            if lease is not None:
+                lease.release()
+            if task is None:
+                await self.put_overlay(DROPPED_OVERLAY, meta)
+            else:
+                await self.put_overlay(task.result(), meta)
+                self._index += 1
+
+    def cancel_in_flight(self) -> None:
+        if self._lease_task is not None:
+            lease_task, self._lease_task = self._lease_task, None
+            if lease_task.done() and not lease_task.cancelled():
+                if lease_task.exception() is None:
+                    lease_task.result().release()
+            else:
+                lease_task.cancel()
+        while self._in_flight:
+            _, lease, task = self._in_flight.popleft()
+            if task is not None:
+                task.cancel()
+            if lease is not None:
+                lease.release()
+        for task in list(self._abandoned):
+            task.cancel()
+
+    def _release_abandoned(self, lease: SpscLease, task: "Task[NDArray[uint8]]"):
+        self._abandoned.discard(task)
+        lease.release()
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Dropped callback failed: {task.exception()!r}")
+
+    def drop_oldest_in_flight(self) -> None:
+        """
+        The callback is not cancelled, since it may have handed the view to a
+        thread that cancellation cannot stop. Its result is discarded and the
+        slot is released only once it returns.
+        """
+        for i, (meta, lease, task) in enumerate(self._in_flight):
+            if task is None or task.done():
+                continue
+            assert lease is not None
+            self._abandoned.add(task)
+            task.add_done_callback(partial(self._release_abandoned, lease))
+            self._in_flight[i] = _InFlight(meta)
+            self._dropped_oldest += 1
+            return
 
-    def _main(self, loop: AbstractEventLoop) -> None:
+    def running_in_flight(self) -> List["Task[NDArray[uint8]]"]:
+        return [t for _, _, t in self._in_flight if t is not None and not t.done()]
+
+    async def process(self) -> None:
+        """
+        Waits for a frame or for a callback to finish, whichever comes first,
+        so a finished overlay is sent without waiting for the next frame.
+        """
+        await self.flush_in_flight()
+
+        running = self.running_in_flight()
+        full = len(running) >= self._max_in_flight
+        if full and self._overflow == OVERFLOW_BLOCK:
+            await wait(running, timeout=self._get_timeout, return_when=FIRST_COMPLETED)
+            return
+
+        if self._lease_task is None:
+            consumer = self.improc_consumer
+            self._lease_task = create_task(consumer.alease(self._get_timeout))
+        await wait({self._lease_task, *running}, return_when=FIRST_COMPLETED)
+        if not self._lease_task.done():
+            return
+
+        lease_task, self._lease_task = self._lease_task, None
+        try:
+            lease = lease_task.result()
+        except Empty:
+            return
+
+        if full and self._overflow == OVERFLOW_DROP_NEWEST:
+            self._in_flight.append(_InFlight(lease.meta))
+            lease.release()
+            self._dropped_newest += 1
+            return
+
+        if full and self._overflow == OVERFLOW_DROP_OLDEST:
+            self.drop_oldest_in_flight()
+
+        # The slot stays leased until the callback finishes; no copy is made.
+        task = create_task(self._on_image(lease.view(self._shape)))
+        self._in_flight.append(_InFlight(lease.meta, lease, task))
+
+    async def run_until_complete(self) -> None:
+        loop = get_running_loop()
         self.start()
         try:
             while not self._manager_done.is_set():
                 self.check_process_alive()
-                data = self.improc_consumer.get()
-                image: NDArray[uint8] = ndarray(self._shape, dtype=uint8, buffer=data)
-                run_coroutine_threadsafe(self._on_image(image), loop)
+                if self._worker_processes:
+                    await sleep(self._get_timeout)
+                else:
+                    await self.process()
         except ProcessNotAlive:
             pass
         finally:
-            self.join_safe()
+            self.cancel_in_flight()
+            await loop.run_in_executor(None, self.join_safe)
             self.close_pipes()
-
-    async def run_until_complete(self) -> None:
-        with ThreadPoolExecutor(max_workers=1) as executor:
-            loop = get_running_loop()
-            await loop.run_in_executor(executor, self._main, loop)
+            self.log_stats()
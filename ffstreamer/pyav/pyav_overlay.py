@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+from typing import Optional, Tuple
+
+from numpy import empty, ndarray, uint8
+from numpy.typing import NDArray
+
+from ffstreamer.np.mask import DEFAULT_CHROMA_COLOR, generate_mask
+from ffstreamer.np.tiles import DEFAULT_TILE_SIZE, encode_tiles
+from ffstreamer.pyav.pyav_callbacks import OnImageResult
+
+
+class PyavOverlayBuilder:
+    def __init__(
+        self,
+        shape: Tuple[int, int, int],
+        chroma_color=DEFAULT_CHROMA_COLOR,
+        tile_size=DEFAULT_TILE_SIZE,
+    ):
+        self._shape = shape
+        self._mask_shape = shape[0], shape[1], 1
+        self._chroma_color = chroma_color
+        self._tile_size = tile_size
+        self._mask = empty(self._mask_shape, dtype=uint8)
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return self._shape
+
+    @property
+    def chroma_color(self):
+        return self._chroma_color
+
+    @property
+    def tile_size(self) -> int:
+        return self._tile_size
+
+    def split_overlay_and_mask(
+        self,
+        image_result: OnImageResult,
+        out: Optional[NDArray[uint8]] = None,
+    ) -> Tuple[NDArray[uint8], NDArray[uint8]]:
+        """
+        A generated mask is written into `out`, if given.
+        """
+        if isinstance(image_result, ndarray):
+            if len(image_result.shape) != 3:
+                raise ValueError("The shape size of the resulting image should be 3")
+            overlay = image_result
+            mask = self.generate_mask(overlay, out)
+        elif isinstance(image_result, (tuple, list)):
+            if len(image_result) >= 2:
+                overlay = image_result[0]
+                mask = image_result[1]
+            elif len(image_result) == 1:
+                overlay = image_result[0]
+                mask = self.generate_mask(overlay, out)
+            elif len(image_result) == 0:
+                raise TypeError("Empty result list")
+            else:
+                assert False, "Inaccessible section"
+        else:
+            raise TypeError(f"Unsupported result type: {type(image_result)}")
+
+        return overlay, mask
+
+    def generate_mask(
+        self,
+        overlay: NDArray[uint8],
+        out: Optional[NDArray[uint8]] = None,
+    ) -> NDArray[uint8]:
+        if out is not None and overlay.shape != self._shape:
+            out = None  # The validation reports the shape mismatch.
+        return generate_mask(overlay, self._chroma_color, out)
+
+    def validate_overlay_and_mask(
+        self, overlay: NDArray[uint8], mask: NDArray[uint8]
+    ) -> None:
+        if not isinstance(overlay, ndarray):
+            raise TypeError(f"Overlay type is not NDArray: {type(overlay)}")
+        if not isinstance(mask, ndarray):
+            raise TypeError(f"Mask type is not NDArray: {type(mask)}")
+
+        if overlay.dtype != uint8:
+            raise TypeError(f"Overlay dtype is not uint8: {overlay.dtype}")
+        if mask.dtype != uint8:
+            raise TypeError(f"Mask dtype is not uint8: {mask.dtype}")
+
+        if overlay.shape != self._shape:
+            raise ValueError(
+                "Overlay shape does not match: "
+                f"actual({overlay.shape}) != expect({self._shape})"
+            )
+        if mask.shape != self._mask_shape:
+            raise ValueError(
+                "Mask shape does not match: "
+                f"actual({mask.shape}) != expect({self._mask_shape})"
+            )
+
+    def build(self, image_result: OnImageResult) -> NDArray[uint8]:
+        """
+        Only the covered regions are sent, encoded by `encode_tiles()`.
+        """
+        overlay, mask = self.split_overlay_and_mask(image_result, self._mask)
+        self.validate_overlay_and_mask(overlay, mask)
+        return encode_tiles(overlay, mask, self._tile_size)
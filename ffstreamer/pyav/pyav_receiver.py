@@ -3,9 +3,14 @@
 from multiprocessing import Process
 from multiprocessing.synchronize import Event
 from queue import Full
+from time import monotonic_ns
 
+from av import VideoFrame  # noqa
 from av import open as av_open  # noqa
+from av.codec.context import Flags  # noqa
+from numpy import copyto
 
+from ffstreamer.memory.spsc_header import SpscMeta
 from ffstreamer.memory.spsc_queue import SpscQueueProducer
 
 
@@ -29,6 +34,7 @@ class PyavReceiver:
         self._input_container = av_open(source, mode="r", options=format_options)
         self._receiver_producer = receiver_producer
         self._done = done
+        self._frame_index = 0
 
         self._video_stream = None
         for stream in self._input_container.streams:
@@ -39,7 +45,12 @@ class PyavReceiver:
             raise IndexError("Not found video stream")
 
         self._video_stream.thread_type = "AUTO"
-        self._video_stream.codec_context.low_delay = True
+        codec_context = self._video_stream.codec_context
+        if hasattr(codec_context, "low_delay"):
+            codec_context.low_delay = True
+        else:
+            # PyAV 14 and later only expose it as a codec flag.
+            codec_context.flags |= Flags.low_delay
 
     def run(self) -> None:
         for packet in self._input_container.demux(self._video_stream):
@@ -51,24 +62,36 @@ class PyavReceiver:
                 continue
 
             for frame in packet.decode():
-                if not frame:
+                if not isinstance(frame, VideoFrame):
                     continue
 
+                meta = SpscMeta(
+                    frame_index=self._frame_index,
+                    pts=frame.pts,
+                    dts=frame.dts,
+                    time_base=frame.time_base,
+                    capture_time=monotonic_ns(),
+                    pixel_format="bgr24",
+                )
+                self._frame_index += 1
                 image = frame.to_ndarray(format="bgr24")
-                data = image.tobytes()
 
                 while True:
                     if self._done.is_set():
                         return
 
                     try:
-                        self._receiver_producer.put(data, timeout=self._put_timeout)
+                        slot = self._receiver_producer.reserve(self._put_timeout)
                     except Full:
                         if self._drop_if_put_timeout:
+                            self._receiver_producer.count_drop()
                             break
                         else:
                             continue
                     else:
+                        with slot:
+                            copyto(slot.view(image.shape), image)
+                            slot.commit(meta=meta)
                         break
 
     def close(self) -> None:
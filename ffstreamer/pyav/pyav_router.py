@@ -1,181 +1,302 @@
 # -*- coding: utf-8 -*-
 
+from collections import deque
 from multiprocessing import Process
 from multiprocessing.synchronize import Event
 from queue import Empty, Full
-from typing import Tuple
+from typing import Deque, Final, NamedTuple, Optional, Sequence, Tuple
 
-from numpy import ndarray, newaxis, uint8, zeros
+from numpy import ndarray, uint8
 from numpy.typing import NDArray
 
-from ffstreamer.memory.spsc_queue import SpscQueueConsumer, SpscQueueProducer
-from ffstreamer.np.mask import split_mask_on_off
+from ffstreamer.memory.spsc_header import NO_FRAME_INDEX, SpscMeta
+from ffstreamer.memory.spsc_queue import (
+    SpscLease,
+    SpscQueueConsumer,
+    SpscQueueProducer,
+)
+from ffstreamer.np.buffer import BufferType
+from ffstreamer.np.composite import DEFAULT_BLEND_MODE, OverlayCompositor
+from ffstreamer.np.tiles import decode_tiles
+
+DISPATCH_ROUND_ROBIN: Final[str] = "round-robin"
+DISPATCH_LEAST_LOADED: Final[str] = "least-loaded"
+DISPATCH_POLICIES = (DISPATCH_ROUND_ROBIN, DISPATCH_LEAST_LOADED)
+DEFAULT_DISPATCH_POLICY: Final[str] = DISPATCH_ROUND_ROBIN
+
+
+class _Pending(NamedTuple):
+    frame_index: int
+    worker: int
+    lease: SpscLease
 
 
 class PyavRouter:
-    _overlay: NDArray[uint8]
-    _overlay_mask: NDArray[uint8]
-    _overlay_real: NDArray[uint8]
-    _overlay_mask_on: NDArray[uint8]
-    _overlay_mask_off: NDArray[uint8]
+    _pending: Deque[_Pending]
 
     def __init__(
         self,
         shape: Tuple[int, int, int],
         receiver_consumer: SpscQueueConsumer,
-        improc_producer: SpscQueueProducer,
-        overlay_consumer: SpscQueueConsumer,
+        improc_producers: Sequence[SpscQueueProducer],
+        overlay_consumers: Sequence[SpscQueueConsumer],
         sender_producer: SpscQueueProducer,
         done: Event,
         synchronize=False,
         get_timeout=1.0,
         put_timeout=8.0,
+        dispatch=DEFAULT_DISPATCH_POLICY,
+        blend=DEFAULT_BLEND_MODE,
     ):
         if shape[-1] != 3:
             raise ValueError("Only 3 channels are supported")
+        if not improc_producers:
+            raise ValueError("At least one worker is required")
+        if len(improc_producers) != len(overlay_consumers):
+            raise ValueError("The number of improc and overlay queues is different")
+        if dispatch not in DISPATCH_POLICIES:
+            raise ValueError(f"Unsupported dispatch policy: '{dispatch}'")
 
         self._shape = shape
         self._receiver_consumer = receiver_consumer
-        self._improc_producer = improc_producer
-        self._overlay_consumer = overlay_consumer
+        self._improc_producers = improc_producers
+        self._overlay_consumers = overlay_consumers
         self._sender_producer = sender_producer
         self._done = done
         self._synchronize = synchronize
         self._get_timeout = get_timeout
         self._put_timeout = put_timeout
+        self._dispatch = dispatch
+
+        self._in_flight = [0] * len(improc_producers)
+        self._next_worker = 0
+        self._frame_index = 0
+        self._overlay_index = NO_FRAME_INDEX
+        self._pending = deque()
+
+        self._compositor = OverlayCompositor(self._shape, blend)
+
+    @property
+    def workers(self) -> int:
+        return len(self._improc_producers)
+
+    @property
+    def compositor(self) -> OverlayCompositor:
+        return self._compositor
 
-        assert self._improc_producer.maxsize == 1
-        assert self._overlay_consumer.maxsize == 1
-        self._now_image_processing = False
-
-        self._overlay_shape = self._shape[0], self._shape[1], 4
-        self._overlay = zeros(self._overlay_shape, dtype=uint8)
-        self._overlay_mask = self._overlay[:, :, -1][:, :, newaxis]
-        self._overlay_real = self._overlay[:, :, :-1]
-        mask_on, mask_off = split_mask_on_off(self._overlay_mask)
-        self._overlay_mask_on = mask_on
-        self._overlay_mask_off = mask_off
-
-    def update_overlay(self, data: bytes) -> None:
-        self._overlay = ndarray(self._overlay_shape, dtype=uint8, buffer=data)
-        self._overlay_mask = self._overlay[:, :, -1][:, :, newaxis]
-        self._overlay_real = self._overlay[:, :, :-1]
-        mask_on, mask_off = split_mask_on_off(self._overlay_mask)
-        self._overlay_mask_on = mask_on
-        self._overlay_mask_off = mask_off
-
-    def merge_overlay(self, image: NDArray[uint8]) -> NDArray[uint8]:
-        # image[self._overlay_mask > 0] = self._overlay_real[self._overlay_mask > 0]
-        background: NDArray[uint8] = image * self._overlay_mask_off
-        overlay: NDArray[uint8] = self._overlay_real * self._overlay_mask_on
-        return background + overlay
-
-    def data_to_image(self, data: bytes) -> NDArray[uint8]:
+    def update_overlay(self, data: BufferType) -> None:
+        """
+        `data` is encoded by `encode_tiles()`. The compositor keeps its own copy
+        of the covered pixels, so `data` may be a slot that is released right after.
+        """
+        self._compositor.update_tiles(decode_tiles(data))
+
+    def merge_overlay(
+        self,
+        image: NDArray[uint8],
+        out: Optional[NDArray[uint8]] = None,
+    ) -> NDArray[uint8]:
+        return self._compositor.composite(image, out)
+
+    def data_to_image(self, data: BufferType) -> NDArray[uint8]:
         return ndarray(self._shape, dtype=uint8, buffer=data)
 
+    def next_frame_meta(self, meta: Optional[SpscMeta]) -> SpscMeta:
+        """
+        Make sure the frame carries an index, so its overlay can be matched.
+        """
+        frame_index = self._frame_index
+        self._frame_index += 1
+        if meta is None:
+            return SpscMeta(frame_index=frame_index)
+        if meta.frame_index == NO_FRAME_INDEX:
+            return meta._replace(frame_index=frame_index)
+        return meta
+
+    def has_capacity(self, worker: int) -> bool:
+        producer = self._improc_producers[worker]
+        if self._in_flight[worker] >= producer.maxsize:
+            return False
+        producer.pull_nowait()
+        return not producer.full
+
+    def select_worker(self) -> Optional[int]:
+        workers = len(self._improc_producers)
+        if self._dispatch == DISPATCH_LEAST_LOADED:
+            order = sorted(range(workers), key=lambda i: self._in_flight[i])
+        else:
+            order = [(self._next_worker + i) % workers for i in range(workers)]
+
+        for worker in order:
+            if self.has_capacity(worker):
+                self._next_worker = (worker + 1) % workers
+                return worker
+        return None
+
+    def dispatch(self, worker: int, data: BufferType, meta: SpscMeta) -> None:
+        self._improc_producers[worker].put_nowait(data, meta=meta)
+        self._in_flight[worker] += 1
+
+    def collect_overlays(self) -> None:
+        """
+        Apply the newest finished overlay; results older than the current
+        overlay arrive out of order from other workers and are discarded, as
+        are the empty results of dropped frames.
+        """
+        for worker, consumer in enumerate(self._overlay_consumers):
+            consumer.pull_nowait()
+            while not consumer.empty:
+                with consumer.lease_nowait() as lease:
+                    self._in_flight[worker] -= 1
+                    if lease.data.size == 0:
+                        continue
+                    frame_index = lease.meta.frame_index
+                    if (
+                        frame_index == NO_FRAME_INDEX
+                        or frame_index > self._overlay_index
+                    ):
+                        self.update_overlay(lease.data)
+                        self._overlay_index = frame_index
+
+    def send(self, data: BufferType, meta: Optional[SpscMeta] = None) -> None:
+        try:
+            slot = self._sender_producer.reserve(self._put_timeout)
+        except Full:
+            self._sender_producer.count_drop()
+            return
+
+        with slot:
+            self.merge_overlay(self.data_to_image(data), slot.view(self._shape))
+            slot.commit(meta=meta)
+
     def run(self) -> None:
+        if self._synchronize:
+            self.run_synchronized()
+            return
+
         while not self._done.is_set():
             try:
-                data = self._receiver_consumer.get(self._get_timeout)
+                lease = self._receiver_consumer.lease(self._get_timeout)
             except Empty:
                 continue
 
-            if not self._now_image_processing:
-                if self._synchronize:
-                    while True:
-                        if self._done.is_set():
-                            return
-                        try:
-                            self._improc_producer.put(data, timeout=self._put_timeout)
-                        except Full:
-                            continue
-                        else:
-                            self._now_image_processing = True
-                            break
-                else:
-                    self._improc_producer.pull_nowait()
-                    if not self._improc_producer.full:
-                        self._improc_producer.put_nowait(data)
-                        self._now_image_processing = True
-
-            if self._now_image_processing:
-                if self._synchronize:
-                    while True:
-                        if self._done.is_set():
-                            return
-                        try:
-                            overlay_data = self._overlay_consumer.get(self._get_timeout)
-                        except Empty:
-                            continue
-                        else:
-                            self.update_overlay(overlay_data)
-                            self._now_image_processing = False
-                            break
-                else:
-                    self._overlay_consumer.pull_nowait()
-                    if not self._overlay_consumer.empty:
-                        overlay_data = self._overlay_consumer.get_nowait()
-                        self.update_overlay(overlay_data)
-                        self._now_image_processing = False
-
-            image = self.data_to_image(data)
-            merged_image = self.merge_overlay(image)
-            merged_image_data = merged_image.tobytes()
+            with lease:
+                if not self.route(lease.data, lease.meta):
+                    return
 
-            try:
-                self._sender_producer.put(merged_image_data, timeout=self._put_timeout)
-            except Full:
-                continue
+    def route(self, data: NDArray[uint8], meta: Optional[SpscMeta] = None) -> bool:
+        self.collect_overlays()
+        worker = self.select_worker()
+        if worker is not None:
+            self.dispatch(worker, data, self.next_frame_meta(meta))
+        self.send(data, meta)
+        return True
+
+    def run_synchronized(self) -> None:
+        """
+        Every frame waits for its own overlay. Up to one improc queue worth of
+        frames per worker stays leased from the receiver, and frames leave in
+        their original order however the workers finish.
+        """
+        try:
+            while not self._done.is_set():
+                worker = self.select_worker()
+                if worker is not None:
+                    timeout = 0.0 if self._pending else self._get_timeout
+                    try:
+                        lease = self._receiver_consumer.lease(timeout)
+                    except Empty:
+                        pass
+                    else:
+                        meta = self.next_frame_meta(lease.meta)
+                        self.dispatch(worker, lease.data, meta)
+                        self._pending.append(_Pending(meta.frame_index, worker, lease))
+                        continue
+
+                if self._pending:
+                    self.complete_oldest()
+        finally:
+            while self._pending:
+                self._pending.popleft().lease.release()
+
+    def complete_oldest(self) -> None:
+        # Each worker answers in dispatch order, so the next overlay of the worker
+        # holding the oldest frame belongs to that frame.
+        frame_index, worker, lease = self._pending[0]
+        try:
+            overlay = self._overlay_consumers[worker].lease(self._get_timeout)
+        except Empty:
+            return
+
+        with overlay:
+            self._in_flight[worker] -= 1
+            if overlay.data.size != 0:
+                self.update_overlay(overlay.data)
+                self._overlay_index = frame_index
+
+        self._pending.popleft()
+        with lease:
+            self.send(lease.data, lease.meta)
 
     def close(self) -> None:
         self._receiver_consumer.close()
-        self._improc_producer.close()
-        self._overlay_consumer.close()
+        for producer in self._improc_producers:
+            producer.close()
+        for consumer in self._overlay_consumers:
+            consumer.close()
         self._sender_producer.close()
 
 
 def _pyav_router_main(
     shape: Tuple[int, int, int],
     receiver_consumer: SpscQueueConsumer,
-    improc_producer: SpscQueueProducer,
-    overlay_consumer: SpscQueueConsumer,
+    improc_producers: Sequence[SpscQueueProducer],
+    overlay_consumers: Sequence[SpscQueueConsumer],
     sender_producer: SpscQueueProducer,
     done: Event,
     synchronize=False,
+    dispatch=DEFAULT_DISPATCH_POLICY,
+    blend=DEFAULT_BLEND_MODE,
 ) -> None:
-    receiver = PyavRouter(
+    router = PyavRouter(
         shape,
         receiver_consumer,
-        improc_producer,
-        overlay_consumer,
+        improc_producers,
+        overlay_consumers,
         sender_producer,
         done,
         synchronize,
+        dispatch=dispatch,
+        blend=blend,
     )
     try:
-        receiver.run()
+        router.run()
     finally:
-        receiver.close()
+        router.close()
 
 
 def create_pyav_router_process(
     shape: Tuple[int, int, int],
     receiver_consumer: SpscQueueConsumer,
-    improc_producer: SpscQueueProducer,
-    overlay_consumer: SpscQueueConsumer,
+    improc_producers: Sequence[SpscQueueProducer],
+    overlay_consumers: Sequence[SpscQueueConsumer],
     sender_producer: SpscQueueProducer,
     done: Event,
     synchronize=False,
+    dispatch=DEFAULT_DISPATCH_POLICY,
+    blend=DEFAULT_BLEND_MODE,
 ) -> Process:
     return Process(
         target=_pyav_router_main,
         args=(
             shape,
             receiver_consumer,
-            improc_producer,
-            overlay_consumer,
+            improc_producers,
+            overlay_consumers,
             sender_producer,
             done,
             synchronize,
+            dispatch,
+            blend,
         ),
     )
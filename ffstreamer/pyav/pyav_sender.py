@@ -1,19 +1,51 @@
 # -*- coding: utf-8 -*-
 
+from fractions import Fraction
 from multiprocessing import Process
 from multiprocessing.synchronize import Event
 from queue import Empty
-from typing import Tuple
+from time import monotonic_ns
+from typing import Final, Optional, Sequence, Tuple
 
-from av import VideoFrame  # noqa
 from av import open as av_open  # noqa
-from numpy import ndarray, uint8
-from numpy.typing import NDArray
+from av.video.reformatter import VideoReformatter  # noqa
 
+from ffstreamer.logging.logging import logger
+from ffstreamer.memory.latency_stats import LatencyTelemetry
+from ffstreamer.memory.spsc_header import SpscMeta
 from ffstreamer.memory.spsc_queue import SpscQueueConsumer
+from ffstreamer.np.planes import (
+    PIXEL_FORMAT_BGR24,
+    PIXEL_FORMAT_NV12,
+    PIXEL_FORMAT_YUV420P,
+    PLANE_PIXEL_FORMATS,
+)
+from ffstreamer.pyav.pyav_frame_pool import DEFAULT_FRAME_POOL_SIZE, PyavFramePool
+
+DEFAULT_TIME_BASE: Final[Fraction] = Fraction(1, 90000)
+"""
+Used when the source frames carry no time base.
+"""
+
+NANOSECONDS_TIME_BASE: Final[Fraction] = Fraction(1, 1_000_000_000)
+
+ENCODER_PIXEL_FORMATS: Final[Sequence[str]] = PIXEL_FORMAT_YUV420P, PIXEL_FORMAT_NV12
+"""
+Input formats that libx264 takes as they are; others are converted to yuv420p.
+"""
+
+
+def rescale_timestamp(value: int, source: Fraction, destination: Fraction) -> int:
+    if source == destination:
+        return value
+    return round(value * source / destination)
 
 
 class PyavSender:
+    _time_base: Optional[Fraction]
+    _first_pts: Optional[int]
+    _last_pts: Optional[int]
+
     def __init__(
         self,
         destination: str,
@@ -23,8 +55,17 @@ class PyavSender:
         done: Event,
         *,
         get_timeout=4.0,
+        latency: Optional[LatencyTelemetry] = None,
+        pixel_format=PIXEL_FORMAT_BGR24,
+        pool_size=DEFAULT_FRAME_POOL_SIZE,
     ):
-        if shape[-1] != 3:
+        """
+        `shape` is `(height, width, channels)`; the channels only matter for
+        `bgr24`, while planar formats use the layout of `ffstreamer.np.planes`.
+        """
+        if pixel_format not in PLANE_PIXEL_FORMATS:
+            raise ValueError(f"Unsupported pixel format: '{pixel_format}'")
+        if pixel_format == PIXEL_FORMAT_BGR24 and shape[-1] != 3:
             raise ValueError("Only 3 channels are supported")
 
         self._get_timeout = get_timeout
@@ -32,31 +73,108 @@ class PyavSender:
         self._shape = shape
         self._sender_consumer = sender_consumer
         self._done = done
+        self._latency = latency
+        self._pixel_format = pixel_format
+        self._pool = PyavFramePool(shape[1], shape[0], pixel_format, pool_size)
+        self._reformatter = VideoReformatter()
+        if pixel_format in ENCODER_PIXEL_FORMATS:
+            self._encoder_pixel_format = pixel_format
+        else:
+            self._encoder_pixel_format = PIXEL_FORMAT_YUV420P
+
+        self._time_base = None
+        self._first_pts = None
+        self._last_pts = None
 
         self._output_stream = self._output_container.add_stream("libx264")
         self._output_stream.height = self._shape[0]
         self._output_stream.width = self._shape[1]
-        self._output_stream.pix_fmt = "yuv420p"
+        self._output_stream.pix_fmt = self._encoder_pixel_format
         self._output_stream.options = {
             "preset": "fast",
             "crf": "28",
-            "turn": "zerolatency",
+            "tune": "zerolatency",
         }
 
-    def run(self) -> None:
-        while not self._done.is_set():
-            try:
-                data = self._sender_consumer.get(timeout=self._get_timeout)
-            except Empty:
-                continue
+    @property
+    def time_base(self) -> Optional[Fraction]:
+        return self._time_base
+
+    def open_time_base(self, time_base: Optional[Fraction]) -> None:
+        """
+        The encoder time base can only be set before the first frame.
+        """
+        assert self._time_base is None
+        self._time_base = time_base if time_base is not None else DEFAULT_TIME_BASE
+        self._output_stream.codec_context.time_base = self._time_base
+        self._output_stream.time_base = self._time_base
 
-            assert isinstance(data, bytes)
-            assert len(data) >= 1
+    def next_pts(self, meta: SpscMeta) -> int:
+        """
+        Source timestamps are kept, so dropped frames leave a gap instead of
+        shifting the timeline. Frames without pts fall back to their capture
+        time, and the result always increases.
+        """
+        if self._time_base is None:
+            self.open_time_base(meta.time_base)
+        assert self._time_base is not None
 
-            image: NDArray[uint8] = ndarray(self._shape, dtype=uint8, buffer=data)
-            frame = VideoFrame.from_ndarray(image, format="bgr24")
-            for packet in self._output_stream.encode(frame):
-                self._output_container.mux(packet)
+        pts: Optional[int]
+        if meta.pts is not None and meta.time_base is not None:
+            pts = rescale_timestamp(meta.pts, meta.time_base, self._time_base)
+        elif meta.capture_time is not None:
+            pts = rescale_timestamp(
+                meta.capture_time, NANOSECONDS_TIME_BASE, self._time_base
+            )
+        else:
+            pts = None
+
+        if pts is None:
+            pts = 0 if self._last_pts is None else self._last_pts + 1
+        else:
+            if self._first_pts is None:
+                self._first_pts = pts
+            pts -= self._first_pts
+
+        if self._last_pts is not None and pts <= self._last_pts:
+            pts = self._last_pts + 1
+        self._last_pts = pts
+        return pts
+
+    def report_latency(self, meta: SpscMeta) -> None:
+        if meta.capture_time is None:
+            return
+        latency = monotonic_ns() - meta.capture_time
+        if self._latency is not None:
+            self._latency.add(latency)
+        logger.debug(f"Frame #{meta.frame_index} latency: {latency / 1e6:.1f}ms")
+
+    def process(self) -> None:
+        try:
+            lease = self._sender_consumer.lease(timeout=self._get_timeout)
+        except Empty:
+            return
+
+        with lease:
+            meta = lease.meta
+            if meta.pixel_format and meta.pixel_format != self._pixel_format:
+                raise ValueError(
+                    f"Unexpected pixel format: '{meta.pixel_format}'"
+                    f" (expected '{self._pixel_format}')"
+                )
+            frame = self._pool.fill(lease.data)
+
+        if self._pixel_format != self._encoder_pixel_format:
+            frame = self._reformatter.reformat(frame, format=self._encoder_pixel_format)
+        frame.pts = self.next_pts(meta)
+        frame.time_base = self._time_base
+        for packet in self._output_stream.encode(frame):
+            self._output_container.mux(packet)
+        self.report_latency(meta)
+
+    def run(self) -> None:
+        while not self._done.is_set():
+            self.process()
 
     def close(self) -> None:
         self._output_container.mux(self._output_stream.encode(None))
@@ -70,12 +188,22 @@ def _pyav_sender_main(
     shape: Tuple[int, int, int],
     sender_consumer: SpscQueueConsumer,
     done: Event,
+    latency: Optional[LatencyTelemetry] = None,
+    pixel_format=PIXEL_FORMAT_BGR24,
 ) -> None:
-    receiver = PyavSender(destination, file_format, shape, sender_consumer, done)
+    sender = PyavSender(
+        destination,
+        file_format,
+        shape,
+        sender_consumer,
+        done,
+        latency=latency,
+        pixel_format=pixel_format,
+    )
     try:
-        receiver.run()
+        sender.run()
     finally:
-        receiver.close()
+        sender.close()
 
 
 def create_pyav_sender_process(
@@ -84,8 +212,18 @@ def create_pyav_sender_process(
     shape: Tuple[int, int, int],
     sender_consumer: SpscQueueConsumer,
     done: Event,
+    latency: Optional[LatencyTelemetry] = None,
+    pixel_format=PIXEL_FORMAT_BGR24,
 ) -> Process:
     return Process(
         target=_pyav_sender_main,
-        args=(destination, file_format, shape, sender_consumer, done),
+        args=(
+            destination,
+            file_format,
+            shape,
+            sender_consumer,
+            done,
+            latency,
+            pixel_format,
+        ),
     )
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+from asyncio import run as asyncio_run
+from multiprocessing import Process
+from multiprocessing.synchronize import Event
+from queue import Empty, Full
+from typing import Tuple
+
+from ffstreamer.memory.spsc_queue import SpscQueueConsumer, SpscQueueProducer
+from ffstreamer.np.mask import DEFAULT_CHROMA_COLOR
+from ffstreamer.pyav.pyav_callbacks import PyavCallbacksInterface
+from ffstreamer.pyav.pyav_overlay import PyavOverlayBuilder
+
+
+class PyavWorker:
+    def __init__(
+        self,
+        shape: Tuple[int, int, int],
+        callbacks: PyavCallbacksInterface,
+        improc_consumer: SpscQueueConsumer,
+        overlay_producer: SpscQueueProducer,
+        done: Event,
+        chroma_color=DEFAULT_CHROMA_COLOR,
+        *,
+        get_timeout=1.0,
+        put_timeout=8.0,
+    ):
+        self._shape = shape
+        self._callbacks = callbacks
+        self._improc_consumer = improc_consumer
+        self._overlay_producer = overlay_producer
+        self._done = done
+        self._builder = PyavOverlayBuilder(shape, chroma_color)
+        self._get_timeout = get_timeout
+        self._put_timeout = put_timeout
+
+    async def process(self) -> None:
+        try:
+            lease = await self._improc_consumer.alease(self._get_timeout)
+        except Empty:
+            return
+
+        # The callbacks can use the slot directly; the router keeps its own copy.
+        with lease:
+            meta = lease.meta
+            result = await self._callbacks.on_image(lease.view(self._shape))
+            tiles = self._builder.build(result)
+
+        while not self._done.is_set():
+            try:
+                await self._overlay_producer.aput(
+                    tiles, timeout=self._put_timeout, meta=meta
+                )
+            except Full:
+                continue
+            else:
+                break
+
+    async def run(self) -> None:
+        await self._callbacks.on_open()
+        try:
+            while not self._done.is_set():
+                await self.process()
+        finally:
+            await self._callbacks.on_close()
+
+    def close(self) -> None:
+        self._improc_consumer.close()
+        self._overlay_producer.close()
+
+
+def _pyav_worker_main(
+    shape: Tuple[int, int, int],
+    callbacks: PyavCallbacksInterface,
+    improc_consumer: SpscQueueConsumer,
+    overlay_producer: SpscQueueProducer,
+    done: Event,
+    chroma_color=DEFAULT_CHROMA_COLOR,
+) -> None:
+    worker = PyavWorker(
+        shape,
+        callbacks,
+        improc_consumer,
+        overlay_producer,
+        done,
+        chroma_color,
+    )
+    try:
+        asyncio_run(worker.run())
+    finally:
+        worker.close()
+
+
+def create_pyav_worker_process(
+    shape: Tuple[int, int, int],
+    callbacks: PyavCallbacksInterface,
+    improc_consumer: SpscQueueConsumer,
+    overlay_producer: SpscQueueProducer,
+    done: Event,
+    chroma_color=DEFAULT_CHROMA_COLOR,
+) -> Process:
+    return Process(
+        target=_pyav_worker_main,
+        args=(
+            shape,
+            callbacks,
+            improc_consumer,
+            overlay_producer,
+            done,
+            chroma_color,
+        ),
+    )
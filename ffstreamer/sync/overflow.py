@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+
+from typing import Final
+
+OVERFLOW_BLOCK: Final[str] = "block"
+OVERFLOW_DROP_OLDEST: Final[str] = "drop-oldest"
+OVERFLOW_DROP_NEWEST: Final[str] = "drop-newest"
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST)
+DEFAULT_OVERFLOW_POLICY: Final[str] = OVERFLOW_BLOCK
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+from asyncio import get_running_loop
+from asyncio.exceptions import IncompleteReadError
+from os import close, pipe, set_blocking, write
+from unittest import IsolatedAsyncioTestCase, main
+
+from ffstreamer.aio.frame_reader import FrameRingReader, set_pipe_size
+
+
+class FrameReaderTestCase(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.read_fd, self.write_fd = pipe()
+        set_blocking(self.read_fd, False)
+
+    def tearDown(self):
+        for fd in (self.read_fd, self.write_fd):
+            try:
+                close(fd)
+            except OSError:
+                pass
+
+    def test_set_pipe_size(self):
+        self.assertLessEqual(0, set_pipe_size(self.read_fd, 256 * 1024))
+
+    async def test_frames(self):
+        reader = FrameRingReader(self.read_fd, 4, ring_size=2)
+        write(self.write_fd, b"abcdefghijkl")
+        close(self.write_fd)
+
+        first = await reader.read_frame()
+        second = await reader.read_frame()
+        self.assertIsInstance(first, memoryview)
+        self.assertEqual(b"abcd", bytes(first))
+        self.assertEqual(b"efgh", bytes(second))
+
+        third = await reader.read_frame()
+        self.assertEqual(b"ijkl", bytes(third))
+        self.assertIs(first, third)
+
+        self.assertIsNone(await reader.read_frame())
+
+    async def test_incomplete(self):
+        reader = FrameRingReader(self.read_fd, 4)
+        write(self.write_fd, b"abcdef")
+        close(self.write_fd)
+
+        self.assertEqual(b"abcd", bytes(await reader.read_frame()))
+        with self.assertRaises(IncompleteReadError) as context:
+            await reader.read_frame()
+        self.assertEqual(b"ef", context.exception.partial)
+
+    async def test_wait_readable(self):
+        reader = FrameRingReader(self.read_fd, 4)
+        write(self.write_fd, b"ab")
+        get_running_loop().call_later(0.01, write, self.write_fd, b"cd")
+        self.assertEqual(b"abcd", bytes(await reader.read_frame()))
+
+
+if __name__ == "__main__":
+    main()
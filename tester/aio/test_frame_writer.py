@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+from asyncio import get_running_loop
+from os import close, pipe, read, set_blocking
+from unittest import IsolatedAsyncioTestCase, main
+
+import numpy as np
+
+from ffstreamer.aio.frame_reader import set_pipe_size
+from ffstreamer.aio.frame_writer import FrameWriter
+
+_PIPE_SIZE = 64 * 1024
+
+
+class FrameWriterTestCase(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.read_fd, self.write_fd = pipe()
+        set_blocking(self.write_fd, False)
+        self.pipe_size = set_pipe_size(self.write_fd, _PIPE_SIZE) or _PIPE_SIZE
+
+    def tearDown(self):
+        for fd in (self.read_fd, self.write_fd):
+            try:
+                close(fd)
+            except OSError:
+                pass
+
+    def read_all(self, size: int) -> bytes:
+        result = bytearray()
+        while len(result) < size:
+            result += read(self.read_fd, size - len(result))
+        return bytes(result)
+
+    async def test_direct(self):
+        writer = FrameWriter(self.write_fd)
+        frame = np.arange(12, dtype=np.uint8).reshape(2, 2, 3)
+        await writer.write_frame(frame)
+        await writer.write_frame(memoryview(b"abcd"))
+        self.assertEqual(0, writer.pending)
+        self.assertEqual(frame.tobytes() + b"abcd", self.read_all(16))
+
+    async def test_pending(self):
+        writer = FrameWriter(self.write_fd, high_water=16)
+        first = bytes(range(256)) * (self.pipe_size // 256)
+        await writer.write_frame(first)
+        await writer.write_frame(b"0123456789")
+        self.assertEqual(10, writer.pending)
+
+        # Reuse of the caller's buffer must not change the pending bytes.
+        frame = bytearray(b"abcdefghij")
+        get_running_loop().call_later(0.01, self.read_all, len(first))
+        await writer.write_frame(frame)
+        frame[:] = bytes(len(frame))
+        self.assertLessEqual(writer.pending, 16)
+
+        await writer.drain()
+        self.assertEqual(0, writer.pending)
+        self.assertEqual(b"0123456789abcdefghij", self.read_all(20))
+
+    def test_high_water(self):
+        with self.assertRaises(ValueError):
+            FrameWriter(self.write_fd, high_water=-1)
+
+
+if __name__ == "__main__":
+    main()
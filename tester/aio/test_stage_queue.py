@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+from asyncio import create_task, sleep, wait_for
+from unittest import IsolatedAsyncioTestCase, main
+
+from ffstreamer.aio.stage_queue import StageQueue
+from ffstreamer.sync.overflow import (
+    OVERFLOW_BLOCK,
+    OVERFLOW_DROP_NEWEST,
+    OVERFLOW_DROP_OLDEST,
+)
+
+
+class StageQueueTestCase(IsolatedAsyncioTestCase):
+    async def test_block(self):
+        queue = StageQueue[int](2, OVERFLOW_BLOCK)
+        self.assertTrue(await queue.put(0))
+        self.assertTrue(await queue.put(1))
+
+        blocked = create_task(queue.put(2))
+        await sleep(0)
+        self.assertFalse(blocked.done())
+        self.assertEqual(0, await queue.get())
+        self.assertTrue(await wait_for(blocked, 1))
+
+        self.assertEqual(1, await queue.get())
+        self.assertEqual(2, await queue.get())
+        self.assertEqual(0, queue.dropped)
+
+    async def test_drop_newest(self):
+        queue = StageQueue[int](2, OVERFLOW_DROP_NEWEST)
+        for i in range(4):
+            await queue.put(i)
+        self.assertEqual(2, queue.dropped)
+        self.assertEqual(0, await queue.get())
+        self.assertEqual(1, await queue.get())
+
+    async def test_drop_oldest(self):
+        queue = StageQueue[int](2, OVERFLOW_DROP_OLDEST)
+        for i in range(4):
+            await queue.put(i)
+        self.assertEqual(2, queue.dropped)
+        self.assertEqual(2, await queue.get())
+        self.assertEqual(3, await queue.get())
+
+    async def test_close(self):
+        queue = StageQueue[int](1, OVERFLOW_BLOCK)
+        await queue.put(0)
+        blocked_put = create_task(queue.put(1))
+        await sleep(0)
+
+        await queue.close()
+        self.assertFalse(await wait_for(blocked_put, 1))
+        self.assertFalse(await queue.put(2))
+        self.assertEqual(0, await queue.get())
+        self.assertIsNone(await queue.get())
+
+        queue = StageQueue[int](1, OVERFLOW_BLOCK)
+        blocked_get = create_task(queue.get())
+        await sleep(0)
+        await queue.close()
+        self.assertIsNone(await wait_for(blocked_get, 1))
+
+    def test_arguments(self):
+        with self.assertRaises(ValueError):
+            StageQueue(0)
+        with self.assertRaises(ValueError):
+            StageQueue(1, "unknown")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+from asyncio import sleep, wait_for
+from typing import Any, Awaitable, Callable, List, Optional, Sequence
+from unittest import main
+from unittest.mock import patch
+
+from ffstreamer.apps.pipe import PipeApp, group_module_stages
+from ffstreamer.module.module import Module
+from ffstreamer.module.module_executor import (
+    EXECUTOR_INLINE,
+    EXECUTOR_PROCESS,
+    EXECUTOR_THREAD,
+    create_module_executor,
+)
+from ffstreamer.sync.overflow import OVERFLOW_DROP_OLDEST
+from tester.unittest.module_test_case import ModuleIsolatedAsyncioTestCase
+
+_WIDTH = 4
+_HEIGHT = 1
+_FRAME_SIZE = _WIDTH * _HEIGHT * 3  # bgr24
+_MODULE = "test_frame"
+
+_SOURCE_SIZE = "ffstreamer.apps.pipe.inspect_source_size"
+_BITS_PER_PIXEL = "ffstreamer.apps.pipe.find_bits_per_pixel"
+
+
+def make_frame(index: int, delay=0, fail=False) -> bytes:
+    """
+    The format of the `ffstreamer_test_frame` module.
+    """
+    return bytes([index, delay, int(fail)] * (_FRAME_SIZE // 3))
+
+
+class _FakeProcess:
+    returncode: Optional[int] = None
+
+
+class _FakeReceiver:
+    """
+    Writes each frame into a ring of buffers, as the `readinto` reader does.
+    """
+
+    def __init__(
+        self,
+        frames: Sequence[bytes],
+        frame_callback: Callable[[Optional[memoryview]], Awaitable[Any]],
+        ring_size: int,
+        interval: Optional[float] = None,
+    ):
+        self.process = _FakeProcess()
+        self.frame_index = 0
+        self.interrupted = False
+        self._frames = frames
+        self._frame_callback = frame_callback
+        self._ring = [memoryview(bytearray(_FRAME_SIZE)) for _ in range(ring_size)]
+        self._interval = interval
+
+    def is_overwritten(self, frame_index: int) -> bool:
+        return self.frame_index - frame_index >= len(self._ring)
+
+    def interrupt(self) -> None:
+        self.interrupted = True
+
+    async def open(self) -> None:
+        pass
+
+    async def wait(self) -> None:
+        for frame in self._frames:
+            if self.interrupted:
+                break
+            buffer = self._ring[self.frame_index % len(self._ring)]
+            buffer[:] = frame
+            await self._frame_callback(buffer)
+            self.frame_index += 1
+            if self._interval is not None:
+                await sleep(self._interval)
+        self.process.returncode = 0
+        await self._frame_callback(None)
+
+
+class _FakeSender:
+    def __init__(self):
+        self.frames: List[bytes] = list()
+
+    async def open(self) -> None:
+        pass
+
+    async def write_frame(self, data) -> None:
+        self.frames.append(bytes(data))
+
+    async def drain(self) -> None:
+        pass
+
+    def interrupt(self) -> None:
+        pass
+
+    async def wait(self) -> None:
+        pass
+
+
+class PipeAppTestCase(ModuleIsolatedAsyncioTestCase):
+    def create_app(
+        self,
+        frames: Sequence[bytes],
+        *pipeline: str,
+        ring_size: Optional[int] = None,
+        interval: Optional[float] = None,
+        **kwargs,
+    ) -> PipeApp:
+        with patch(_SOURCE_SIZE, return_value=(_WIDTH, _HEIGHT)):
+            with patch(_BITS_PER_PIXEL, return_value=24):
+                app = PipeApp(
+                    "source",
+                    "destination",
+                    *(pipeline if pipeline else (_MODULE,)),
+                    pixel_format="bgr24",
+                    file_format="rawvideo",
+                    **kwargs,
+                )
+        if ring_size is None:
+            ring_size = app._receiver._ring_size
+        self.receiver = _FakeReceiver(frames, app.on_frame, ring_size, interval)
+        self.sender = _FakeSender()
+        app._receiver = self.receiver  # type: ignore[assignment]
+        app._sender = self.sender  # type: ignore[assignment]
+        return app
+
+    async def run_app(self, app: PipeApp) -> None:
+        await wait_for(app.run_until_complete(), 10)
+
+    def test_group_module_stages(self):
+        name = self.ffstreamer_test_frame
+        modes = [
+            EXECUTOR_INLINE,
+            EXECUTOR_INLINE,
+            EXECUTOR_THREAD,
+            EXECUTOR_INLINE,
+            EXECUTOR_PROCESS,
+        ]
+        executors = [create_module_executor(Module(name), m, 3) for m in modes]
+        stages = group_module_stages(executors)
+        self.assertEqual(
+            [executors[:2], executors[2:3], executors[3:4], executors[4:]],
+            [list(stage.executors) for stage in stages],
+        )
+        self.assertEqual([1, 3, 1, 3], [stage.concurrency for stage in stages])
+
+    async def test_in_order(self):
+        frames = [make_frame(i) for i in range(8)]
+        app = self.create_app(frames, _MODULE, "!", _MODULE)
+        await self.run_app(app)
+        self.assertEqual(frames, self.sender.frames)
+        self.assertEqual(0, app.late_frames)
+
+    async def test_late_frames(self):
+        # The receiver does not yield, so it reads every frame before the first
+        # stage runs and the ring has been reused for all but the last two.
+        frames = [make_frame(i) for i in range(4)]
+        app = self.create_app(frames, ring_size=2, queue_size=4)
+        await self.run_app(app)
+        self.assertEqual(frames[3:], self.sender.frames)
+        self.assertEqual(3, app.late_frames)
+
+    async def test_module_error(self):
+        frames = [make_frame(i, fail=(i == 2)) for i in range(50)]
+        app = self.create_app(frames, interval=0.01)
+        await self.run_app(app)
+        self.assertTrue(self.receiver.interrupted)
+        self.assertLess(self.receiver.frame_index, len(frames))
+        self.assertEqual(frames[:2], self.sender.frames)
+        self.assertTrue(all(queue.closed for queue in app._queues))
+
+    async def test_pooled_in_order(self):
+        # Earlier frames take longer, so the pool finishes them out of order.
+        frames = [make_frame(i, delay=(3 - i % 3) * 2) for i in range(9)]
+        for mode in (EXECUTOR_THREAD, EXECUTOR_PROCESS):
+            with self.subTest(mode=mode):
+                app = self.create_app(frames, executors={_MODULE: mode})
+                await self.run_app(app)
+                self.assertEqual(frames, self.sender.frames)
+                self.assertEqual(0, app.late_frames)
+
+    async def test_pooled_late_frame(self):
+        # The thread still reads frame #0 when its ring buffer takes frame #2,
+        # so the result is torn and must not be written.
+        frames = [make_frame(0, delay=20)] + [make_frame(i) for i in range(1, 4)]
+        app = self.create_app(
+            frames,
+            executors={_MODULE: EXECUTOR_THREAD},
+            ring_size=2,
+            interval=0.02,
+            queue_size=4,
+            overflow=OVERFLOW_DROP_OLDEST,
+        )
+        await self.run_app(app)
+        self.assertLessEqual(1, app.late_frames)
+        self.assertEqual(len(frames), len(self.sender.frames) + app.late_frames)
+        for frame in self.sender.frames:
+            self.assertEqual(frames[frame[0]], frame)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+import sys
+from unittest import IsolatedAsyncioTestCase, main
+
+from ffstreamer.ffmpeg.ffmpeg_receiver import (
+    RECEIVER_READER_READINTO,
+    RECEIVER_READER_STREAM,
+    FFmpegReceiver,
+)
+
+_WRITER_SCRIPT = "import sys; sys.stdout.buffer.write(bytes(range(24)))"
+
+
+class FFmpegReceiverTestCase(IsolatedAsyncioTestCase):
+    async def receive(self, reader: str):
+        frames = list()
+
+        async def _on_frame(data):
+            frames.append(None if data is None else bytes(data))
+
+        receiver = FFmpegReceiver(
+            8,
+            _on_frame,
+            "-c",
+            _WRITER_SCRIPT,
+            ffmpeg_path=sys.executable,
+            reader=reader,
+            ring_size=2,
+        )
+        await receiver.open()
+        await receiver.wait()
+        self.assertEqual(3, receiver.frame_index)
+        self.assertFalse(receiver.is_overwritten(2))
+        self.assertEqual(reader == RECEIVER_READER_READINTO, receiver.is_overwritten(1))
+        return frames
+
+    async def test_readers(self):
+        expected = [bytes(range(0, 8)), bytes(range(8, 16)), bytes(range(16, 24))]
+        expected.append(None)
+        self.assertEqual(expected, await self.receive(RECEIVER_READER_READINTO))
+        self.assertEqual(expected, await self.receive(RECEIVER_READER_STREAM))
+
+    def test_unknown_reader(self):
+        with self.assertRaises(ValueError):
+            FFmpegReceiver(8, None, reader="unknown")  # type: ignore[arg-type]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+from tempfile import TemporaryDirectory
+from unittest import IsolatedAsyncioTestCase, main
+
+import numpy as np
+
+from ffstreamer.ffmpeg.ffmpeg_sender import (
+    SENDER_WRITER_STREAM,
+    SENDER_WRITER_WRITEV,
+    FFmpegSender,
+)
+
+_READER_SCRIPT = "import sys; open(sys.argv[1], 'wb').write(sys.stdin.buffer.read())"
+
+
+class FFmpegSenderTestCase(IsolatedAsyncioTestCase):
+    async def send(self, writer: str) -> bytes:
+        frame = np.arange(24, dtype=np.uint8).reshape(2, 4, 3)
+        with TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "output")
+            sender = FFmpegSender(
+                "-c",
+                _READER_SCRIPT,
+                path,
+                ffmpeg_path=sys.executable,
+                writer=writer,
+            )
+            self.assertEqual(writer, sender.writer)
+            await sender.open()
+            try:
+                await sender.write_frame(frame)
+                await sender.write_frame(memoryview(frame.tobytes())[8:])
+                await sender.drain()
+            finally:
+                if writer == SENDER_WRITER_STREAM:
+                    sender.stdin.close()
+                await sender.wait()
+            with open(path, "rb") as f:
+                return f.read()
+
+    async def test_writers(self):
+        expected = bytes(range(24)) + bytes(range(8, 24))
+        self.assertEqual(expected, await self.send(SENDER_WRITER_WRITEV))
+        self.assertEqual(expected, await self.send(SENDER_WRITER_STREAM))
+
+    def test_unknown_writer(self):
+        with self.assertRaises(ValueError):
+            FFmpegSender(writer="unknown")
+
+
+if __name__ == "__main__":
+    main()
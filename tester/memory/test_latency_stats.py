@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase, main
+
+from ffstreamer.memory.latency_stats import LatencyTelemetry
+from ffstreamer.memory.spsc_stats import wait_percentile
+
+
+class LatencyStatsTestCase(TestCase):
+    def test_default(self):
+        telemetry = LatencyTelemetry()
+        self.assertEqual(0, telemetry.snapshot().frames)
+        self.assertEqual(0.0, telemetry.snapshot().mean_ns)
+
+        telemetry.add(1000)
+        telemetry.add(3000)
+        telemetry.add(-5)
+        stats = telemetry.snapshot()
+        self.assertEqual(3, stats.frames)
+        self.assertEqual(4000, stats.total_ns)
+        self.assertEqual(3000, stats.max_ns)
+        self.assertEqual(0, stats.last_ns)
+        self.assertEqual(4096, wait_percentile(stats.histogram, 99))
+
+
+if __name__ == "__main__":
+    main()
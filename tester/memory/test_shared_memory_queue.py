@@ -1,9 +1,19 @@
 # -*- coding: utf-8 -*-
 
+from ctypes import c_uint8
 from multiprocessing.shared_memory import SharedMemory
+from multiprocessing.sharedctypes import RawArray
+from time import monotonic
 from unittest import TestCase, main
 
-from ffstreamer.memory.shared_memory_queue import SharedMemoryQueue
+from numpy import arange, full, uint8
+
+from ffstreamer.memory.shared_memory_queue import (
+    SharedMemoryQueue,
+    Written,
+    size_class,
+)
+from ffstreamer.np.buffer import as_byte_array
 
 
 class SharedMemoryQueueTestCase(TestCase):
@@ -64,6 +74,114 @@ class SharedMemoryQueueTestCase(TestCase):
         self.assertEqual(1, self.smq.size_waiting())
         self.assertEqual(0, self.smq.size_working())
 
+    def test_size_class(self):
+        self.assertEqual(4096, size_class(1))
+        self.assertEqual(4096, size_class(4096))
+        self.assertEqual(8192, size_class(4097))
+        self.assertEqual(16, size_class(9, minimum=4))
+
+    def test_pooling(self):
+        self.smq.preallocate(2, 5000)
+        self.assertEqual(2, self.smq.size_waiting())
+
+        small = self.smq.write(b"a" * 100)
+        large0 = self.smq.write(b"b" * 6000)
+        large1 = self.smq.write(b"c" * 7000)
+        self.assertEqual(0, self.smq.size_waiting())
+
+        stats = self.smq.stats()
+        self.assertEqual(2, stats.hits)
+        self.assertEqual(1, stats.misses)
+        self.assertEqual(0, stats.waiting_bytes)
+        self.assertEqual(4096 + 8192 * 2, stats.working_bytes)
+
+        self.smq.restore(small.sm_name)
+        self.smq.restore(large0.sm_name)
+        self.smq.restore(large1.sm_name)
+        self.assertEqual(4096 + 8192 * 2, self.smq.stats().held_bytes)
+
+        reused = self.smq.write(b"d" * 8000)
+        self.assertEqual(large1.sm_name, reused.sm_name)
+        self.assertEqual(3, self.smq.stats().hits)
+
+    def test_eviction(self):
+        smq = SharedMemoryQueue(max_queue=1, idle_timeout=60.0)
+        try:
+            names = [smq.write(b"a").sm_name, smq.write(b"b" * 5000).sm_name]
+            for name in names:
+                smq.restore(name)
+            self.assertEqual(1, smq.size_waiting())
+            self.assertEqual(1, smq.stats().evictions)
+            self.assertEqual(8192, smq.stats().waiting_bytes)
+
+            self.assertEqual(0, smq.evict())
+            self.assertEqual(1, smq.evict(now=monotonic() + 120.0))
+            self.assertEqual(0, smq.size_waiting())
+        finally:
+            smq.clear()
+
+    def test_eviction_after_hit(self):
+        for smq in (
+            SharedMemoryQueue(idle_timeout=10.0),
+            SharedMemoryQueue(max_queue=1),
+        ):
+            try:
+                smq.restore(smq.write(b"a").sm_name)
+                small = smq.write(b"b")
+                self.assertEqual(1, smq.stats().hits)
+                self.assertEqual(0, smq.size_waiting())
+
+                large = smq.write(b"c" * 5000)
+                smq.restore(large.sm_name)
+                smq.restore(small.sm_name)
+                self.assertEqual(2 if smq.max_queue == 0 else 1, smq.size_waiting())
+            finally:
+                smq.clear()
+
+    def test_write_buffers(self):
+        image = arange(12, dtype=uint8).reshape(3, 4)
+        raw = RawArray(c_uint8, [7, 8])
+
+        for data in (image, memoryview(image), image[:, :2], raw, bytearray(b"xy")):
+            written = self.smq.write(data, offset=1)
+            expected = as_byte_array(data).tobytes()
+            self.assertEqual(len(expected), written.size)
+            result = self.smq.read(written.sm_name, offset=1, size=written.size)
+            self.assertEqual(expected, result)
+            self.smq.restore(written.sm_name)
+
+    def test_writev(self):
+        y = full((2, 4), 1, dtype=uint8)
+        u = full((1, 2), 2, dtype=uint8)
+        v = full((1, 2), 3, dtype=uint8)
+
+        packed = self.smq.writev([y, u, v], offset=2)
+        self.assertEqual(Written(packed.sm_name, 2, 14), packed)
+        result = self.smq.read(packed.sm_name, offset=2, size=packed.size)
+        self.assertEqual(bytes([1] * 8 + [2] * 2 + [3] * 2), result)
+
+        placed = self.smq.writev([u, v], offsets=[4, 0])
+        self.assertEqual(Written(placed.sm_name, 0, 6), placed)
+        result = self.smq.read(placed.sm_name, size=placed.size)
+        self.assertEqual(bytes([3, 3, 0, 0, 2, 2]), result[:2] + bytes(2) + result[4:])
+
+        with self.assertRaises(ValueError):
+            self.smq.writev([u, v], offsets=[0])
+        with self.assertRaises(ValueError):
+            self.smq.writev([])
+
+    def test_read_written_length(self):
+        written = self.smq.write(b"abc", offset=1)
+        self.assertEqual(b"\x00abc", self.smq.read(written.sm_name))
+        self.assertEqual(b"bc", self.smq.read(written.sm_name, offset=2))
+        self.assertEqual(b"abc", self.smq.read(written))
+        self.assertEqual(b"b", self.smq.read(written, offset=1, size=1))
+        self.smq.restore(written.sm_name)
+
+        with self.smq.rent(3) as sm:
+            self.assertEqual(sm.name, written.sm_name)
+            self.assertEqual(4096, len(self.smq.read(sm.name)))
+
 
 if __name__ == "__main__":
     main()
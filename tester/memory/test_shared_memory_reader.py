@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase, main
+
+from ffstreamer.memory.shared_memory_queue import SharedMemoryQueue
+from ffstreamer.memory.shared_memory_reader import SharedMemoryReader
+
+
+class SharedMemoryReaderTestCase(TestCase):
+    def setUp(self):
+        self.smq = SharedMemoryQueue()
+        self.reader = SharedMemoryReader(max_size=2)
+
+    def tearDown(self):
+        self.reader.clear()
+        self.smq.clear()
+
+    def test_cache(self):
+        names = [self.smq.write(bytes([i, i, i])).sm_name for i in range(3)]
+
+        self.assertEqual(bytes([0, 0, 0]), self.reader.read(names[0], size=3))
+        self.assertIs(self.reader.attach(names[0]), self.reader.attach(names[0]))
+        self.assertEqual(1, len(self.reader))
+
+        self.assertEqual(bytes([1, 1]), self.reader.read(names[1], offset=1, size=2))
+        self.assertEqual(bytes([2, 2, 2]), self.reader.read(names[2], size=3))
+        self.assertEqual(2, len(self.reader))
+        self.assertNotIn(names[0], self.reader)
+
+        self.assertTrue(self.reader.invalidate(names[1]))
+        self.assertFalse(self.reader.invalidate(names[1]))
+        self.assertEqual(1, len(self.reader))
+
+        with self.assertRaises(ValueError):
+            self.reader.read(names[2], size=0)
+
+    def test_views(self):
+        written = self.smq.write(bytes([1, 2, 3, 4]))
+
+        view = self.reader.read_view(written.sm_name, offset=1, size=2)
+        self.assertEqual(bytes([2, 3]), view.tobytes())
+
+        image = self.reader.read_ndarray(written.sm_name, (2, 2))
+        self.assertListEqual([[1, 2], [3, 4]], image.tolist())
+
+        self.smq.find_working(written.sm_name).buf[0] = 9
+        self.assertEqual(9, image[0, 0])
+
+        self.reader.clear()
+        self.assertEqual(0, len(self.reader))
+        del view
+        del image
+        self.reader.clear()
+
+    def test_read_written(self):
+        written = self.smq.write(bytes([1, 2, 3]), offset=1)
+        self.assertEqual(bytes([1, 2, 3]), self.reader.read(written))
+        self.assertEqual(bytes([2, 3]), self.reader.read(written, offset=1))
+        self.assertEqual(bytes([2]), self.reader.read_view(written, 1, 1).tobytes())
+        self.assertEqual(4096, len(self.reader.read(written.sm_name)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+from multiprocessing import Process, Queue
+from queue import Empty, Full
+from unittest import TestCase, main
+
+from ffstreamer.memory.spmc_queue import SpmcQueue, SpmcSubscriber
+from ffstreamer.sync.overflow import OVERFLOW_DROP_NEWEST, OVERFLOW_DROP_OLDEST
+
+
+def on_subscriber(subscriber: SpmcSubscriber, count: int, result: Queue) -> None:
+    total = 0
+    for _ in range(count):
+        total += int.from_bytes(subscriber.get(), "little")
+    result.put((subscriber.subscriber, total))
+
+
+class SpmcQueueTestCase(TestCase):
+    def test_broadcast(self):
+        queue = SpmcQueue(2, 2, 4)
+        producer = queue.producer
+        first, second = queue.subscribers
+
+        producer.put(b"a")
+        producer.put(b"b")
+        self.assertTrue(producer.full)
+        with self.assertRaises(Full):
+            producer.put(b"c", timeout=0.01)
+
+        self.assertEqual(b"a", first.get())
+        self.assertEqual(b"b", first.get())
+        with self.assertRaises(Full):
+            producer.put(b"c", timeout=0.01)
+
+        with second.lease() as lease:
+            self.assertTrue(lease.valid)
+            self.assertEqual(b"a", lease.data.tobytes())
+        producer.put(b"c", timeout=0.01)
+
+        self.assertEqual(b"b", second.get())
+        self.assertEqual(b"c", second.get())
+        self.assertEqual(b"c", first.get())
+        with self.assertRaises(Empty):
+            first.get(timeout=0.01)
+
+        first_stats, second_stats = queue.stats()
+        self.assertEqual(3, first_stats.puts)
+        self.assertEqual(3, second_stats.puts)
+
+    def test_drop_oldest(self):
+        queue = SpmcQueue(2, 2, 4, overflow=OVERFLOW_DROP_OLDEST)
+        producer = queue.producer
+        fast, slow = queue.subscribers
+
+        for data in (b"1", b"2", b"3", b"4"):
+            producer.put_nowait(data)
+            self.assertEqual(data, fast.get(timeout=0.01))
+
+        lease = slow.lease(timeout=0.01)
+        self.assertEqual(b"3", lease.data.tobytes())
+        producer.put_nowait(b"5")
+        self.assertFalse(lease.valid)
+        lease.release()
+
+        self.assertEqual(b"5", fast.get(timeout=0.01))
+        self.assertEqual(b"4", slow.get(timeout=0.01))
+        self.assertEqual(b"5", slow.get(timeout=0.01))
+
+        fast_stats, slow_stats = queue.stats()
+        self.assertEqual(0, fast_stats.drops)
+        self.assertEqual(3, slow_stats.drops)
+        self.assertEqual(2, slow_stats.skips)
+
+    def test_overflow_policy(self):
+        with self.assertRaises(ValueError):
+            SpmcQueue(1, overflow=OVERFLOW_DROP_NEWEST)
+
+    def test_subprocess(self):
+        count = 200
+        queue = SpmcQueue(3, 4, 4)
+        result: Queue = Queue()
+        processes = [
+            Process(target=on_subscriber, args=(subscriber, count, result))
+            for subscriber in queue.subscribers
+        ]
+        for process in processes:
+            process.start()
+        for i in range(count):
+            queue.producer.put(i.to_bytes(4, "little"))
+        totals = dict(result.get(timeout=8.0) for _ in processes)
+        for process in processes:
+            process.join()
+
+        expected = sum(range(count))
+        self.assertEqual({0: expected, 1: expected, 2: expected}, totals)
+
+
+if __name__ == "__main__":
+    main()
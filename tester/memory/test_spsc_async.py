@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+from asyncio import gather, sleep
+from queue import Empty, Full
+from unittest import IsolatedAsyncioTestCase, main
+
+from ffstreamer.memory.spsc_queue import SPSC_TRANSPORT_RING, SpscQueue
+
+
+class SpscAsyncTestCase(IsolatedAsyncioTestCase):
+    async def test_aget(self):
+        queue = SpscQueue(1, 4)
+        with self.assertRaises(Empty):
+            await queue.consumer.aget(timeout=0.01)
+
+        async def _put_later():
+            await sleep(0.01)
+            queue.producer.put(b"abc")
+
+        result, _ = await gather(queue.consumer.aget(timeout=8.0), _put_later())
+        self.assertEqual(b"abc", result)
+        self.assertEqual(2, queue.stats().get_waits)
+        self.assertEqual(1, queue.stats().empties)
+
+    async def test_aput(self):
+        queue = SpscQueue(1, 4)
+        await queue.producer.aput(b"1")
+        with self.assertRaises(Full):
+            await queue.producer.aput(b"2", timeout=0.01)
+
+        async def _get_later():
+            await sleep(0.01)
+            return queue.consumer.get()
+
+        _, first = await gather(queue.producer.aput(b"2", timeout=8.0), _get_later())
+        self.assertEqual(b"1", first)
+
+        with await queue.consumer.alease(timeout=8.0) as lease:
+            self.assertEqual(b"2", lease.data.tobytes())
+
+        with await queue.producer.areserve(timeout=8.0) as slot:
+            slot.view((1,))[0] = 3
+        with await queue.consumer.alease() as lease:
+            self.assertEqual(b"\x03", lease.data.tobytes())
+
+    async def test_ring(self):
+        queue = SpscQueue(1, 4, SPSC_TRANSPORT_RING)
+        with self.assertRaises(TypeError):
+            await queue.consumer.aget(timeout=0.01)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,17 @@
 # -*- coding: utf-8 -*-
 
+from fractions import Fraction
 from multiprocessing import Process
+from queue import Empty, Full
 from time import sleep
 from unittest import TestCase, main
 
-from ffstreamer.memory.spsc_queue import SpscQueue, SpscQueueProducer
+from ffstreamer.memory.spsc_header import SpscMeta
+from ffstreamer.memory.spsc_queue import (
+    SPSC_TRANSPORTS,
+    SpscQueue,
+    SpscQueueProducer,
+)
 
 
 def on_subprocess(producer: SpscQueueProducer) -> None:
@@ -28,6 +35,98 @@ class SpscQueueTestCase(TestCase):
 
         process.join()
 
+    def test_lease(self):
+        queue = SpscQueue(1, 4)
+        queue.producer.put(bytes([1, 2, 3, 4]))
+
+        with queue.consumer.lease() as lease:
+            self.assertEqual(0, lease.index)
+            self.assertEqual(bytes([1, 2, 3, 4]), lease.data.tobytes())
+            self.assertTupleEqual((2, 2), lease.view((2, 2)).shape)
+
+            queue.producer.pull_nowait()
+            self.assertTrue(queue.producer.full)
+            with self.assertRaises(Full):
+                queue.producer.put(bytes([5, 6, 7, 8]), timeout=0.01)
+
+        self.assertTrue(lease.released)
+        with self.assertRaises(BufferError):
+            _ = lease.data
+
+        queue.producer.put(bytes([5, 6, 7, 8]), timeout=1.0)
+        self.assertEqual(bytes([5, 6, 7, 8]), queue.consumer.get())
+
+    def test_reserve(self):
+        queue = SpscQueue(1, 4)
+
+        with queue.producer.reserve() as slot:
+            self.assertEqual(0, slot.index)
+            slot.view((2, 2))[:] = [[1, 2], [3, 4]]
+            self.assertTrue(queue.producer.full)
+
+        self.assertTrue(slot.finished)
+        self.assertEqual(bytes([1, 2, 3, 4]), queue.consumer.get())
+
+        slot = queue.producer.reserve(timeout=1.0)
+        slot.cancel()
+        self.assertFalse(queue.producer.full)
+        with self.assertRaises(Empty):
+            queue.consumer.get(timeout=0.01)
+
+    def test_many(self):
+        for transport in SPSC_TRANSPORTS:
+            queue = SpscQueue(4, 1, transport)
+            items = [bytes([i]) for i in range(6)]
+
+            self.assertEqual(4, queue.producer.put_many(items))
+            self.assertTrue(queue.producer.full)
+            with self.assertRaises(Full):
+                queue.producer.put_many(items[4:], timeout=0.01)
+
+            self.assertListEqual(items[:3], queue.consumer.get_many(3))
+            self.assertEqual(2, queue.producer.put_many(items[4:], timeout=1.0))
+            self.assertListEqual(items[3:6], queue.consumer.get_many(8))
+            with self.assertRaises(Empty):
+                queue.consumer.get_many(8, timeout=0.01)
+
+    def test_latest(self):
+        for transport in SPSC_TRANSPORTS:
+            queue = SpscQueue(4, 1, transport)
+            queue.producer.put_many([bytes([i]) for i in range(4)])
+
+            self.assertEqual(bytes([3]), queue.consumer.get_latest(timeout=1.0))
+            self.assertEqual(4, queue.producer.put_many([bytes([9])] * 4))
+            queue.consumer.pull_nowait()
+            self.assertEqual(bytes([9]), queue.consumer.get_latest_nowait())
+
+    def test_meta(self):
+        queue = SpscQueue(2, 8)
+        meta = SpscMeta(
+            frame_index=7,
+            pts=3003,
+            dts=None,
+            time_base=Fraction(1, 30000),
+            capture_time=123456789,
+            pixel_format="bgr24",
+        )
+
+        queue.producer.put(bytes([1, 2, 3]), begin=2, meta=meta)
+        with queue.consumer.lease() as lease:
+            self.assertEqual(bytes([1, 2, 3]), lease.data.tobytes())
+            self.assertEqual(meta, lease.meta)
+
+        with queue.producer.reserve() as slot:
+            slot.view((2,))[:] = [4, 5]
+        self.assertEqual(bytes([4, 5]), queue.consumer.get())
+
+        queue.producer.put(bytes([6]))
+        with queue.consumer.lease() as lease:
+            self.assertEqual(SpscMeta(), lease.meta)
+
+        with self.assertRaises(BufferError):
+            queue.producer.put(bytes(9))
+        self.assertEqual(2, queue.producer.put_many([bytes(1), bytes(1)]))
+
 
 if __name__ == "__main__":
     main()
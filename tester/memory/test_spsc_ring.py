@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+from multiprocessing import Process
+from time import perf_counter
+from unittest import TestCase, main, skip
+
+from ffstreamer.memory.spsc_queue import (
+    SPSC_TRANSPORT_PIPE,
+    SPSC_TRANSPORT_RING,
+    SpscQueue,
+    SpscQueueProducer,
+)
+from ffstreamer.memory.spsc_ring import SpscRing
+
+
+def on_subprocess(producer: SpscQueueProducer, count: int) -> None:
+    for i in range(count):
+        producer.put(i.to_bytes(4, "little"))
+
+
+def measure_frames_per_second(transport: str, count: int, item_size: int) -> float:
+    queue = SpscQueue(8, item_size, transport)
+    process = Process(target=on_subprocess, args=(queue.producer, count))
+    begin = perf_counter()
+    process.start()
+    for _ in range(count):
+        queue.consumer.get()
+    elapsed = perf_counter() - begin
+    process.join()
+    return count / elapsed
+
+
+class SpscRingTestCase(TestCase):
+    def test_default(self):
+        ring = SpscRing(2)
+        self.assertEqual(2, ring.capacity)
+        self.assertFalse(ring.poll())
+
+        ring.send(10)
+        ring.send(20)
+        self.assertEqual(2, ring.qsize())
+        self.assertTrue(ring.poll())
+        self.assertEqual(10, ring.recv())
+        self.assertEqual(20, ring.recv())
+        self.assertFalse(ring.poll(0.01))
+
+        ring.send(30)
+        self.assertEqual(30, ring.recv())
+        self.assertEqual(3, ring.head)
+        self.assertEqual(3, ring.tail)
+
+    def test_subprocess(self):
+        count = 1000
+        queue = SpscQueue(8, 4, SPSC_TRANSPORT_RING)
+        self.assertEqual(SPSC_TRANSPORT_RING, queue.transport)
+        process = Process(target=on_subprocess, args=(queue.producer, count))
+        process.start()
+
+        for i in range(count):
+            data = queue.consumer.get(timeout=8.0)
+            self.assertEqual(i, int.from_bytes(data, "little"))
+
+        process.join()
+
+    def test_unknown_transport(self):
+        with self.assertRaises(ValueError):
+            SpscQueue(1, 4, "unknown")
+
+    @skip(reason="Too slow")
+    def test_benchmark(self):
+        count = 100000
+        item_size = 64
+        pipe_fps = measure_frames_per_second(SPSC_TRANSPORT_PIPE, count, item_size)
+        ring_fps = measure_frames_per_second(SPSC_TRANSPORT_RING, count, item_size)
+        print(f"\npipe: {pipe_fps:.0f} fps, ring: {ring_fps:.0f} fps")
+        self.assertGreater(ring_fps, pipe_fps)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+from multiprocessing import Process
+from queue import Empty, Full
+from unittest import TestCase, main
+
+from ffstreamer.memory.spsc_queue import SpscQueue, SpscQueueProducer
+from ffstreamer.memory.spsc_stats import (
+    SPSC_WAIT_BUCKETS,
+    SpscTelemetry,
+    wait_bucket,
+    wait_percentile,
+)
+
+
+def on_subprocess(producer: SpscQueueProducer, count: int) -> None:
+    for i in range(count):
+        producer.put(i.to_bytes(4, "little"))
+    producer.count_drop(3)
+
+
+class SpscStatsTestCase(TestCase):
+    def test_wait_bucket(self):
+        self.assertEqual(0, wait_bucket(0))
+        self.assertEqual(1, wait_bucket(1))
+        self.assertEqual(2, wait_bucket(3))
+        self.assertEqual(11, wait_bucket(1024))
+        self.assertEqual(SPSC_WAIT_BUCKETS - 1, wait_bucket(2**60))
+
+    def test_wait_percentile(self):
+        histogram = [0] * SPSC_WAIT_BUCKETS
+        self.assertIsNone(wait_percentile(tuple(histogram), 50))
+        histogram[3] = 9
+        histogram[10] = 1
+        self.assertEqual(8, wait_percentile(tuple(histogram), 50))
+        self.assertEqual(8, wait_percentile(tuple(histogram), 90))
+        self.assertEqual(1024, wait_percentile(tuple(histogram), 99))
+
+    def test_telemetry(self):
+        telemetry = SpscTelemetry()
+        telemetry.count_put(3)
+        telemetry.count_get()
+        telemetry.count_put()
+        telemetry.add_put_wait(100)
+        telemetry.add_get_wait(5000)
+
+        stats = telemetry.snapshot()
+        self.assertEqual(4, stats.puts)
+        self.assertEqual(1, stats.gets)
+        self.assertEqual(3, stats.occupancy)
+        self.assertEqual(3, stats.max_occupancy)
+        self.assertEqual(100.0, stats.mean_put_wait_ns)
+        self.assertEqual(1, stats.put_wait_histogram[wait_bucket(100)])
+        self.assertEqual(1, stats.get_wait_histogram[wait_bucket(5000)])
+
+    def test_queue(self):
+        queue = SpscQueue(2, 4)
+        producer = queue.producer
+        consumer = queue.consumer
+
+        producer.put(b"1")
+        producer.put_many([b"2"])
+        with self.assertRaises(Full):
+            producer.put(b"3", timeout=0.01)
+        with consumer.lease() as lease:
+            self.assertEqual(b"1", lease.data.tobytes())
+        self.assertEqual(b"2", consumer.get())
+        with self.assertRaises(Empty):
+            consumer.get(timeout=0.01)
+
+        producer.put(b"4")
+        producer.put(b"5")
+        consumer.pull_nowait()
+        self.assertEqual(b"5", consumer.get_latest_nowait())
+        with self.assertRaises(Empty):
+            consumer.get_latest_nowait()
+
+        stats = queue.stats()
+        self.assertEqual(4, stats.puts)
+        self.assertEqual(4, stats.gets)
+        self.assertEqual(1, stats.skips)
+        self.assertEqual(1, stats.fulls)
+        self.assertEqual(2, stats.empties)
+        self.assertEqual(2, stats.max_occupancy)
+        self.assertEqual(1, stats.put_waits)
+        self.assertGreaterEqual(stats.put_wait_ns, 10_000_000)
+        self.assertEqual(1, stats.get_waits)
+        self.assertEqual(stats, producer.stats())
+        self.assertEqual(stats, consumer.stats())
+
+    def test_subprocess(self):
+        count = 100
+        queue = SpscQueue(4, 4)
+        process = Process(target=on_subprocess, args=(queue.producer, count))
+        process.start()
+        for _ in range(count):
+            queue.consumer.get()
+        process.join()
+
+        stats = queue.stats()
+        self.assertEqual(count, stats.puts)
+        self.assertEqual(count, stats.gets)
+        self.assertEqual(3, stats.drops)
+        self.assertLessEqual(stats.max_occupancy, 4)
+
+
+if __name__ == "__main__":
+    main()
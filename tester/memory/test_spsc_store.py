@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+from ctypes import addressof
+from multiprocessing import get_context
+from unittest import TestCase, main
+
+from ffstreamer.memory.spsc_queue import SpscQueue, SpscQueueProducer, SpscStore
+
+
+def on_spawned_subprocess(producer: SpscQueueProducer) -> None:
+    with producer.reserve() as slot:
+        slot.view((2, 2, 1))[:] = 7
+
+
+class SpscStoreTestCase(TestCase):
+    def test_layout(self):
+        store = SpscStore(3, 10, alignment=64)
+        self.assertEqual(3, store.maxsize)
+        self.assertEqual(10, store.item_size)
+        self.assertEqual(64, store.stride)
+
+        for i in range(store.maxsize):
+            view = store.view(i)
+            self.assertEqual(10, view.size)
+            self.assertEqual(0, view.ctypes.data % 64)
+
+        store.view(1)[:] = 1
+        self.assertEqual(0, store.view(0).sum())
+        self.assertEqual(0, store.view(2).sum())
+        self.assertEqual(0, addressof(store.header(0)) % 64)
+
+    def test_batch_view(self):
+        shape = 2, 3, 1
+        store = SpscStore(4, 6, alignment=16)
+        batch = store.batch_view(shape)
+        self.assertTupleEqual((4, 2, 3, 1), batch.shape)
+
+        for i in range(store.maxsize):
+            store.view(i)[:] = i
+        for i in range(store.maxsize):
+            self.assertTrue((batch[i] == i).all())
+
+        with self.assertRaises(BufferError):
+            store.batch_view((2, 4, 1))
+
+    def test_hugepages(self):
+        store = SpscStore(2, 10, hugepages=True)
+        self.assertEqual(0, store.view(0).ctypes.data % (2 * 1024 * 1024))
+        self.assertIsInstance(store.hugepages, bool)
+
+    def test_spawn(self):
+        queue = SpscQueue(2, 4)
+        process = get_context("spawn").Process(
+            target=on_spawned_subprocess,
+            args=(queue.producer,),
+        )
+        process.start()
+        self.assertEqual(bytes([7, 7, 7, 7]), queue.consumer.get(timeout=8.0))
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+from unittest import main
+
+import numpy as np
+
+from ffstreamer.module.module import Module
+from tester.unittest.module_test_case import ModuleIsolatedAsyncioTestCase
+
+_BYTES2NUMPY = "ffstreamer.module.defaults.bytes2numpy"
+_GRAYSCALE = "ffstreamer.module.defaults.grayscale"
+
+
+class DefaultsTestCase(ModuleIsolatedAsyncioTestCase):
+    async def run_module(self, name: str, data, pixel_format: str, width=6, height=4):
+        channels = 3 if pixel_format == "bgr24" else 1
+        module = Module(
+            name,
+            width=width,
+            height=height,
+            channels=channels,
+            pixel_format=pixel_format,
+            isolate=True,
+        )
+        await module.open()
+        try:
+            return await module.frame(data)
+        finally:
+            await module.close()
+
+    async def to_numpy(self, data: bytes, pixel_format: str, width=6, height=4):
+        return await self.run_module(_BYTES2NUMPY, data, pixel_format, width, height)
+
+    async def test_bgr24(self):
+        data = bytes(range(72))
+        frame = await self.to_numpy(data, "bgr24")
+        self.assertEqual((4, 6, 3), frame.shape)
+
+        gray = await Module(_GRAYSCALE).frame(frame)
+        self.assertEqual((4, 6, 3), gray.shape)
+        self.assertEqual(1, gray[0, 0, 2])
+
+    async def test_yuv420(self):
+        data = bytes(range(36))
+        for pixel_format in ("yuv420p", "nv12"):
+            with self.subTest(pixel_format=pixel_format):
+                frame = await self.to_numpy(data, pixel_format)
+                self.assertEqual((6, 6), frame.shape)
+                self.assertEqual(data, frame.tobytes())
+
+                gray = await Module(_GRAYSCALE).frame(frame)
+                self.assertTrue(np.array_equal(frame[:4], gray[:4]))
+                self.assertTrue(np.all(gray[4:] == 128))
+
+                gray = await self.run_module(_GRAYSCALE, frame, pixel_format)
+                self.assertTrue(np.array_equal(frame[:4], gray[:4]))
+                self.assertTrue(np.all(gray[4:] == 128))
+
+    async def test_yuv420p_odd_size(self):
+        # 5x3 luma and 3x2 chroma planes do not line up as rows; stays flat.
+        data = bytes(range(27))
+        frame = await self.to_numpy(data, "yuv420p", width=5, height=3)
+        self.assertEqual((27,), frame.shape)
+
+        gray = await self.run_module(_GRAYSCALE, frame, "yuv420p", 5, 3)
+        self.assertEqual((27,), gray.shape)
+        self.assertEqual(data[:15], gray[:15].tobytes())
+        self.assertTrue(np.all(gray[15:] == 128))
+
+        with self.assertRaises(ValueError):
+            await Module(_GRAYSCALE).frame(frame)
+
+
+if __name__ == "__main__":
+    main()
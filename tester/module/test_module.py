@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 from importlib import import_module
+from pickle import dumps, loads
 from sys import modules as sys_modules
 from unittest import main
 
@@ -55,6 +56,23 @@ class ModuleTestCase(ModuleIsolatedAsyncioTestCase):
         self.assertEqual("0.0.0", module.version)
         self.assertEqual("Documentation", module.doc)
 
+    def test_pickle(self):
+        module = Module(self.ffstreamer_test_default, False, 1, key="value")
+        copied = loads(dumps(module))
+        self.assertEqual(module.module_name, copied.module_name)
+        self.assertEqual((1,), copied._args)
+        self.assertEqual({"key": "value"}, copied._kwargs)
+        self.assertEqual(module.version, copied.version)
+        self.assertFalse(copied.opened)
+
+    def test_pickle_isolated(self):
+        module = Module(self.ffstreamer_test_default, isolate=True)
+        module.set("key3", 300)
+        copied = loads(dumps(module))
+        self.assertTrue(copied._isolate)
+        self.assertFalse(copied.has("key3"))
+        self.assertIsNot(sys_modules[self.ffstreamer_test_default], copied._module)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+from unittest import main
+
+import numpy as np
+
+from ffstreamer.module.errors import ModuleCallbackCoroutineError
+from ffstreamer.module.module import Module
+from ffstreamer.module.module_executor import (
+    EXECUTOR_INLINE,
+    EXECUTOR_PROCESS,
+    EXECUTOR_THREAD,
+    ModuleThreadExecutor,
+    create_module_executor,
+    parse_executor_options,
+)
+from tester.unittest.module_test_case import ModuleIsolatedAsyncioTestCase
+
+_GRAYSCALE = "ffstreamer.module.defaults.grayscale"
+_NUMPY2BYTES = "ffstreamer.module.defaults.numpy2bytes"
+
+
+class ModuleExecutorTestCase(ModuleIsolatedAsyncioTestCase):
+    def setUp(self):
+        super().setUp()
+        self.image = np.random.randint(0, 256, (16, 24, 3), dtype=np.uint8)
+        self.gray = Module(_GRAYSCALE).frame_sync(self.image)
+
+    def test_parse_executor_options(self):
+        options = ["a=thread", "@b=process", "c=d=inline"]
+        expected = {"a": "thread", "@b": "process", "c=d": "inline"}
+        self.assertEqual(expected, parse_executor_options(options))
+
+        with self.assertRaises(ValueError):
+            parse_executor_options(["thread"])
+        with self.assertRaises(ValueError):
+            parse_executor_options(["=thread"])
+        with self.assertRaises(ValueError):
+            parse_executor_options(["a=unknown"])
+
+    async def _run(self, module_name: str, mode: str, *frames):
+        executor = create_module_executor(Module(module_name), mode, workers=2)
+        self.assertEqual(mode, executor.mode)
+        await executor.open()
+        try:
+            return [await executor.frame(frame) for frame in frames]
+        finally:
+            await executor.close()
+
+    async def test_modes(self):
+        for mode in (EXECUTOR_INLINE, EXECUTOR_THREAD, EXECUTOR_PROCESS):
+            with self.subTest(mode=mode):
+                results = await self._run(_GRAYSCALE, mode, self.image, self.image)
+                for result in results:
+                    self.assertIsInstance(result, np.ndarray)
+                    self.assertTrue(np.array_equal(self.gray, result))
+
+    async def test_process_bytes(self):
+        results = await self._run(_NUMPY2BYTES, EXECUTOR_PROCESS, self.image[::2])
+        self.assertEqual([self.image[::2].tobytes()], results)
+
+    def test_coroutine_module(self):
+        module = Module(self.ffstreamer_test_default)
+        with self.assertRaises(ModuleCallbackCoroutineError):
+            ModuleThreadExecutor(module)
+        with self.assertRaises(ValueError):
+            create_module_executor(module, "unknown")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+
+from time import perf_counter
+from unittest import TestCase, main, skip
+
+from numpy import abs as np_abs
+from numpy import full, int32, rint, uint8, where, zeros
+from numpy.random import default_rng
+
+from ffstreamer.np.composite import BLEND_ALPHA, OverlayCompositor
+from ffstreamer.np.tiles import Rect
+
+
+def _reference(image, bgra):
+    return where(bgra[:, :, 3:] != 0, bgra[:, :, :3], image)
+
+
+def _blend_reference(image, bgra):
+    alpha = bgra[:, :, 3:].astype(float)
+    blended = (bgra[:, :, :3] * alpha + image * (255 - alpha)) / 255
+    return rint(blended).astype(int32)
+
+
+def update_frame(compositor: OverlayCompositor, bgra):
+    height, width, _ = bgra.shape
+    compositor.update_tiles([(Rect(0, 0, width, height), bgra)])
+
+
+def measure_seconds_per_frame(compositor: OverlayCompositor, image, count=10):
+    """
+    In place, as `PyavRouter` composites.
+    """
+    compositor.composite(image, image)
+    begin = perf_counter()
+    for _ in range(count):
+        compositor.composite(image, image)
+    return (perf_counter() - begin) / count
+
+
+class OverlayCompositorTestCase(TestCase):
+    def setUp(self):
+        self.shape = 48, 64, 3
+        self.rng = default_rng(0)
+        self.image = self.rng.integers(0, 256, self.shape, dtype=uint8)
+
+    def random_overlay(self, ratio: float):
+        height, width, _ = self.shape
+        bgra = self.rng.integers(0, 256, (height, width, 4), dtype=uint8)
+        bgra[:, :, 3] = (self.rng.random((height, width)) < ratio) * 255
+        return bgra
+
+    def assert_composite(self, compositor: OverlayCompositor, bgra):
+        expect = _reference(self.image, bgra)
+
+        out = zeros(self.shape, dtype=uint8)
+        self.assertIs(out, compositor.composite(self.image, out))
+        self.assertTrue((expect == out).all())
+
+        self.assertTrue((expect == compositor.composite(self.image)).all())
+
+        image = self.image.copy()
+        compositor.composite(image, image)
+        self.assertTrue((expect == image).all())
+
+    def test_empty(self):
+        compositor = OverlayCompositor(self.shape)
+        self.assertTrue(compositor.empty)
+        self.assertTrue((self.image == compositor.composite(self.image)).all())
+
+        bgra = self.random_overlay(0.0)
+        update_frame(compositor, bgra)
+        self.assertTrue(compositor.empty)
+        self.assert_composite(compositor, bgra)
+
+    def test_sparse(self):
+        compositor = OverlayCompositor(self.shape)
+        bgra = self.random_overlay(0.01)
+        update_frame(compositor, bgra)
+        self.assertFalse(compositor.empty)
+        self.assert_composite(compositor, bgra)
+
+    def test_dense(self):
+        compositor = OverlayCompositor(self.shape)
+        bgra = self.random_overlay(0.5)
+        update_frame(compositor, bgra)
+        self.assertEqual((bgra[:, :, 3] != 0).sum(), compositor.coverage)
+        self.assert_composite(compositor, bgra)
+
+    def test_full(self):
+        compositor = OverlayCompositor(self.shape)
+        bgra = self.random_overlay(1.0)
+        update_frame(compositor, bgra)
+        self.assertEqual(self.shape[0] * self.shape[1], compositor.coverage)
+        self.assert_composite(compositor, bgra)
+
+    def test_update_copies_overlay(self):
+        compositor = OverlayCompositor(self.shape)
+        bgra = self.random_overlay(0.5)
+        expect = _reference(self.image, bgra)
+        update_frame(compositor, bgra)
+        bgra.fill(0)
+        self.assertTrue((expect == compositor.composite(self.image)).all())
+
+
+class OverlayCompositorAlphaTestCase(TestCase):
+    def setUp(self):
+        self.shape = 24, 32, 3
+        self.rng = default_rng(2)
+        self.image = self.rng.integers(0, 256, self.shape, dtype=uint8)
+        self.bgra = self.rng.integers(0, 256, self.shape[:2] + (4,), dtype=uint8)
+
+    def assert_blended(self, expect, actual):
+        self.assertLessEqual(np_abs(expect - actual.astype(int32)).max(), 1)
+
+    def test_extremes_are_exact(self):
+        self.bgra[:, :16, 3] = 0
+        self.bgra[:, 16:, 3] = 255
+        self.bgra[0, 0, 3] = 128
+        compositor = OverlayCompositor(self.shape, BLEND_ALPHA)
+        update_frame(compositor, self.bgra)
+        out = compositor.composite(self.image)
+        self.assertTrue((out[1:, :16] == self.image[1:, :16]).all())
+        self.assertTrue((out[:, 16:] == self.bgra[:, 16:, :3]).all())
+
+    def test_update(self):
+        compositor = OverlayCompositor(self.shape, BLEND_ALPHA)
+        update_frame(compositor, self.bgra)
+        expect = _blend_reference(self.image, self.bgra)
+        self.assert_blended(expect, compositor.composite(self.image))
+
+        image = self.image.copy()
+        self.assert_blended(expect, compositor.composite(image, image))
+
+    def test_update_tiles(self):
+        rect = Rect(4, 2, 10, 6)
+        tile = self.bgra[rect.slices].copy()
+        compositor = OverlayCompositor(self.shape, BLEND_ALPHA)
+        compositor.update_tiles([(rect, tile)])
+
+        out = compositor.composite(self.image)
+        expect = self.image.astype(int32)
+        expect[rect.slices] = _blend_reference(self.image[rect.slices], tile)
+        self.assert_blended(expect, out)
+
+    def test_binary_ignores_alpha(self):
+        compositor = OverlayCompositor(self.shape)
+        update_frame(compositor, self.bgra)
+        expect = _reference(self.image, self.bgra)
+        self.assertTrue((expect == compositor.composite(self.image)).all())
+
+    def test_unsupported_mode(self):
+        with self.assertRaises(ValueError):
+            OverlayCompositor(self.shape, "unknown")
+
+    @skip(reason="Too slow")
+    def test_benchmark(self):
+        for name, shape in (("1080p", (1080, 1920, 3)), ("4K", (2160, 3840, 3))):
+            image = self.rng.integers(0, 256, shape, dtype=uint8)
+            bgra = full(shape[:2] + (4,), 128, dtype=uint8)
+
+            # A translucent 600x200 panel as a dirty tile, then the whole frame.
+            rect = Rect(100, 100, 600, 200)
+            panel = OverlayCompositor(shape, BLEND_ALPHA)
+            panel.update_tiles([(rect, bgra[rect.slices])])
+            whole = OverlayCompositor(shape, BLEND_ALPHA)
+            update_frame(whole, bgra)
+
+            panel_seconds = measure_seconds_per_frame(panel, image)
+            whole_seconds = measure_seconds_per_frame(whole, image)
+            print(
+                f"\n{name} alpha blend: panel {panel_seconds:.4f}s,"
+                f" whole frame {whole_seconds:.4f}s"
+            )
+            self.assertLess(panel_seconds, 1 / 30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+from time import perf_counter
+from unittest import TestCase, main, skip
+
+from numpy import array_equal, uint8, where, zeros
+from numpy.random import default_rng
+
+from ffstreamer.np.mask import generate_mask, merge_to_bgra32
+
+
+def _reference(image, chroma_color):
+    return where((image == chroma_color).all(axis=-1, keepdims=True), 0, 255)
+
+
+def _previous_generate_mask(image, chroma_color=(0, 0, 0)):
+    """
+    `generate_mask()` before the packed pixel comparison.
+    """
+    return _reference(image, chroma_color).astype(uint8)
+
+
+def measure_seconds_per_call(func, *args, count=20) -> float:
+    func(*args)
+    begin = perf_counter()
+    for _ in range(count):
+        func(*args)
+    return (perf_counter() - begin) / count
+
+
+def make_hud_image(height: int, width: int):
+    """
+    Mostly chroma-colored, as an overlay usually is.
+    """
+    image = zeros((height, width, 3), dtype=uint8)
+    image[height // 4 : height // 2, width // 4 :] = (255, 128, 0)
+    image[::7, ::5] = (0, 0, 1)
+    return image
+
+
+class MaskTestCase(TestCase):
+    def setUp(self):
+        self.image = default_rng(3).integers(0, 4, (12, 16, 3), dtype=uint8)
+
+    def test_generate_mask(self):
+        for chroma_color in ((0, 0, 0), (1, 2, 3)):
+            mask = generate_mask(self.image, chroma_color)
+            self.assertEqual((12, 16, 1), mask.shape)
+            self.assertTrue((_reference(self.image, chroma_color) == mask).all())
+
+    def test_generate_mask_not_contiguous(self):
+        image = self.image[:, ::-1]
+        mask = generate_mask(image)
+        self.assertTrue((_reference(image, (0, 0, 0)) == mask).all())
+
+    def test_generate_mask_1080p(self):
+        image = make_hud_image(1080, 1920)
+        expect = _previous_generate_mask(image)
+        mask = generate_mask(image)
+        self.assertEqual(expect.dtype, mask.dtype)
+        self.assertTrue(array_equal(expect, mask))
+
+        bgra = zeros((1080, 1920, 4), dtype=uint8)
+        generate_mask(image, out=bgra[:, :, 3:])
+        self.assertTrue(array_equal(expect, bgra[:, :, 3:]))
+
+    def test_generate_into_bgra(self):
+        bgra = zeros((12, 16, 4), dtype=uint8)
+        mask = generate_mask(self.image, out=bgra[:, :, 3:])
+        self.assertIs(bgra, merge_to_bgra32(self.image, mask, bgra))
+        self.assertTrue((self.image == bgra[:, :, :3]).all())
+        self.assertTrue((_reference(self.image, (0, 0, 0)) == bgra[:, :, 3:]).all())
+
+    def test_merge_to_bgra32(self):
+        mask = generate_mask(self.image)
+        bgra = merge_to_bgra32(self.image, mask)
+        self.assertEqual((12, 16, 4), bgra.shape)
+        self.assertTrue((self.image == bgra[:, :, :3]).all())
+        self.assertTrue((mask == bgra[:, :, 3:]).all())
+
+    @skip(reason="Too slow")
+    def test_benchmark(self):
+        image = make_hud_image(1080, 1920)
+        bgra = zeros((1080, 1920, 4), dtype=uint8)
+        previous = measure_seconds_per_call(_previous_generate_mask, image)
+        packed = measure_seconds_per_call(
+            generate_mask, image, (0, 0, 0), bgra[:, :, 3:]
+        )
+        print(f"\n1080p mask: previous {previous:.4f}s, packed {packed:.4f}s")
+        self.assertLess(packed, previous)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase, main
+
+from numpy import arange, uint8
+
+from ffstreamer.np.planes import (
+    frame_shape,
+    frame_size,
+    plane_shapes,
+    split_planes,
+)
+
+
+class PlanesTestCase(TestCase):
+    def test_plane_shapes(self):
+        self.assertEqual([(4, 6, 3)], plane_shapes(6, 4, "bgr24"))
+        self.assertEqual([(4, 6), (2, 3), (2, 3)], plane_shapes(6, 4, "yuv420p"))
+        self.assertEqual([(4, 6), (2, 3, 2)], plane_shapes(6, 4, "nv12"))
+        self.assertEqual([(3, 5), (2, 3), (2, 3)], plane_shapes(5, 3, "yuv420p"))
+        with self.assertRaises(ValueError):
+            plane_shapes(6, 4, "unknown")
+
+    def test_frame_size(self):
+        self.assertEqual(1920 * 1080 * 3, frame_size(1920, 1080, "bgr24"))
+        self.assertEqual(1920 * 1080 * 3 // 2, frame_size(1920, 1080, "yuv420p"))
+        self.assertEqual(1920 * 1080 * 3 // 2, frame_size(1920, 1080, "nv12"))
+
+    def test_frame_shape(self):
+        self.assertEqual((4, 6, 3), frame_shape(6, 4, "bgr24"))
+        self.assertEqual((6, 6), frame_shape(6, 4, "yuv420p"))
+        self.assertEqual((6, 6), frame_shape(6, 4, "nv12"))
+        self.assertEqual((27,), frame_shape(5, 3, "yuv420p"))
+
+    def test_split_planes(self):
+        data = arange(36, dtype=uint8)
+        y, u, v = split_planes(data.tobytes(), 6, 4, "yuv420p")
+        self.assertEqual(0, y[0, 0])
+        self.assertEqual(24, u[0, 0])
+        self.assertEqual(30, v[0, 0])
+        self.assertEqual((2, 3), v.shape)
+
+        y, uv = split_planes(data, 6, 4, "nv12")
+        self.assertEqual((2, 3, 2), uv.shape)
+        self.assertEqual(25, uv[0, 0, 1])
+
+        with self.assertRaises(ValueError):
+            split_planes(data[:-1], 6, 4, "nv12")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase, main
+
+from numpy import uint8, where, zeros
+from numpy.random import default_rng
+
+from ffstreamer.np.composite import OverlayCompositor
+from ffstreamer.np.tiles import (
+    Rect,
+    decode_tiles,
+    encode_tiles,
+    find_dirty_rects,
+    tiles_capacity,
+)
+
+
+class TilesTestCase(TestCase):
+    def test_find_dirty_rects(self):
+        mask = zeros((100, 200), dtype=bool)
+        self.assertEqual([], find_dirty_rects(mask, 16))
+
+        mask[10:20, 30:40] = True
+        mask[50:90, 150:160] = True
+        rects = find_dirty_rects(mask, 16)
+        self.assertEqual([Rect(30, 10, 10, 10), Rect(150, 50, 10, 40)], rects)
+
+    def test_find_dirty_rects_covers_mask(self):
+        mask = default_rng(0).random((70, 90)) < 0.05
+        covered = zeros(mask.shape, dtype=bool)
+        for rect in find_dirty_rects(mask, 8):
+            self.assertFalse(covered[rect.slices].any())
+            covered[rect.slices] = True
+        self.assertTrue(covered[mask].all())
+
+    def test_encode_decode(self):
+        height, width = 30, 40
+        rng = default_rng(1)
+        image = rng.integers(0, 256, (height, width, 3), dtype=uint8)
+        mask = zeros((height, width, 1), dtype=uint8)
+        mask[2:5, 3:9] = 255
+        mask[20:30, 0:40:3] = 7
+
+        data = encode_tiles(image, mask, 8)
+        self.assertLessEqual(data.size, tiles_capacity(width, height, 8))
+
+        compositor = OverlayCompositor((height, width, 3))
+        compositor.update_tiles(decode_tiles(data.tobytes()))
+        self.assertEqual((mask != 0).sum(), compositor.coverage)
+
+        background = rng.integers(0, 256, (height, width, 3), dtype=uint8)
+        expect = where(mask != 0, image, background)
+        self.assertTrue((expect == compositor.composite(background)).all())
+
+    def test_encode_empty(self):
+        image = zeros((4, 8, 3), dtype=uint8)
+        mask = zeros((4, 8, 1), dtype=uint8)
+        data = encode_tiles(image, mask)
+        self.assertEqual(4, data.size)
+        self.assertEqual([], decode_tiles(data))
+
+    def test_capacity(self):
+        height, width = 9, 9
+        image = zeros((height, width, 3), dtype=uint8)
+        mask = zeros((height, width, 1), dtype=uint8)
+        mask[::2, ::2] = 1
+        data = encode_tiles(image, mask, 2)
+        self.assertLessEqual(data.size, tiles_capacity(width, height, 2))
+
+
+if __name__ == "__main__":
+    main()
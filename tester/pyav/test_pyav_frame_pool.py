@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase, main
+
+from numpy import full, uint8
+
+from ffstreamer.pyav.pyav_frame_pool import PyavFramePool
+
+
+class PyavFramePoolTestCase(TestCase):
+    def test_bgr24(self):
+        pool = PyavFramePool(6, 4, size=2)
+        image = full((4, 6, 3), 7, dtype=uint8)
+        image[1, 2] = 200, 100, 50
+        frame = pool.fill(image)
+        self.assertTrue((image == frame.to_ndarray(format="bgr24")).all())
+
+        second = pool.acquire()
+        self.assertIsNot(frame, second)
+        self.assertIs(frame, pool.acquire())
+
+    def test_yuv420p(self):
+        width, height = 8, 4
+        pool = PyavFramePool(width, height, "yuv420p")
+        y_size = width * height
+        data = bytes([16] * y_size + [90] * (y_size // 4) + [240] * (y_size // 4))
+        frame = pool.fill(data)
+        y, u, v = pool.plane_views(frame)
+        self.assertTrue((y == 16).all())
+        self.assertTrue((u == 90).all())
+        self.assertTrue((v == 240).all())
+
+
+if __name__ == "__main__":
+    main()
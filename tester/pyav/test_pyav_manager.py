@@ -1,12 +1,28 @@
 # -*- coding: utf-8 -*-
 
 import os.path
+from asyncio import Event as AsyncEvent
+from asyncio import create_task, get_running_loop, sleep
 from os import path
+from queue import Full
 from tempfile import TemporaryDirectory
+from threading import Event as ThreadEvent
+from typing import List, Optional, Tuple
 from unittest import IsolatedAsyncioTestCase, main, skip
 
+from numpy import full, ndarray, uint8
+from overrides import override
+
 from ffstreamer.ffmpeg.ffprobe import inspect_source_size
+from ffstreamer.memory.spsc_header import SpscMeta
+from ffstreamer.np.tiles import decode_tiles
+from ffstreamer.pyav.pyav_callbacks import OnImageResult, PyavCallbacksInterface
 from ffstreamer.pyav.pyav_manager import PyavManager
+from ffstreamer.sync.overflow import (
+    OVERFLOW_BLOCK,
+    OVERFLOW_DROP_NEWEST,
+    OVERFLOW_DROP_OLDEST,
+)
 from tester.assets import get_big_buck_bunny_trailer_path
 
 
@@ -42,5 +58,165 @@ class PyavSenderTestCase(IsolatedAsyncioTestCase):
             self.assertEqual(height, dest_height)
 
 
+class _GateCallbacks(PyavCallbacksInterface):
+    def __init__(self):
+        self.gate = AsyncEvent()
+
+    @override
+    async def on_image(self, image: ndarray) -> OnImageResult:
+        await self.gate.wait()
+        return image
+
+
+class _ThreadCallbacks(PyavCallbacksInterface):
+    """
+    Hands the zero-copy view to a thread that reads it once the gate opens.
+    """
+
+    def __init__(self):
+        self.gate = ThreadEvent()
+        self.values: List[int] = list()
+
+    def read(self, image: ndarray) -> ndarray:
+        self.gate.wait(timeout=8.0)
+        self.values.append(int(image[0, 0, 0]))
+        return image
+
+    @override
+    async def on_image(self, image: ndarray) -> OnImageResult:
+        return await get_running_loop().run_in_executor(None, self.read, image)
+
+
+class PyavManagerInFlightTestCase(IsolatedAsyncioTestCase):
+    width, height = 4, 2
+
+    def create_manager(
+        self,
+        overflow: str,
+        callbacks: Optional[PyavCallbacksInterface] = None,
+        max_in_flight=2,
+        get_timeout=0.01,
+        frames: Optional[int] = None,
+    ) -> PyavManager:
+        manager = PyavManager(
+            "source",
+            "destination",
+            "mp4",
+            self.width,
+            self.height,
+            callbacks=callbacks if callbacks else _GateCallbacks(),
+            max_in_flight=max_in_flight,
+            overflow=overflow,
+            get_timeout=get_timeout,
+        )
+        producer = manager._improcs[0].producer
+        for i in range(producer.maxsize if frames is None else frames):
+            self.put_frame(manager, i)
+        return manager
+
+    def put_frame(self, manager: PyavManager, index: int) -> None:
+        image = full((self.height, self.width, 3), index + 1, dtype=uint8)
+        manager._improcs[0].producer.put(image, timeout=1.0, meta=SpscMeta(index))
+
+    async def collect(self, manager: PyavManager, count: int) -> List[Tuple[int, int]]:
+        result: List[Tuple[int, int]] = list()
+        consumer = manager._overlays[0].consumer
+        while len(result) < count:
+            await manager.process()
+            consumer.pull_nowait()
+            while not consumer.empty:
+                with consumer.lease_nowait() as lease:
+                    tiles = decode_tiles(lease.data) if lease.data.size else []
+                    value = int(tiles[0][1][0, 0, 0]) if tiles else 0
+                    result.append((lease.meta.frame_index, value))
+        return result
+
+    async def test_drop_newest(self):
+        callbacks = _GateCallbacks()
+        manager = self.create_manager(OVERFLOW_DROP_NEWEST, callbacks)
+        for _ in range(3):
+            await manager.process()
+        self.assertEqual(1, manager.dropped_newest)
+        self.assertEqual(3, manager.in_flight)
+
+        callbacks.gate.set()
+        overlays = await self.collect(manager, 3)
+        self.assertEqual([(0, 1), (1, 2), (2, 0)], overlays)
+
+    async def test_drop_oldest(self):
+        callbacks = _GateCallbacks()
+        manager = self.create_manager(OVERFLOW_DROP_OLDEST, callbacks)
+        for _ in range(3):
+            await manager.process()
+        self.assertEqual(1, manager.dropped_oldest)
+
+        callbacks.gate.set()
+        overlays = await self.collect(manager, 3)
+        self.assertEqual([(0, 0), (1, 2), (2, 3)], overlays)
+
+    async def test_block(self):
+        callbacks = _GateCallbacks()
+        manager = self.create_manager(OVERFLOW_BLOCK, callbacks)
+        for _ in range(3):
+            await manager.process()
+        self.assertEqual(2, manager.in_flight)
+
+        callbacks.gate.set()
+        overlays = await self.collect(manager, 2)
+        self.put_frame(manager, 2)
+        overlays += await self.collect(manager, 1)
+        self.assertEqual([(0, 1), (1, 2), (2, 3)], overlays)
+
+    async def test_overlay_while_waiting_for_frame(self):
+        callbacks = _GateCallbacks()
+        manager = self.create_manager(
+            OVERFLOW_BLOCK, callbacks, get_timeout=4.0, frames=1
+        )
+        await manager.process()
+        self.assertEqual(1, manager.in_flight)
+
+        async def _run() -> None:
+            while True:
+                await manager.process()
+
+        # No more frames come; the finished callback must not wait for one.
+        running = create_task(_run())
+        try:
+            get_running_loop().call_later(0.01, callbacks.gate.set)
+            consumer = manager._overlays[0].consumer
+            with await consumer.alease(timeout=2.0) as lease:
+                self.assertEqual(0, lease.meta.frame_index)
+        finally:
+            running.cancel()
+            manager.cancel_in_flight()
+
+    async def test_drop_oldest_keeps_slot_while_read(self):
+        callbacks = _ThreadCallbacks()
+        manager = self.create_manager(
+            OVERFLOW_DROP_OLDEST, callbacks, max_in_flight=1, frames=2
+        )
+        producer = manager._improcs[0].producer
+        try:
+            await manager.process()
+            await manager.process()
+            self.assertEqual(1, manager.dropped_oldest)
+
+            # Both slots stay leased while the dropped frame is still being read.
+            with self.assertRaises(Full):
+                producer.put(bytes(producer.item_size), timeout=0.05)
+
+            callbacks.gate.set()
+            overlays = await self.collect(manager, 2)
+            self.assertEqual([(0, 0), (1, 2)], overlays)
+            self.assertEqual([1, 2], sorted(callbacks.values))
+
+            while manager._abandoned:
+                await sleep(0.01)
+            self.put_frame(manager, 2)
+        finally:
+            callbacks.gate.set()
+            manager.cancel_in_flight()
+
+
 if __name__ == "__main__":
     main()
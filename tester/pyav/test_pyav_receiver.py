@@ -1,13 +1,22 @@
 # -*- coding: utf-8 -*-
 
 import os.path
+from fractions import Fraction
 from multiprocessing import Event
+from tempfile import TemporaryDirectory
 from unittest import TestCase, main
 
+from av import VideoFrame  # noqa
+from av import open as av_open  # noqa
+from numpy import uint8, zeros
+
 from ffstreamer.ffmpeg.ffprobe import inspect_source_size
 from ffstreamer.memory.spsc_queue import SpscQueue
 from ffstreamer.np.image import make_image_with_shape
-from ffstreamer.pyav.pyav_receiver import create_pyav_receiver_process
+from ffstreamer.pyav.pyav_receiver import (
+    PyavReceiver,
+    create_pyav_receiver_process,
+)
 from tester.assets import get_big_buck_bunny_trailer_path
 
 
@@ -38,6 +47,39 @@ class PyavReceiverTestCase(TestCase):
         done.set()
         process.join()
 
+    def test_timestamps(self):
+        shape = 48, 64, 3
+        time_base = Fraction(1, 25)
+        with TemporaryDirectory(suffix="ffstreamer.pyav.pyav_receiver") as tempdir:
+            video_path = os.path.join(tempdir, "video.mkv")
+            with av_open(video_path, mode="w") as container:
+                stream = container.add_stream("mpeg4", rate=25)
+                stream.width = shape[1]
+                stream.height = shape[0]
+                stream.pix_fmt = "yuv420p"
+                for pts in range(4):
+                    frame = VideoFrame.from_ndarray(zeros(shape, dtype=uint8))
+                    frame.pts = pts
+                    frame.time_base = time_base
+                    container.mux(stream.encode(frame))
+                container.mux(stream.encode(None))
+
+            queue = SpscQueue(8, shape[0] * shape[1] * shape[2])
+            receiver = PyavReceiver(video_path, queue.producer, Event())
+            try:
+                receiver.run()
+                metas = list()
+                for _ in range(4):
+                    with queue.consumer.lease(timeout=1.0) as lease:
+                        metas.append(lease.meta)
+            finally:
+                receiver.close()
+
+        self.assertEqual([0, 1, 2, 3], [meta.frame_index for meta in metas])
+        seconds = [meta.pts * meta.time_base for meta in metas]
+        self.assertEqual([Fraction(i, 25) for i in range(4)], seconds)
+        self.assertTrue(all(meta.capture_time for meta in metas))
+
 
 if __name__ == "__main__":
     main()
@@ -3,12 +3,16 @@
 from multiprocessing import Event
 from unittest import TestCase, main
 
-from numpy import concatenate, uint8
+from numpy import full, uint8, zeros
 from numpy.random import randint
 
 from ffstreamer.memory.spsc_queue import SpscQueue
 from ffstreamer.np.image import make_image_with_shape
-from ffstreamer.pyav.pyav_router import create_pyav_router_process
+from ffstreamer.np.tiles import encode_tiles, tiles_capacity
+from ffstreamer.pyav.pyav_router import (
+    DISPATCH_LEAST_LOADED,
+    create_pyav_router_process,
+)
 
 
 class PyavRouterTestCase(TestCase):
@@ -16,8 +20,7 @@ class PyavRouterTestCase(TestCase):
         width, height = 100, 50
         shape = height, width, 3
         item_size = height * width * shape[-1]
-        overlay_shape = height, width, 4
-        overlay_item_size = height * width * overlay_shape[-1]
+        overlay_item_size = tiles_capacity(width, height)
         mask_shape = height, width, 1
         queue_size = 10
 
@@ -30,8 +33,8 @@ class PyavRouterTestCase(TestCase):
         process = create_pyav_router_process(
             shape,
             receiver.consumer,
-            improc.producer,
-            overlay.consumer,
+            [improc.producer],
+            [overlay.consumer],
             sender.producer,
             done,
             synchronize=True,
@@ -49,10 +52,7 @@ class PyavRouterTestCase(TestCase):
 
         improc_image = make_image_with_shape(shape, improc_data)
         mask = randint(0, 256, mask_shape, dtype=uint8)
-        bgra = concatenate((improc_image, mask), axis=-1)
-        self.assertTupleEqual(bgra.shape, overlay_shape)
-
-        overlay.producer.put(bgra.tobytes())
+        overlay.producer.put(encode_tiles(improc_image, mask))
         send_data = sender.consumer.get()
         self.assertEqual(len(send_data), test_image_size)
 
@@ -62,6 +62,57 @@ class PyavRouterTestCase(TestCase):
         done.set()
         process.join()
 
+    def test_workers_in_order(self):
+        width, height = 8, 4
+        shape = height, width, 3
+        item_size = height * width * shape[-1]
+        overlay_item_size = tiles_capacity(width, height)
+        workers = 2
+
+        receiver = SpscQueue(8, item_size)
+        improcs = [SpscQueue(1, item_size) for _ in range(workers)]
+        overlays = [SpscQueue(1, overlay_item_size) for _ in range(workers)]
+        sender = SpscQueue(8, item_size)
+
+        done = Event()
+        process = create_pyav_router_process(
+            shape,
+            receiver.consumer,
+            [improc.producer for improc in improcs],
+            [overlay.consumer for overlay in overlays],
+            sender.producer,
+            done,
+            synchronize=True,
+            dispatch=DISPATCH_LEAST_LOADED,
+        )
+        process.start()
+
+        try:
+            for i in range(workers):
+                receiver.producer.put(full(shape, i, dtype=uint8))
+
+            leases = [improc.consumer.lease(timeout=8.0) for improc in improcs]
+            metas = [lease.meta for lease in leases]
+            self.assertEqual({0, 1}, {meta.frame_index for meta in metas})
+
+            # Finish the second frame first; the router must still send in order.
+            for i in reversed(range(workers)):
+                image = zeros(shape, dtype=uint8)
+                mask = zeros((height, width, 1), dtype=uint8)
+                image[1:] = 100 + leases[i].data[0]
+                mask[1:] = 255
+                leases[i].release()
+                overlays[i].producer.put(encode_tiles(image, mask), meta=metas[i])
+
+            for i in range(workers):
+                with sender.consumer.lease(timeout=8.0) as lease:
+                    image = lease.view(shape)
+                    self.assertEqual(i, image[0, 0, 0])
+                    self.assertEqual(100 + i, image[1, 0, 0])
+        finally:
+            done.set()
+            process.join()
+
 
 if __name__ == "__main__":
     main()
@@ -1,16 +1,20 @@
 # -*- coding: utf-8 -*-
 
 import os.path
+from fractions import Fraction
 from multiprocessing import Event
 from os import path
 from tempfile import TemporaryDirectory
 from unittest import TestCase, main
 
+from av import open as av_open  # noqa
 from numpy import uint8, zeros
 
 from ffstreamer.ffmpeg.ffprobe import inspect_source_size
+from ffstreamer.memory.latency_stats import LatencyTelemetry
+from ffstreamer.memory.spsc_header import SpscMeta
 from ffstreamer.memory.spsc_queue import SpscQueue
-from ffstreamer.pyav.pyav_sender import create_pyav_sender_process
+from ffstreamer.pyav.pyav_sender import PyavSender, create_pyav_sender_process
 
 
 class PyavSenderTestCase(TestCase):
@@ -54,6 +58,75 @@ class PyavSenderTestCase(TestCase):
 
         self.assertFalse(os.path.isfile(video_path))
 
+    def test_timestamps(self):
+        shape = 48, 64, 3
+        time_base = Fraction(1, 12800)
+        image = zeros(shape, dtype=uint8)
+        queue = SpscQueue(4, shape[0] * shape[1] * shape[2])
+        latency = LatencyTelemetry()
+
+        with TemporaryDirectory(suffix="ffstreamer.pyav.pyav_sender") as tempdir:
+            video_path = path.join(tempdir, "video.mp4")
+            sender = PyavSender(
+                video_path,
+                "mp4",
+                shape,
+                queue.consumer,
+                Event(),
+                latency=latency,
+            )
+            try:
+                # A frame was dropped before the 3rd one; the 4th repeats the 3rd pts.
+                for i, pts in enumerate((1000, 1512, 2536, 2536)):
+                    meta = SpscMeta(i, pts=pts, time_base=time_base, capture_time=0)
+                    queue.producer.put(image, meta=meta)
+                    sender.process()
+                self.assertEqual(time_base, sender.time_base)
+                # A capture time behind the timeline still moves it forward.
+                self.assertEqual(1538, sender.next_pts(SpscMeta(capture_time=0)))
+            finally:
+                sender.close()
+
+            self.assertEqual(4, latency.snapshot().frames)
+            with av_open(video_path) as container:
+                stream = container.streams.video[0]
+                pts = sorted(
+                    frame.pts * stream.time_base for frame in container.decode(stream)
+                )
+            expect = [Fraction(p, 12800) for p in (0, 512, 1536, 1537)]
+            self.assertEqual(expect, pts)
+
+    def test_planar_input(self):
+        width, height = 64, 48
+        y_size = width * height
+        data = bytes([200] * y_size + [128] * (y_size // 2))
+        for pixel_format in ("yuv420p", "nv12"):
+            queue = SpscQueue(2, len(data))
+            with TemporaryDirectory(suffix="ffstreamer.pyav.pyav_sender") as tempdir:
+                video_path = path.join(tempdir, "video.mp4")
+                sender = PyavSender(
+                    video_path,
+                    "mp4",
+                    (height, width, 3),
+                    queue.consumer,
+                    Event(),
+                    pixel_format=pixel_format,
+                )
+                try:
+                    for i in range(3):
+                        meta = SpscMeta(i, pixel_format=pixel_format)
+                        queue.producer.put(data, meta=meta)
+                        sender.process()
+                finally:
+                    sender.close()
+
+                with av_open(video_path) as container:
+                    stream = container.streams.video[0]
+                    frames = list(container.decode(stream))
+            self.assertEqual(3, len(frames))
+            luma = frames[0].reformat(format="yuv420p").to_ndarray()[:height]
+            self.assertLessEqual(abs(luma.mean() - 200), 2)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+from multiprocessing import Event
+from unittest import TestCase, main
+
+from numpy import full, ndarray, uint8
+from overrides import override
+
+from ffstreamer.memory.spsc_header import SpscMeta
+from ffstreamer.memory.spsc_queue import SpscQueue
+from ffstreamer.np.tiles import Rect, decode_tiles, tiles_capacity
+from ffstreamer.pyav.pyav_callbacks import OnImageResult, PyavCallbacksInterface
+from ffstreamer.pyav.pyav_worker import create_pyav_worker_process
+
+
+class _InvertCallbacks(PyavCallbacksInterface):
+    @override
+    async def on_image(self, image: ndarray) -> OnImageResult:
+        return 255 - image
+
+
+class PyavWorkerTestCase(TestCase):
+    def test_default(self):
+        width, height = 8, 4
+        shape = height, width, 3
+        improc = SpscQueue(1, height * width * 3)
+        overlay = SpscQueue(1, tiles_capacity(width, height))
+
+        done = Event()
+        process = create_pyav_worker_process(
+            shape,
+            _InvertCallbacks(),
+            improc.consumer,
+            overlay.producer,
+            done,
+        )
+        process.start()
+        try:
+            improc.producer.put(full(shape, 5, dtype=uint8), meta=SpscMeta(7))
+            with overlay.consumer.lease(timeout=8.0) as lease:
+                self.assertEqual(7, lease.meta.frame_index)
+                tiles = decode_tiles(lease.data)
+                self.assertEqual(1, len(tiles))
+                rect, bgra = tiles[0]
+                self.assertEqual(Rect(0, 0, width, height), rect)
+                self.assertTrue((bgra[:, :, :3] == 250).all())
+                self.assertTrue((bgra[:, :, 3] == 255).all())
+        finally:
+            done.set()
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -36,6 +36,10 @@ class ModuleIsolatedAsyncioTestCase(IsolatedAsyncioTestCase):
     def ffstreamer_test_default(self):
         return self._assert_modules_name("ffstreamer_test_default")
 
+    @property
+    def ffstreamer_test_frame(self):
+        return self._assert_modules_name("ffstreamer_test_frame")
+
     @property
     def test_module_names(self):
-        return [self.ffstreamer_test_default]
+        return [self.ffstreamer_test_default, self.ffstreamer_test_frame]
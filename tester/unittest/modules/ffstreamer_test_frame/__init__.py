@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+
+from time import sleep
+
+__version__ = "0.0.0"
+__doc__ = "Frames of [index, delay in centiseconds, failure flag] triples"
+
+
+def on_frame(data):
+    """
+    The result is the frame as it is after the delay, with the index it had
+    before; a frame overwritten in the meantime comes out torn.
+    """
+    index = data[0]
+    sleep(data[1] / 100)
+    if data[2]:
+        raise RuntimeError(f"Frame #{index} failed")
+    result = bytearray(data)
+    result[0] = index
+    return bytes(result)